@@ -1,67 +1,200 @@
-from typing import Dict, Any, List
-import requests
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
 import os
+import time
+import asyncio
 from dotenv import load_dotenv
+from services.inference_backends import get_backend
+from services.batching import get_batcher
+from services.completion_cache import get_completion_cache, CompletionCache
+from services.single_flight import get_single_flight
+from services.prompt_budget import PromptBudgeter, PromptSection
+from services.model_router import get_model_router
+from services.metrics import get_metrics, record_usage, estimate_tokens
 
 # Load environment variables
 load_dotenv()
 
 class BaseAgent:
-    def __init__(self, name: str, system_prompt: str, model_name: str = "Mistral-7B-Instruct-v0.2"):
+    def __init__(self, name: str, system_prompt: str, model_name: str = "mistralai/Mistral-7B-Instruct-v0.2"):
         """
         Initialize a base agent with a Hugging Face model.
         
         Args:
             name: The name of the agent
             system_prompt: Instructions for the agent
-            model_name: Hugging Face model identifier
+            model_name: Hugging Face model identifier (also selects the backend)
         """
         self.name = name
         self.system_prompt = system_prompt
         self.model_name = model_name
         
+        # Stage name used in the model routing table, e.g. "publishing"
+        self.route_name = name.lower().replace(" agent", "").strip().replace(" ", "_")
+        
+        # Generation settings sent with every request
+        self.generation_parameters = {
+            "max_new_tokens": 512,
+            "temperature": 0.7,
+            "top_p": 0.9
+        }
+        
         # Get API token from environment
         self.api_token = os.environ.get("HUGGINGFACE_API_KEY")
         
-        if not self.api_token:
+        # Backend serving this agent's model (remote API or local CPU engine)
+        self.backend = get_backend(self.model_name)
+        
+        # Shared router that picks a model per (agent, task)
+        self.router = get_model_router()
+        
+        # Shared micro-batcher that groups concurrent prompts for the same model
+        self.batcher = get_batcher()
+        
+        # In-flight request table shared by all agents
+        self.single_flight = get_single_flight()
+        
+        # Shared completion cache (None when disabled)
+        self.completion_cache = get_completion_cache()
+        
+        # Per-agent latency and outcome metrics exposed at /metrics
+        metrics = get_metrics()
+        self.llm_latency = metrics.histogram(
+            "agent_llm_call_duration_seconds", "Latency of agent model calls, including cache hits",
+            ["agent", "task", "model"]
+        )
+        self.llm_calls = metrics.counter(
+            "agent_llm_calls_total", "Agent model calls by outcome", ["agent", "task", "outcome"]
+        )
+        
+        if not self.backend.is_available():
             print("WARNING: No Hugging Face API token found. Using fallback responses.")
             
-    def process_with_model(self, prompt: str) -> str:
-        """Process a prompt with the Hugging Face API using Llama 3."""
-        if not self.api_token:
+    def _candidates(self, task: str) -> List[str]:
+        """Return the route's models with a usable backend, the chosen tier first."""
+        candidates = self.router.candidates(self.route_name, task, self.model_name)
+        return [model_id for model_id in candidates if get_backend(model_id).is_available()]
+    
+    async def process_with_model(self, prompt: str, timeout: Optional[float] = None,
+                                 use_cache: bool = True, task: str = "default",
+                                 prompt_for: Optional[Callable[[str], Awaitable[Tuple[str, Dict[str, Any]]]]] = None
+                                 ) -> str:
+        """
+        Process a prompt with the model routed for this task without blocking the event loop.
+        
+        If the routed model fails, or has not answered within the route's SLO,
+        the route's remaining models are tried in order before falling back to
+        a canned response. An abandoned slow call still finishes in the
+        background, so its latency is recorded and its result cached.
+        
+        Args:
+            prompt: The task prompt (the system prompt is prepended), fitted for the first tier
+            timeout: Per-call timeout in seconds, defaults to the client setting
+            use_cache: Set to False to bypass the completion cache for this call
+            task: Task name used to pick a model from the routing table
+            prompt_for: Re-fits the prompt for a fallback tier, returning (prompt, budget report);
+                without it every tier is sent the same prompt
+        """
+        candidates = self._candidates(task)
+        if not candidates:
+            self.llm_calls.inc(agent=self.route_name, task=task, outcome="unavailable")
             return self._fallback_response(prompt)
-            
-        print(f"[{self.name}] Sending request to Hugging Face API for Llama 3")
-        
-        # Combine system prompt with the input prompt
-        full_prompt = f"{self.system_prompt}\n\n{prompt}"
-        
-        # Prepare the API request - use Llama 3 model
-        api_url = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.2"
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        payload = {
-            "inputs": full_prompt,
-            "parameters": {
-                "max_new_tokens": 512,
-                "temperature": 0.7,
-                "top_p": 0.9
-            }
-        }
         
-        try:
-            # Make the API request
-            response = requests.post(api_url, headers=headers, json=payload)
-            response.raise_for_status()
+        parameters = dict(self.generation_parameters)
+        slo = self.router.slo_for(self.route_name, task)
+        
+        record_usage(llm_calls=1, prompt_tokens=estimate_tokens(f"{self.system_prompt}\n\n{prompt}"))
+        started = time.monotonic()
+        for position, model_id in enumerate(candidates):
+            backend = get_backend(model_id)
+            print(f"[{self.name}] Sending request to {backend.name} backend for {model_id}")
             
-            # Parse the response
-            result = response.json()
+            # A fallback tier may have a much smaller context window than the one the prompt was fitted for
+            tier_prompt = prompt
+            if position > 0 and prompt_for is not None:
+                tier_prompt, _ = await prompt_for(model_id)
             
-            if isinstance(result, list) and len(result) > 0:
-                return result[0].get("generated_text", str(result[0]))
-            return str(result)
-        except Exception as e:
-            print(f"[{self.name}] Error using Hugging Face API: {e}")
-            return self._fallback_response(prompt)
+            # Combine system prompt with the input prompt
+            full_prompt = f"{self.system_prompt}\n\n{tier_prompt}"
+            
+            # Identical prompts in flight at the same time share a single upstream call
+            key = CompletionCache.make_key(model_id, self.system_prompt, tier_prompt, parameters)
+            flight_key = key if use_cache else f"{key}:nocache"
+            
+            # Every tier but the last must answer within the SLO, or the next one is asked
+            is_last = position == len(candidates) - 1
+            deadline = None if is_last else slo
+            try:
+                completion = await asyncio.wait_for(
+                    self.single_flight.do(
+                        flight_key,
+                        lambda: self._complete(key, backend, model_id, full_prompt, parameters, timeout, use_cache)
+                    ),
+                    timeout=deadline
+                )
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError) and deadline is not None:
+                    reason = f"no answer within the {deadline:g}s SLO"
+                else:
+                    reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+                print(f"[{self.name}] Error using {backend.name} backend for {model_id}: {reason}")
+                if not is_last:
+                    self.router.record_fallback(self.route_name, task, model_id, candidates[position + 1], reason)
+                    continue
+                self.llm_calls.inc(agent=self.route_name, task=task, outcome="error")
+                record_usage(llm_errors=1)
+                return self._fallback_response(prompt)
+            
+            self.llm_latency.observe(time.monotonic() - started, agent=self.route_name, task=task, model=model_id)
+            self.llm_calls.inc(agent=self.route_name, task=task, outcome="ok" if position == 0 else "fallback")
+            record_usage(completion_tokens=estimate_tokens(completion))
+            return completion
+    
+    async def fit_prompt(self, sections: List[PromptSection], overhead: str = "",
+                         query: str = "", task: str = "default",
+                         model_id: Optional[str] = None) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Compact prompt sections so the full prompt fits a model's budget.
+        
+        Args:
+            sections: Variable prompt material, in prompt order
+            overhead: The rest of the prompt, rendered with empty sections
+            query: Text describing what matters, used to rank passages
+            task: Task name; the budget follows the first tier process_with_model will try
+            model_id: Fit for this model instead, e.g. a fallback tier
+        """
+        if model_id is None:
+            model_id = (self._candidates(task) or self.router.models_for(self.route_name, task, self.model_name))[0]
+        budgeter = PromptBudgeter(model_id, max_new_tokens=self.generation_parameters["max_new_tokens"])
+        # Tokenizer loading and counting are CPU/disk bound, keep them off the event loop
+        fitted, report = await asyncio.to_thread(
+            budgeter.fit, sections, f"{self.system_prompt}\n\n{overhead}", query
+        )
+        if report["tokens_saved"] > 0:
+            print(f"[{self.name}] Prompt budget: {report['tokens_before']} -> {report['tokens_after']} tokens "
+                  f"({report['tokens_saved']} saved, budget {report['budget']})")
+        return fitted, report
+    
+    async def _complete(self, key: str, backend, model_id: str, full_prompt: str, parameters: Dict[str, Any],
+                        timeout: Optional[float], use_cache: bool) -> str:
+        """Serve a completion from the cache, or generate and cache it."""
+        cache = self.completion_cache if use_cache else None
+        if cache is not None:
+            cached = await cache.aget(key)
+            if cached is not None:
+                print(f"[{self.name}] Completion cache hit")
+                return cached
+        
+        started = time.monotonic()
+        try:
+            completion = await self.batcher.submit(backend, model_id, full_prompt, parameters, timeout=timeout)
+        except Exception:
+            self.router.record(model_id, time.monotonic() - started, ok=False)
+            raise
+        self.router.record(model_id, time.monotonic() - started, ok=True)
+        
+        if cache is not None:
+            await cache.aset(key, model_id, completion)
+        return completion
     
     def _fallback_response(self, prompt: str) -> str:
         """Generate a fallback response when the API is unavailable."""
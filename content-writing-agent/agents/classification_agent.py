@@ -64,7 +64,7 @@ class ContentClassificationAgent(BaseAgent):
         """
         
         # Use the model to classify content
-        classification_result = self.process_with_model(classification_prompt)
+        classification_result = await self.process_with_model(classification_prompt, task="classify")
         print(f"Classification complete for: {title}")
         
         # Parse the classification results
@@ -1,11 +1,10 @@
 import asyncio
 import uuid
-import os
-import json
 from typing import Dict, Any, List
 from .base_agent import BaseAgent
 from .monitor_agent import WebMonitorAgent
 from .classification_agent import ContentClassificationAgent
+from services.task_journal import TaskJournal
 
 
 class CoordinatorAgent(BaseAgent):
@@ -22,28 +21,18 @@ class CoordinatorAgent(BaseAgent):
         # Initialize the classification agent
         self.classification_agent = ContentClassificationAgent()
         
-        # Initialize a task queue file path
-        self.task_queue_file = "data/task_queue.json"
-        
-        # Load existing task queue if it exists
-        self.task_queue = self._load_task_queue()
+        # Task queue journal shared with other worker processes; loads existing tasks
+        self.task_journal = TaskJournal("data/task_queue")
     
-    def _load_task_queue(self):
-        """Load the task queue from file."""
-        if os.path.exists(self.task_queue_file):
-            try:
-                with open(self.task_queue_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading task queue: {e}")
-        return []
+    @property
+    def task_queue(self) -> List[Dict[str, Any]]:
+        """Every content plan created so far, including those from other worker processes."""
+        return self.task_journal.all()
     
-    def _save_task_queue(self):
-        """Save the task queue to file."""
+    def _append_to_task_queue(self, plans: List[Dict[str, Any]]):
+        """Append plans to the task queue journal."""
         try:
-            os.makedirs(os.path.dirname(self.task_queue_file), exist_ok=True)
-            with open(self.task_queue_file, 'w') as f:
-                json.dump(self.task_queue, f, indent=2)
+            self.task_journal.add(plans)
         except Exception as e:
             print(f"Error saving task queue: {e}")
     
@@ -119,12 +108,9 @@ class CoordinatorAgent(BaseAgent):
         for update in update_result["updates"]:
             plan = await self.create_content_plan(update)
             content_plans.append(plan)
-            
-            # Add to task queue
-            self.task_queue.append(plan)
         
-        # Save the updated task queue
-        self._save_task_queue()
+        # Add them to the shared task queue
+        await asyncio.to_thread(self._append_to_task_queue, content_plans)
         
         return {
             "status": "updates_processed",
@@ -139,6 +125,6 @@ class CoordinatorAgent(BaseAgent):
         if command == "check_updates":
             return await self.process_new_updates()
         elif command == "get_queue":
-            return {"task_queue": self.task_queue}
+            return {"task_queue": await asyncio.to_thread(self.task_journal.all)}
         else:
             return {"error": f"Unknown command: {command}"}
\ No newline at end of file
@@ -1,5 +1,6 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from .base_agent import BaseAgent
+from services.prompt_budget import PromptSection
 
 class FactCheckAgent(BaseAgent):
     def __init__(self):
@@ -20,14 +21,15 @@ class FactCheckAgent(BaseAgent):
         print(f"[Fact Check Agent] Reviewing article with ID: {content_id}")
         
         # Prepare the fact-checking prompt
-        fact_check_prompt = f"""
+        def build_prompt(article_text: str, report_text: str) -> str:
+            return f"""
         Please fact-check this article against the research report.
         
         ARTICLE:
-        {article_content}
+        {article_text}
         
         RESEARCH REPORT:
-        {research_report}
+        {report_text}
         
         Review the article for:
         1. Any factual inaccuracies or claims not supported by the research
@@ -39,8 +41,26 @@ class FactCheckAgent(BaseAgent):
         Format your response as a list of findings, each with a correction or suggestion.
         """
         
-        # Generate fact-checking report using the model
-        fact_check_report = self.process_with_model(fact_check_prompt)
+        # Keep the article and research within the model's token budget
+        title = article_content.split("\n")[0].lstrip("# ").strip()
+        async def fitted_prompt(model_id: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+            sections, report = await self.fit_prompt(
+                [
+                    PromptSection("article", article_content, weight=2.0),
+                    PromptSection("research_report", research_report, weight=1.0)
+                ],
+                overhead=build_prompt("", ""),
+                query=title,
+                task="fact_check",
+                model_id=model_id
+            )
+            return build_prompt(sections["article"], sections["research_report"]), report
+        
+        fact_check_prompt, prompt_budget = await fitted_prompt()
+        
+        # Generate fact-checking report using the model; a fallback tier gets the prompt re-fitted to its window
+        fact_check_report = await self.process_with_model(fact_check_prompt, task="fact_check",
+                                                          prompt_for=fitted_prompt)
         
         # Check if there are significant issues
         if "no significant issues" in fact_check_report.lower() or "no factual inaccuracies" in fact_check_report.lower():
@@ -51,5 +71,6 @@ class FactCheckAgent(BaseAgent):
         return {
             "content_id": content_id,
             "fact_check_report": fact_check_report,
+            "prompt_budget": prompt_budget,
             "status": status
         }
\ No newline at end of file
@@ -1,14 +1,16 @@
+import os
+import time
+import hashlib
+import calendar
 import feedparser
-import requests
 from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-import time
-import random
+from datetime import datetime
 import asyncio
-import json
-import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base_agent import BaseAgent
+from services.seen_urls import get_seen_url_index
+from services.feed_fetcher import get_polite_fetcher
+from services.feed_state import get_feed_state_store
 
 class WebMonitorAgent(BaseAgent):
     def __init__(self):
@@ -25,109 +27,184 @@ class WebMonitorAgent(BaseAgent):
             {"name": "MIT Technology Review AI", "url": "https://www.technologyreview.com/topic/artificial-intelligence/feed"}
         ]
         
-        # Keep track of articles we've already processed
-        self.processed_urls_file = "data/processed_urls.json"
-        self.processed_urls = self._load_processed_urls()
-        
-    def _load_processed_urls(self):
-        """Load the set of processed URLs from file."""
-        if os.path.exists(self.processed_urls_file):
-            try:
-                with open(self.processed_urls_file, 'r') as f:
-                    return set(json.load(f))
-            except Exception as e:
-                print(f"Error loading processed URLs: {e}")
-        return set()
-    
-    def _save_processed_urls(self):
-        """Save the set of processed URLs to file."""
-        try:
-            os.makedirs(os.path.dirname(self.processed_urls_file), exist_ok=True)
-            with open(self.processed_urls_file, 'w') as f:
-                json.dump(list(self.processed_urls), f)
-        except Exception as e:
-            print(f"Error saving processed URLs: {e}")
+        # Keep track of articles we've already seen; shared by all worker processes
+        self.seen_urls = get_seen_url_index()
+        
+        # Feeds and articles are fetched concurrently, politely per host
+        self.fetcher = get_polite_fetcher()
+        
+        # Validators and high-water marks per feed, so unchanged feeds cost one small request
+        self.feed_states = get_feed_state_store()
+        self.max_age_hours = float(os.environ.get("FEED_MAX_AGE_HOURS", "24"))
+        self.max_entries_per_poll = 3
     
     async def check_for_updates(self) -> List[Dict[str, Any]]:
         """Check sources for new AI updates."""
-        new_updates = []
-        
-        for source in self.sources:
-            try:
-                print(f"Checking source: {source['name']}")
-                # Parse the RSS feed
-                feed = feedparser.parse(source["url"])
-                
-                # Get articles from the last 24 hours
-                cutoff_time = datetime.now() - timedelta(hours=24)
-                
-                for entry in feed.entries[:3]:  # Limit to 3 entries per source for testing
-                    # Get publication date
-                    if hasattr(entry, 'published_parsed'):
-                        pub_date = datetime(*entry.published_parsed[:6])
-                    else:
-                        # If no date, assume it's recent
-                        pub_date = datetime.now()
-                    
-                    # Skip if we've already processed it
-                    if entry.link in self.processed_urls:
-                        continue
-                    
-                    print(f"  Found potential article: {entry.title}")
-                    
-                    # Get article content
-                    article_content = self._fetch_article_content(entry.link)
-                    
-                    # Simple AI-related keyword check instead of using model
-                    ai_keywords = ["ai", "artificial intelligence", "machine learning", "neural network", 
-                                   "deep learning", "llm", "large language model", "chatgpt", "gpt", 
-                                   "claude", "gemini", "openai", "anthropic"]
-                    
-                    title_lower = entry.title.lower()
-                    content_lower = article_content.lower()
-                    
-                    # Check if any AI keywords are in the title or content
-                    is_ai_related = any(keyword in title_lower or keyword in content_lower 
-                                        for keyword in ai_keywords)
-                    
-                    if is_ai_related:
-                        print(f"  ✓ Article is relevant: {entry.title}")
-                        new_updates.append({
-                            "title": entry.title,
-                            "url": entry.link,
-                            "source": source["name"],
-                            "published_date": pub_date.isoformat(),
-                            "content_snippet": article_content[:1000],
-                            "analysis": f"This article about '{entry.title}' contains AI-related content and appears to be significant news about AI technology or applications."
-                        })
-                        
-                        # Mark as processed
-                        self.processed_urls.add(entry.link)
-                    else:
-                        print(f"  ✗ Article not relevant: {entry.title}")
-                
-                # Be nice to the servers - add a small delay between sources
-                await asyncio.sleep(random.uniform(1, 3))
-                
-            except Exception as e:
-                print(f"Error processing source {source['name']}: {e}")
-        
-        # Save the updated processed URLs
-        self._save_processed_urls()
-        
-        return new_updates
+        # Forget URLs older than the retention window so the index stays bounded
+        expired = await asyncio.to_thread(self.seen_urls.expire)
+        if expired:
+            print(f"Forgot {expired} expired URL(s)")
+        
+        # All sources at once; the fetcher keeps each host to its own pace
+        results = await asyncio.gather(*(self._check_source(source) for source in self.sources))
+        return [update for updates in results for update in updates]
     
-    def _fetch_article_content(self, url: str) -> str:
-        """Fetch and extract the main content of an article."""
+    @staticmethod
+    def _entry_id(entry: Any) -> str:
+        return entry.get("id") or entry.link
+    
+    @staticmethod
+    def _entry_time(entry: Any) -> Optional[float]:
+        """Publish time of an entry as a UTC timestamp, or None if the feed gives none."""
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        return calendar.timegm(parsed) if parsed else None
+    
+    def _new_entries(self, entries: List[Any], state: Dict[str, Any], cutoff: float) -> List[Any]:
+        """Return the entries above the feed's high-water mark, newest first."""
+        newest = state.get("newest_published", 0)
+        known_ids = set(state.get("head_ids", []))
+        # Undated entries first, then newest first, so everything after the first known dated entry is older
+        entries = sorted(entries, key=lambda entry: -(self._entry_time(entry) or float("inf")))
+        
+        new_entries = []
+        for entry in entries:
+            published = self._entry_time(entry)
+            if published is None:
+                if self._entry_id(entry) not in known_ids:
+                    new_entries.append(entry)
+                continue
+            if self._entry_id(entry) in known_ids or published < max(newest, cutoff):
+                break
+            new_entries.append(entry)
+        return new_entries
+    
+    async def _check_source(self, source: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Poll one feed and check its new entries concurrently."""
         try:
-            response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-            soup = BeautifulSoup(response.content, 'html.parser')
+            print(f"Checking source: {source['name']}")
+            state = await asyncio.to_thread(self.feed_states.get, source["url"])
+            
+            # Conditional request: an unchanged feed answers 304 with no body
+            headers = {}
+            if state.get("etag"):
+                headers["If-None-Match"] = state["etag"]
+            if state.get("last_modified"):
+                headers["If-Modified-Since"] = state["last_modified"]
+            response = await self.fetcher.get(source["url"], kind="feed", headers=headers)
+            if response.status_code == 304:
+                print(f"  {source['name']} unchanged")
+                return []
+            response.raise_for_status()
+            
+            # Servers that ignore the validators may still send the same document
+            body_hash = hashlib.sha256(response.content).hexdigest()
+            if body_hash == state.get("body_hash"):
+                print(f"  {source['name']} unchanged")
+                return []
+            
+            # Parse the RSS feed off the event loop
+            feed = await asyncio.to_thread(feedparser.parse, response.content)
+            
+            # Get articles from the last 24 hours that are newer than anything seen in this feed before
+            cutoff_time = time.time() - self.max_age_hours * 3600
+            new_entries = self._new_entries(feed.entries, state, cutoff_time)
+            
+            # Oldest first, a few per poll (for testing); the rest stay above the mark for the next poll
+            oldest_first = new_entries[::-1]
+            entries, pending = oldest_first[:self.max_entries_per_poll], oldest_first[self.max_entries_per_poll:]
             
-            # Extract text from paragraphs
-            paragraphs = soup.find_all('p')
-            content = ' '.join([p.get_text() for p in paragraphs])
+            # One lookup for the whole feed instead of one per entry
+            unseen = set(await asyncio.to_thread(self.seen_urls.unseen, [entry.link for entry in entries]))
             
-            return content
+            results = await asyncio.gather(*(self._check_entry(source, entry)
+                                             for entry in entries if entry.link in unseen))
+            
+            # Move the high-water mark only over the entries that have been handled
+            handled_times = [self._entry_time(entry) for entry in entries]
+            pending_ids = {self._entry_id(entry) for entry in pending}
+            await asyncio.to_thread(self.feed_states.put, source["url"], {
+                # With entries still pending the same document must be fetched and read again
+                "etag": None if pending else response.headers.get("ETag"),
+                "last_modified": None if pending else response.headers.get("Last-Modified"),
+                "body_hash": None if pending else body_hash,
+                "newest_published": max([state.get("newest_published", 0)] + [t for t in handled_times if t]),
+                "head_ids": [self._entry_id(entry) for entry in feed.entries
+                             if self._entry_id(entry) not in pending_ids][:100]
+            })
+            print(f"  {source['name']}: {len(new_entries)} new of {len(feed.entries)} entries"
+                  + (f", {len(pending)} left for the next poll" if pending else ""))
+            return [update for update in results if update is not None]
+        
+        except Exception as e:
+            print(f"Error processing source {source['name']}: {e}")
+            return []
+    
+    async def _check_entry(self, source: Dict[str, str], entry: Any) -> Optional[Dict[str, Any]]:
+        """Fetch one feed entry and return it as an update if it is AI-related."""
+        # Get publication date
+        if hasattr(entry, 'published_parsed'):
+            pub_date = datetime(*entry.published_parsed[:6])
+        else:
+            # If no date, assume it's recent
+            pub_date = datetime.now()
+        
+        # Skip if we've already processed it or another worker is checking it right now
+        if not await asyncio.to_thread(self.seen_urls.claim, entry.link):
+            return None
+        
+        print(f"  Found potential article: {entry.title}")
+        
+        # Get article content
+        try:
+            article_content = await self._fetch_article_content(entry.link)
+        except BaseException:
+            await asyncio.to_thread(self.seen_urls.release, entry.link)
+            raise
+        
+        # Simple AI-related keyword check instead of using model
+        ai_keywords = ["ai", "artificial intelligence", "machine learning", "neural network", 
+                       "deep learning", "llm", "large language model", "chatgpt", "gpt", 
+                       "claude", "gemini", "openai", "anthropic"]
+        
+        title_lower = entry.title.lower()
+        content_lower = article_content.lower()
+        
+        # Check if any AI keywords are in the title or content
+        is_ai_related = any(keyword in title_lower or keyword in content_lower 
+                            for keyword in ai_keywords)
+        
+        if not is_ai_related:
+            print(f"  ✗ Article not relevant: {entry.title}")
+            await asyncio.to_thread(self.seen_urls.release, entry.link)
+            return None
+        
+        print(f"  ✓ Article is relevant: {entry.title}")
+        
+        # Mark as processed
+        await asyncio.to_thread(self.seen_urls.mark_processed, entry.link)
+        return {
+            "title": entry.title,
+            "url": entry.link,
+            "source": source["name"],
+            "published_date": pub_date.isoformat(),
+            "content_snippet": article_content[:1000],
+            "analysis": f"This article about '{entry.title}' contains AI-related content and appears to be significant news about AI technology or applications."
+        }
+    
+    @staticmethod
+    def _extract_text(html: bytes) -> str:
+        """Extract the main content of an article page."""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Extract text from paragraphs
+        paragraphs = soup.find_all('p')
+        return ' '.join([p.get_text() for p in paragraphs])
+    
+    async def _fetch_article_content(self, url: str) -> str:
+        """Fetch and extract the main content of an article."""
+        try:
+            response = await self.fetcher.get(url, kind="article")
+            return await asyncio.to_thread(self._extract_text, response.content)
         except Exception as e:
             print(f"Error fetching article content: {e}")
             return ""
@@ -38,7 +38,7 @@ class ProofreadingAgent(BaseAgent):
         """
         
         # Generate proofreading results using the model
-        proofreading_results = self.process_with_model(proofreading_prompt)
+        proofreading_results = await self.process_with_model(proofreading_prompt, task="proofread")
         
         # Extract edited article if possible
         edited_article = article_content  # Default to original
@@ -1,8 +1,8 @@
 from typing import Dict, Any
-import os
-import json
+import asyncio
 from datetime import datetime
 from .base_agent import BaseAgent
+from services.artifact_store import get_artifact_store
 
 class PublishingAgent(BaseAgent):
     def __init__(self):
@@ -46,7 +46,24 @@ class PublishingAgent(BaseAgent):
         3. Suggested social media post (280 characters max)
         """
         
-        metadata_result = self.process_with_model(metadata_prompt)
+        # LinkedIn typically needs a shorter format
+        linkedin_prompt = f"""
+                Create a shortened version of this article suitable for LinkedIn:
+                
+                ORIGINAL ARTICLE TITLE: {title}
+                
+                ORIGINAL ARTICLE:
+                {article_content[:1000]}...
+                
+                Create a 300-500 word professional summary that highlights the key points
+                while maintaining a tone appropriate for a professional network.
+                """
+        
+        # The metadata and LinkedIn prompts are independent, so run them concurrently
+        metadata_result, linkedin_content = await asyncio.gather(
+            self.process_with_model(metadata_prompt, task="metadata"),
+            self.process_with_model(linkedin_prompt, task="linkedin")
+        )
         
         # Create publication package
         publication_package = {
@@ -73,54 +90,28 @@ class PublishingAgent(BaseAgent):
                     "import_url": f"https://yourdomain.com/articles/{content_id}"
                 }
             elif platform == "linkedin":
-                # LinkedIn typically needs a shorter format
-                linkedin_prompt = f"""
-                Create a shortened version of this article suitable for LinkedIn:
-                
-                ORIGINAL ARTICLE TITLE: {title}
-                
-                ORIGINAL ARTICLE:
-                {article_content[:1000]}...
-                
-                Create a 300-500 word professional summary that highlights the key points
-                while maintaining a tone appropriate for a professional network.
-                """
-                
-                linkedin_content = self.process_with_model(linkedin_prompt)
-                
                 publication_package["platforms"][platform] = {
                     "format": "text",
                     "content": linkedin_content
                 }
         
-        # Save publication package
-        publication_dir = os.path.join("data", "publications")
-        os.makedirs(publication_dir, exist_ok=True)
-        
-        file_path = os.path.join(publication_dir, f"publication_{content_id}.json")
-        with open(file_path, "w") as f:
-            json.dump(publication_package, f, indent=2)
+        # Save the publication package and the per-platform files in one batched write
+        publication_dir = "publications"
+        json_key = f"{publication_dir}/publication_{content_id}.json"
+        platform_keys = {p: f"{publication_dir}/{p}/{content_id}.{'txt' if p == 'linkedin' else 'md'}"
+                         for p in self.platforms}
         
-        # Also save as formatted files for convenience
+        artifacts = {json_key: publication_package}
         for platform, data in publication_package["platforms"].items():
-            platform_dir = os.path.join(publication_dir, platform)
-            os.makedirs(platform_dir, exist_ok=True)
-            
-            if platform == "linkedin":
-                filename = f"{content_id}.txt"
-            else:
-                filename = f"{content_id}.md"
-                
-            with open(os.path.join(platform_dir, filename), "w") as f:
-                f.write(data["content"])
+            artifacts[platform_keys[platform]] = data["content"]
+        await get_artifact_store().aput_many(artifacts)
         
         return {
             "content_id": content_id,
             "publication_package": publication_package,
             "files": {
-                "json": file_path,
-                "platforms": {p: os.path.join(publication_dir, p, f"{content_id}.{'txt' if p == 'linkedin' else 'md'}") 
-                             for p in self.platforms}
+                "json": json_key,
+                "platforms": platform_keys
             },
             "status": "published"
         }
\ No newline at end of file
@@ -1,8 +1,11 @@
 from typing import Dict, Any, List
-import requests
+import asyncio
+import httpx
 from bs4 import BeautifulSoup
 import re
 from .base_agent import BaseAgent
+from services.metrics import get_metrics, record_usage
+from services.feed_fetcher import get_polite_fetcher
 
 class ResearchAgent(BaseAgent):
     def __init__(self):
@@ -12,8 +15,69 @@ class ResearchAgent(BaseAgent):
         Be thorough but concise, focusing on the most relevant information."""
         
         super().__init__(name="Research Agent", system_prompt=system_prompt)
+        
+        # Searches and fetches share the process-wide async client, so they never block the event loop
+        # that other pipelines and the API run on, and each host is only hit at a polite pace
+        self.fetcher = get_polite_fetcher()
+        self.headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36"
+        }
+        self.bytes_fetched = get_metrics().counter(
+            "research_fetched_bytes_total", "Bytes downloaded by the research agent", ["kind"]
+        )
+    
+    async def _get(self, url: str, kind: str) -> httpx.Response:
+        """GET a URL with the shared client and account for the bytes downloaded."""
+        response = await self.fetcher.get(url, kind=f"research_{kind}", headers=self.headers)
+        self.bytes_fetched.inc(len(response.content), kind=kind)
+        record_usage(http_requests=1, bytes_fetched=len(response.content))
+        return response
     
-    def search_web(self, query: str, num_results: int = 3) -> List[Dict[str, str]]:
+    @staticmethod
+    def _parse_search_results(html: str, num_results: int) -> List[Dict[str, str]]:
+        """Extract result titles, links and snippets from a DuckDuckGo results page."""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        results = []
+        # Find search results
+        for result in soup.select('.result'):
+            title_element = result.select_one('.result__title')
+            snippet_element = result.select_one('.result__snippet')
+            link_element = result.select_one('.result__url')
+            
+            if title_element and link_element:
+                title = title_element.get_text().strip()
+                link = link_element.get('href', '')
+                snippet = snippet_element.get_text().strip() if snippet_element else ""
+                
+                # Extract actual URL from the DuckDuckGo redirect
+                if 'uddg=' in link:
+                    link = re.search(r'uddg=([^&]+)', link).group(1)
+                
+                results.append({
+                    "title": title,
+                    "url": link,
+                    "snippet": snippet
+                })
+                
+                if len(results) >= num_results:
+                    break
+        
+        return results
+    
+    @staticmethod
+    def _extract_text(html: bytes) -> str:
+        """Extract the paragraph text of an article page."""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Extract text from paragraphs
+        paragraphs = soup.find_all('p')
+        content = ' '.join([p.get_text() for p in paragraphs])
+        
+        # Limit content length
+        return content[:5000]
+    
+    async def search_web(self, query: str, num_results: int = 3) -> List[Dict[str, str]]:
         """Perform a simple web search and return results."""
         # Clean and encode query
         query = query.replace(' ', '+')
@@ -21,58 +85,19 @@ class ResearchAgent(BaseAgent):
         try:
             # Use Duck Duck Go search (doesn't require API key)
             url = f"https://html.duckduckgo.com/html/?q={query}"
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36"
-            }
-            
-            response = requests.get(url, headers=headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            results = []
-            # Find search results
-            for result in soup.select('.result'):
-                title_element = result.select_one('.result__title')
-                snippet_element = result.select_one('.result__snippet')
-                link_element = result.select_one('.result__url')
-                
-                if title_element and link_element:
-                    title = title_element.get_text().strip()
-                    link = link_element.get('href', '')
-                    snippet = snippet_element.get_text().strip() if snippet_element else ""
-                    
-                    # Extract actual URL from the DuckDuckGo redirect
-                    if 'uddg=' in link:
-                        link = re.search(r'uddg=([^&]+)', link).group(1)
-                    
-                    results.append({
-                        "title": title,
-                        "url": link,
-                        "snippet": snippet
-                    })
-                    
-                    if len(results) >= num_results:
-                        break
-            
-            return results
+            response = await self._get(url, "search")
+            # HTML parsing is CPU-bound, so it runs off the event loop
+            return await asyncio.to_thread(self._parse_search_results, response.text, num_results)
         
         except Exception as e:
             print(f"Error searching web: {e}")
             return []
     
-    def fetch_article_content(self, url: str) -> str:
+    async def fetch_article_content(self, url: str) -> str:
         """Fetch and extract content from a URL."""
         try:
-            response = requests.get(url, headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36"
-            })
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract text from paragraphs
-            paragraphs = soup.find_all('p')
-            content = ' '.join([p.get_text() for p in paragraphs])
-            
-            # Limit content length
-            return content[:5000]
+            response = await self._get(url, "article")
+            return await asyncio.to_thread(self._extract_text, response.content)
         except Exception as e:
             print(f"Error fetching article: {e}")
             return ""
@@ -129,23 +154,25 @@ class ResearchAgent(BaseAgent):
             for entity in key_entities[:2]:  # Limit to first 2 entities
                 queries.append(f"{entity} {title}")
             
-            # Gather information from searches
-            research_materials = []
+            # Gather information from searches; all queries and source fetches run concurrently
             for query in queries:
                 print(f"  Searching for: {query}")
-                search_results = self.search_web(query)
-                
-                for result in search_results:
-                    print(f"  Found source: {result['title']}")
-                    # Fetch content from each result
-                    content = self.fetch_article_content(result["url"])
-                    
-                    if content:
-                        research_materials.append({
-                            "source": result["title"],
-                            "url": result["url"],
-                            "content": content[:500] + "..." # Truncate for simplicity
-                        })
+            search_results = [result for results in await asyncio.gather(*(self.search_web(query) for query in queries))
+                              for result in results]
+            
+            for result in search_results:
+                print(f"  Found source: {result['title']}")
+            # Fetch content from each result
+            contents = await asyncio.gather(*(self.fetch_article_content(result["url"]) for result in search_results))
+            
+            research_materials = []
+            for result, content in zip(search_results, contents):
+                if content:
+                    research_materials.append({
+                        "source": result["title"],
+                        "url": result["url"],
+                        "content": content[:500] + "..." # Truncate for simplicity
+                    })
             
             # Generate a research report
             if content_type == "legal_case":
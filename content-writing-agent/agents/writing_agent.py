@@ -1,5 +1,6 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from .base_agent import BaseAgent
+from services.prompt_budget import PromptSection
 
 class WritingAgent(BaseAgent):
     def __init__(self):
@@ -138,7 +139,8 @@ class WritingAgent(BaseAgent):
         template = self.get_template_for_content_type(content_type)
         
         # Prepare writing prompt
-        writing_prompt = f"""
+        def build_prompt(plan_text: str, report_text: str) -> str:
+            return f"""
         Write an engaging article based on this research and classification:
         
         CONTENT TYPE: {content_type}
@@ -150,10 +152,10 @@ class WritingAgent(BaseAgent):
         TARGET AUDIENCE: {target_audience}
         
         CONTENT PLAN:
-        {content_plan}
+        {plan_text}
         
         RESEARCH REPORT:
-        {research_report}
+        {report_text}
         
         ARTICLE STRUCTURE:
         {template}
@@ -170,8 +172,24 @@ class WritingAgent(BaseAgent):
         IMPORTANT: Start your response with the title preceded by "# " for markdown formatting.
         """
         
-        # Generate article using the model
-        full_response = self.process_with_model(writing_prompt)
+        # Keep the plan and research within the model's token budget
+        async def fitted_prompt(model_id: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+            sections, report = await self.fit_prompt(
+                [
+                    PromptSection("content_plan", str(content_plan), weight=1.0),
+                    PromptSection("research_report", research_report, weight=2.0)
+                ],
+                overhead=build_prompt("", ""),
+                query=" ".join([subject_matter] + key_entities),
+                task="article",
+                model_id=model_id
+            )
+            return build_prompt(sections["content_plan"], sections["research_report"]), report
+        
+        writing_prompt, prompt_budget = await fitted_prompt()
+        
+        # Generate article using the model; a fallback tier gets the prompt re-fitted to its window
+        full_response = await self.process_with_model(writing_prompt, task="article", prompt_for=fitted_prompt)
         
         # Clean up the article content
         article_content = full_response
@@ -205,5 +223,6 @@ class WritingAgent(BaseAgent):
             "content_id": content_id,
             "article_content": article_content,
             "content_type": content_type,
+            "prompt_budget": prompt_budget,
             "status": "completed"
         }
\ No newline at end of file
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Request, Query
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
@@ -10,13 +10,21 @@ import os
 
 # Import your agents
 from agents.coordinator_agent import CoordinatorAgent
-from agents.classification_agent import ContentClassificationAgent
-from agents.research_agent import ResearchAgent
-from agents.writing_agent import WritingAgent
-from agents.fact_check_agent import FactCheckAgent
-from agents.proofreading_agent import ProofreadingAgent
-from agents.publishing_agent import PublishingAgent
 from services.minio_storage_service import MinioStorageService
+from services.inference_client import get_inference_client
+from services.content_pipeline import (
+    run_content_pipeline, find_interrupted_pipelines, find_pending_content, mark_queued, checkpoints
+)
+from services.job_queue import JobQueue, WorkerPool, QueueFullError
+from services.agent_registry import get_agent_registry
+from services.metrics import get_metrics
+from services.events import get_event_bus, CatalogueRelay
+from services.catalogue import get_catalogue
+from services.artifact_store import get_artifact_store
+from services.article_views import get_article_views
+from services.completion_cache import get_completion_cache
+from services.batching import get_batcher
+from services.single_flight import get_single_flight
 
 # Create FastAPI app
 app = FastAPI(title="AI Content Creation Pipeline")
@@ -30,6 +38,83 @@ os.makedirs("data", exist_ok=True)
 # Initialize the coordinator
 coordinator = CoordinatorAgent()
 
+# Plans, statuses and articles are read through the configured artifact store
+store = get_artifact_store()
+
+# Pre-rendered article pages
+article_views = get_article_views()
+
+# Dashboard events for pipelines run by other workers and process_batch.py
+catalogue_relay = CatalogueRelay()
+
+# Persistent job queue drained by a bounded pool of pipeline workers
+job_queue = JobQueue()
+worker_pool = WorkerPool(job_queue, run_content_pipeline)
+
+def collect_runtime_metrics():
+    """Read queue, worker, cache and batching state for /metrics at scrape time."""
+    pool = worker_pool.stats()
+    families = [
+        ("job_queue_depth", "gauge", "Queued pipeline jobs", [({}, pool["queue_depth"])]),
+        ("job_queue_jobs", "gauge", "Pipeline jobs by status",
+         [({"status": status}, count) for status, count in pool["jobs"].items()]),
+        ("worker_pool_busy_workers", "gauge", "Workers running a pipeline", [({}, pool["busy_workers"])]),
+        ("worker_pool_utilisation", "gauge", "Share of worker time spent running pipelines",
+         [({}, pool["utilisation"])]),
+        ("worker_pool_jobs_total", "counter", "Jobs finished by this process's workers",
+         [({"outcome": "completed"}, pool["jobs_completed"]), ({"outcome": "failed"}, pool["jobs_failed"])])
+    ]
+    
+    cache = get_completion_cache()
+    if cache is not None:
+        cache_stats = cache.stats()
+        families += [
+            ("llm_cache_lookups_total", "counter", "Completion cache lookups",
+             [({"result": "hit"}, cache_stats["hits"]), ({"result": "miss"}, cache_stats["misses"])]),
+            ("llm_cache_hit_rate", "gauge", "Completion cache hit rate", [({}, cache_stats["hit_rate"])]),
+            ("llm_cache_entries", "gauge", "Completion cache entries", [({}, cache_stats["entries"])])
+        ]
+    
+    batcher = get_batcher().stats()
+    flights = get_single_flight().stats()
+    bus = get_event_bus().stats()
+    families += [
+        ("events_subscribers", "gauge", "Open /events streams", [({}, bus["subscribers"])]),
+        ("llm_batches_total", "counter", "Micro-batches sent to model backends", [({}, batcher["batches_sent"])]),
+        ("llm_batch_errors_total", "counter", "Micro-batches that failed", [({}, batcher["batch_errors"])]),
+        ("llm_single_flight_shared_total", "counter", "Model calls served by joining an identical call in flight",
+         [({}, flights["shared"])]),
+        ("llm_single_flight_in_flight", "gauge", "Distinct model calls in flight", [({}, flights["in_flight"])]),
+        ("llm_single_flight_waiters", "gauge", "Callers waiting on a model call started by another caller",
+         [({}, flights["current_waiters"])]),
+        ("llm_single_flight_max_waiters", "gauge", "Most callers seen waiting on a single model call",
+         [({}, flights["max_waiters"])])
+    ]
+    return families
+
+get_metrics().add_collector(collect_runtime_metrics)
+
+@app.on_event("startup")
+async def startup_event():
+    # Index plans created before the catalogue existed or by other tools
+    await asyncio.to_thread(get_catalogue().sync)
+    
+    worker_pool.start()
+    catalogue_relay.start()
+    
+    # Pick up pipelines left "processing" when a previous process died; they resume from checkpoints
+    for content_id in await asyncio.to_thread(find_interrupted_pipelines):
+        job = await asyncio.to_thread(job_queue.enqueue, content_id, 0, True)
+        print(f"Resuming interrupted pipeline for {content_id} (job {job['id']})")
+    worker_pool.notify()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await catalogue_relay.stop()
+    await worker_pool.stop()
+    # Release pooled connections held by the shared inference client
+    await get_inference_client().aclose()
+
 # Define request and response models
 class CheckUpdatesRequest(BaseModel):
     force: bool = False
@@ -37,126 +122,17 @@ class CheckUpdatesRequest(BaseModel):
 class ContentRequest(BaseModel):
     content_id: str
     
+class BatchRequest(BaseModel):
+    content_ids: List[str] = []
+    all_pending: bool = False
+    concurrency: Optional[int] = None
+    priority: int = 0
+
 class PipelineStatusResponse(BaseModel):
     status: str
     message: str
     details: Optional[Dict[str, Any]] = None
 
-# Background task to run the full content pipeline
-async def run_content_pipeline(content_id: str):
-    try:
-        # Get the content plan
-        with open(f"data/content_plans/{content_id}.json", "r") as f:
-            content_plan = json.load(f)
-        
-        # Step 1: Classification
-        classification_agent = ContentClassificationAgent()
-        classification_result = await classification_agent.process({
-            "content_id": content_id,
-            "title": content_plan["original_update"]["title"],
-            "content_snippet": content_plan["original_update"]["content_snippet"]
-        })
-        
-        # Save classification results
-        with open(f"data/classification_{content_id}.json", "w") as f:
-            json.dump(classification_result, f, indent=2)
-        
-        # Step 2: Research
-        research_agent = ResearchAgent()
-        research_result = await research_agent.process({
-            "content_id": content_id,
-            "content_plan": content_plan["content_plan"],
-            "original_update": content_plan["original_update"],
-            "classification": classification_result
-        })
-        
-        # Save research results
-        with open(f"data/research_{content_id}.json", "w") as f:
-            json.dump(research_result, f, indent=2)
-        
-        # Step 3: Writing
-        writing_agent = WritingAgent()
-        writing_result = await writing_agent.process({
-            "content_id": content_id,
-            "content_plan": content_plan["content_plan"],
-            "research_report": research_result["research_report"],
-            "classification": classification_result
-        })
-        
-        # Save writing results
-        with open(f"data/article_{content_id}.json", "w") as f:
-            json.dump(writing_result, f, indent=2)
-        
-        # Save as markdown for easy viewing
-        with open(f"data/article_{content_id}.md", "w") as f:
-            f.write(writing_result["article_content"])
-        
-        # Step 4: Fact Checking
-        fact_check_agent = FactCheckAgent()
-        fact_check_result = await fact_check_agent.process({
-            "content_id": content_id,
-            "article_content": writing_result["article_content"],
-            "research_report": research_result["research_report"]
-        })
-        
-        # Save fact check results
-        with open(f"data/fact_check_{content_id}.json", "w") as f:
-            json.dump(fact_check_result, f, indent=2)
-        
-        # Step 5: Proofreading
-        proofreading_agent = ProofreadingAgent()
-        proofreading_result = await proofreading_agent.process({
-            "content_id": content_id,
-            "article_content": writing_result["article_content"]
-        })
-        
-        # Save proofreading results
-        with open(f"data/proofread_{content_id}.json", "w") as f:
-            json.dump(proofreading_result, f, indent=2)
-        
-        # Save edited article
-        with open(f"data/edited_article_{content_id}.md", "w") as f:
-            f.write(proofreading_result["edited_article"])
-        
-        # Step 6: Publishing
-        publishing_agent = PublishingAgent()
-        publishing_result = await publishing_agent.process({
-            "content_id": content_id,
-            "article_content": proofreading_result["edited_article"]
-        })
-        
-        # Save publishing results
-        with open(f"data/publishing_{content_id}.json", "w") as f:
-            json.dump(publishing_result, f, indent=2)
-        
-        # Update pipeline status
-        with open(f"data/status_{content_id}.json", "w") as f:
-            status = {
-                "content_id": content_id,
-                "status": "completed",
-                "stages": {
-                    "classification": "completed",
-                    "research": "completed",
-                    "writing": "completed",
-                    "fact_check": "completed",
-                    "proofreading": "completed",
-                    "publishing": "completed"
-                }
-            }
-            json.dump(status, f, indent=2)
-        
-    except Exception as e:
-        # On error, save the error status
-        with open(f"data/status_{content_id}.json", "w") as f:
-            status = {
-                "content_id": content_id,
-                "status": "error",
-                "error": str(e)
-            }
-            json.dump(status, f, indent=2)
-        
-        print(f"Error in content pipeline for {content_id}: {e}")
-
 # API endpoints
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
@@ -165,9 +141,6 @@ async def read_root(request: Request):
 @app.post("/check-updates", response_model=PipelineStatusResponse)
 async def check_updates(request: CheckUpdatesRequest):
     try:
-        # Create content plans directory if it doesn't exist
-        os.makedirs("data/content_plans", exist_ok=True)
-        
         # Check for updates
         result = await coordinator.process({"command": "check_updates", "force": request.force})
         
@@ -178,10 +151,15 @@ async def check_updates(request: CheckUpdatesRequest):
                 details={"updates_found": 0}
             )
         
-        # Save content plans
+        # Save content plans in one batched write
+        await store.aput_many({
+            f"content_plans/{plan['content_id']}.json": plan for plan in result["content_plans"]
+        })
         for plan in result["content_plans"]:
-            with open(f"data/content_plans/{plan['content_id']}.json", "w") as f:
-                json.dump(plan, f, indent=2)
+            await asyncio.to_thread(get_catalogue().add_plan, plan)
+        get_event_bus().publish(
+            "content_added", content_ids=[plan["content_id"] for plan in result["content_plans"]]
+        )
         
         return PipelineStatusResponse(
             status="success",
@@ -195,56 +173,158 @@ async def check_updates(request: CheckUpdatesRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/process-content/{content_id}", response_model=PipelineStatusResponse)
-async def process_content(content_id: str, background_tasks: BackgroundTasks):
+async def process_content(content_id: str, priority: int = 0, restart: bool = False):
     try:
         # Check if content plan exists
-        if not os.path.exists(f"data/content_plans/{content_id}.json"):
+        if not await store.aexists(f"content_plans/{content_id}.json"):
             raise HTTPException(status_code=404, detail=f"Content ID {content_id} not found")
         
-        # Create status file
-        with open(f"data/status_{content_id}.json", "w") as f:
-            status = {
+        # By default a retry resumes from the first incomplete stage; restart discards checkpoints
+        if restart:
+            await asyncio.to_thread(checkpoints.clear, content_id)
+        
+        # Queue the pipeline; reject new work while the queue is too deep
+        try:
+            job = await asyncio.to_thread(job_queue.enqueue, content_id, priority)
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+        
+        # Create status file for newly queued work
+        if job["status"] == "queued":
+            await mark_queued(content_id, job["id"])
+        worker_pool.notify()
+        
+        return PipelineStatusResponse(
+            status="processing",
+            message=f"Queued content pipeline for ID: {content_id}",
+            details={
                 "content_id": content_id,
-                "status": "processing",
-                "stages": {
-                    "classification": "pending",
-                    "research": "pending",
-                    "writing": "pending",
-                    "fact_check": "pending",
-                    "proofreading": "pending",
-                    "publishing": "pending"
-                }
+                "job_id": job["id"],
+                "job_status": job["status"],
+                "queue_depth": job_queue.depth()
             }
-            json.dump(status, f, indent=2)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/process-batch", response_model=PipelineStatusResponse)
+async def process_batch(request: BatchRequest):
+    """Queue many content plans at once, running at most `concurrency` of them at a time."""
+    try:
+        content_ids = list(request.content_ids)
+        if request.all_pending:
+            content_ids += await asyncio.to_thread(find_pending_content)
+        if not content_ids:
+            raise HTTPException(status_code=400, detail="No content_ids given and nothing is pending")
+        
+        plans = await store.aget_many(f"content_plans/{content_id}.json" for content_id in content_ids)
+        missing = [content_id for content_id in content_ids if plans[f"content_plans/{content_id}.json"] is None]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Content IDs not found: {', '.join(missing)}")
         
-        # Start processing in background
-        background_tasks.add_task(run_content_pipeline, content_id)
+        batch = await asyncio.to_thread(job_queue.enqueue_batch, content_ids, request.priority, request.concurrency)
+        for job in batch["jobs"]:
+            if job["status"] == "queued":
+                await mark_queued(job["content_id"], job["id"])
+        worker_pool.notify()
         
         return PipelineStatusResponse(
             status="processing",
-            message=f"Started content pipeline for ID: {content_id}",
-            details={"content_id": content_id}
+            message=f"Queued batch {batch['batch_id']} with {len(batch['jobs'])} content items",
+            details=await asyncio.to_thread(job_queue.batch_progress, batch["batch_id"])
         )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/batches")
+async def list_batches(limit: int = 20):
+    return {"batches": await asyncio.to_thread(job_queue.list_batches, limit)}
+
+@app.get("/batches/{batch_id}")
+async def get_batch(batch_id: int):
+    """Report a batch's progress, throughput (articles/min) and per-item outcomes."""
+    progress = await asyncio.to_thread(job_queue.batch_progress, batch_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+    return progress
+
+@app.get("/agents")
+async def list_agents():
+    return get_agent_registry().snapshot()
+
+@app.post("/agents/reload")
+async def reload_agents(name: Optional[List[str]] = Query(None)):
+    """Hot-reload agent code and prompts; running pipelines finish with the old agents."""
+    try:
+        reloaded = await asyncio.to_thread(get_agent_registry().reload, name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed, previous agents kept: {e}")
+    return {"reloaded": reloaded}
+
+@app.get("/events")
+async def events(request: Request, content_id: Optional[str] = None):
+    """
+    Stream pipeline status changes as Server-Sent Events.
+    
+    Event types are "status" (queued, completed, error), "stage" (a stage
+    started, finished or failed) and "content_added". Pass content_id to
+    only receive events for one content item. Clients that reconnect with
+    Last-Event-ID receive the events they missed.
+    """
+    bus = get_event_bus()
+    last_event_id = request.headers.get("last-event-id", "")
+    subscription = bus.subscribe(content_id, int(last_event_id) if last_event_id.isdigit() else None)
+    
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            bus.unsubscribe(subscription)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of latency histograms, queue depth, cache hit rate and errors."""
+    body = await asyncio.to_thread(get_metrics().render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/queue")
+async def queue_stats():
+    """Report queue depth, worker utilisation and wait times."""
+    return await asyncio.to_thread(worker_pool.stats)
+
+@app.get("/queue/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    return {"jobs": await asyncio.to_thread(job_queue.list_jobs, status, limit)}
+
 @app.get("/status/{content_id}", response_model=PipelineStatusResponse)
 async def get_status(content_id: str):
     try:
-        # Check if status file exists
-        if not os.path.exists(f"data/status_{content_id}.json"):
+        # Read status
+        status = await store.aget_json(f"status_{content_id}.json")
+        if status is None:
             return PipelineStatusResponse(
                 status="unknown",
                 message=f"No status information for content ID: {content_id}",
                 details={"content_id": content_id}
             )
         
-        # Read status file
-        with open(f"data/status_{content_id}.json", "r") as f:
-            status = json.load(f)
-        
         return PipelineStatusResponse(
             status=status["status"],
             message=f"Pipeline status for content ID: {content_id}",
@@ -255,73 +335,59 @@ async def get_status(content_id: str):
 
 @app.get("/content/{content_id}", response_class=HTMLResponse)
 async def view_content(request: Request, content_id: str):
+    """
+    Serve the article page.
+    
+    Finished articles are served from the page materialised when their
+    pipeline ended, pre-compressed and with a strong ETag, so a repeat view
+    costs no parsing or rendering and a revalidation is answered with 304.
+    Articles whose pipeline is still running are rendered per request; a
+    finished article without a stored page gets one on its first view.
+    """
     try:
-        # Check if the article exists
-        article_path = f"data/edited_article_{content_id}.md"
-        if not os.path.exists(article_path):
-            article_path = f"data/article_{content_id}.md"
-            if not os.path.exists(article_path):
+        view, html = article_views.cached(content_id), None
+        if view is None:
+            view, html = await asyncio.to_thread(article_views.load, content_id)
+        if view is None:
+            if html is None:
                 raise HTTPException(status_code=404, detail=f"No article found for content ID: {content_id}")
+            return HTMLResponse(html, headers={"Cache-Control": "no-store"})
         
-        # Read the article
-        with open(article_path, "r") as f:
-            article_content = f.read()
-        
-        # Get status
-        status = {"status": "unknown"}
-        if os.path.exists(f"data/status_{content_id}.json"):
-            with open(f"data/status_{content_id}.json", "r") as f:
-                status = json.load(f)
-        
-        # Get content plan
-        content_plan = {}
-        if os.path.exists(f"data/content_plans/{content_id}.json"):
-            with open(f"data/content_plans/{content_id}.json", "r") as f:
-                content_plan = json.load(f)
-        
-        return templates.TemplateResponse(
-            "view_article.html", 
-            {
-                "request": request, 
-                "content_id": content_id,
-                "article_content": article_content,
-                "status": status,
-                "content_plan": content_plan
-            }
-        )
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        encoding, body = view.select(request.headers.get("accept-encoding", ""))
+        headers["ETag"] = view.etag_for(encoding)
+        if view.matches(request.headers.get("if-none-match", ""), encoding):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type="text/html; charset=utf-8", headers=headers)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/list-content")
-async def list_content():
+async def list_content(status: Optional[str] = None, content_type: Optional[str] = None,
+                       source: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                       sort: str = "created", order: str = "desc", limit: int = Query(50, ge=1, le=500),
+                       cursor: Optional[str] = None, fields: Optional[str] = None):
+    """
+    List content from the catalogue index, newest first by default.
+    
+    Filter by status, content_type, source and creation date (since/until, ISO
+    format), sort by any of created, updated_at, published_date, title or
+    status, and choose the returned columns with a comma-separated fields list.
+    Pass next_cursor back as cursor to fetch the following page.
+    """
     try:
-        # Get all content plans
-        content_plans = []
-        if os.path.exists("data/content_plans"):
-            for filename in os.listdir("data/content_plans"):
-                if filename.endswith(".json"):
-                    content_id = filename.replace(".json", "")
-                    
-                    # Get plan info
-                    with open(f"data/content_plans/{filename}", "r") as f:
-                        plan = json.load(f)
-                    
-                    # Get status info
-                    status = {"status": "unknown"}
-                    if os.path.exists(f"data/status_{content_id}.json"):
-                        with open(f"data/status_{content_id}.json", "r") as f:
-                            status = json.load(f)
-                    
-                    content_plans.append({
-                        "content_id": content_id,
-                        "title": plan["original_update"]["title"],
-                        "status": status["status"],
-                        "created": plan.get("timestamp", "unknown")
-                    })
-        
-        return {"content_plans": content_plans}
+        page = await asyncio.to_thread(
+            get_catalogue().query, status=status, content_type=content_type, source=source,
+            since=since, until=until, sort=sort, order=order, limit=limit, cursor=cursor,
+            fields=fields.split(",") if fields else None
+        )
+        return {"content_plans": page["items"], "next_cursor": page["next_cursor"]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
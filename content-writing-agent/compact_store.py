@@ -0,0 +1,67 @@
+import os
+import argparse
+from services.artifact_store import LocalArtifactStore, get_artifact_store
+from services.content_addressed_store import ContentAddressedStore, GROUP_PREFIX
+
+
+def stored_bytes(backend, keys):
+    """Total size of the given keys as the backend stores them; hard-linked files count once."""
+    if isinstance(backend, LocalArtifactStore):
+        sizes = {}
+        for key in keys:
+            try:
+                stat = os.stat(backend._path(key))
+            except FileNotFoundError:
+                continue
+            sizes[(stat.st_dev, stat.st_ino)] = stat.st_size
+        return sum(sizes.values())
+    total = 0
+    for start in range(0, len(keys), 500):
+        total += sum(len(data) for data in backend.get_many(keys[start:start + 500]).values() if data)
+    return total
+
+
+def compact(gc_only: bool = False):
+    """
+    Convert stored artifacts to content-addressed blobs and drop unreferenced blobs.
+
+    Artifacts are rewritten one content item at a time, in key order, so an
+    edited article is stored as a delta against the original written before it.
+    Identical markdown and publication files become hard links to one copy.
+    With ARTIFACT_DEDUP_ENABLED=false they are rewritten as plain files instead
+    and every blob is removed. Run this while no pipeline is writing.
+    """
+    store = get_artifact_store()
+    if not isinstance(store, ContentAddressedStore):
+        print("This artifact store does not support compaction")
+        return
+
+    # Only pipeline artifacts; databases and coordinator state files under the same root are left alone
+    keys = [key for key in store.list() if store._group(key) and key.endswith((".json", ".md", ".txt"))]
+    before = stored_bytes(store.backend, keys + store.backend.list("cas/"))
+
+    if not gc_only:
+        groups = {}
+        for key in keys:
+            groups.setdefault(store._group(key), []).append(key)
+        for group_keys in groups.values():
+            for start in range(0, len(group_keys), 100):
+                store.put_many(store.get_many(group_keys[start:start + 100]))
+        print(f"Rewrote {len(keys)} artifacts{'' if store.dedup else ' as plain files'}")
+    if not store.dedup:
+        # Without dedup the recent-blob indexes only keep blobs alive
+        for key in store.backend.list(GROUP_PREFIX):
+            store.backend.delete(key)
+    store.gc()
+
+    after = stored_bytes(store.backend, keys + store.backend.list("cas/"))
+    ratio = f" ({before / after:.1f}x smaller)" if after else ""
+    print(f"=== Stored artifacts: {before / 1024:.1f} KiB -> {after / 1024:.1f} KiB{ratio} ===")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate stored artifacts and remove unreferenced blobs")
+    parser.add_argument("--gc-only", action="store_true", help="Only delete blobs no artifact refers to any more")
+    args = parser.parse_args()
+
+    compact(args.gc_only)
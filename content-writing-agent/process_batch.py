@@ -0,0 +1,73 @@
+import asyncio
+import argparse
+from services.content_pipeline import run_content_pipeline, find_pending_content, mark_queued
+from services.job_queue import JobQueue, WorkerPool
+from services.inference_client import get_inference_client
+
+
+def print_progress(progress):
+    counts = progress["counts"]
+    eta = f", ETA {progress['eta_seconds'] / 60:.1f} min" if progress["eta_seconds"] else ""
+    print(f"[Batch {progress['batch_id']}] {progress['progress']:.0%} "
+          f"({counts['completed']} completed, {counts['failed']} failed, "
+          f"{counts['running']} running, {counts['queued']} queued) "
+          f"{progress['articles_per_minute']:.2f} articles/min{eta}")
+
+
+async def process_batch(content_ids, concurrency: int = 2, priority: int = 0, report_interval: float = 10.0):
+    """
+    Queue content plans as one batch and drain it with a local worker pool.
+
+    The batch goes through the shared job queue, so workers of a running API
+    server help drain it too, while the batch's concurrency limit still holds.
+    The local pool only runs this batch's jobs, and jobs it is running when
+    stopped or interrupted go back to the queue instead of being lost.
+    """
+    queue = JobQueue()
+    batch = queue.enqueue_batch(content_ids, priority, concurrency)
+    for job in batch["jobs"]:
+        if job["status"] == "queued":
+            await mark_queued(job["content_id"], job["id"])
+    print(f"=== Queued batch {batch['batch_id']}: {len(batch['jobs'])} content items, concurrency {concurrency} ===")
+
+    pool = WorkerPool(queue, run_content_pipeline, size=concurrency, batch_id=batch["batch_id"])
+    pool.start()
+    try:
+        while True:
+            progress = await asyncio.to_thread(queue.batch_progress, batch["batch_id"])
+            print_progress(progress)
+            if progress["finished"]:
+                break
+            await asyncio.sleep(report_interval)
+    finally:
+        await pool.stop()
+        await get_inference_client().aclose()
+
+    print("\n=== Per-item outcomes ===")
+    for item in progress["items"]:
+        duration = f" in {item['duration_seconds']:.1f}s" if "duration_seconds" in item else ""
+        error = f": {item['error']}" if item["error"] else ""
+        print(f"{item['content_id']}: {item['status']}{duration}{error}")
+    return progress
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process many content plans with a concurrency limit")
+    parser.add_argument("content_ids", nargs="*", help="Content IDs to process")
+    parser.add_argument("--all-pending", action="store_true",
+                        help="Also process every stored content plan that has not completed")
+    parser.add_argument("--concurrency", type=int, default=2, help="Pipelines run at the same time")
+    parser.add_argument("--priority", type=int, default=0, help="Job priority; higher runs first")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Seconds between progress reports")
+    args = parser.parse_args()
+
+    content_ids = list(args.content_ids)
+    if args.all_pending:
+        content_ids += find_pending_content()
+    if not content_ids:
+        parser.error("no content IDs given and nothing is pending")
+
+    try:
+        asyncio.run(process_batch(content_ids, args.concurrency, args.priority, args.report_interval))
+    except KeyboardInterrupt:
+        print("\nInterrupted; unfinished jobs are back in the queue")
@@ -0,0 +1,66 @@
+import asyncio
+import argparse
+from services.content_pipeline import CONTENT_PIPELINE, checkpoints, load_context, list_stored_content
+from process_batch import process_batch
+
+
+async def rebuild(content_ids, dry_run: bool = False, concurrency: int = 2, adopt: bool = False,
+                  report_interval: float = 10.0):
+    """
+    Bring stored content up to date with the current code and prompts.
+
+    Only stages whose fingerprint changed, and the stages downstream of them,
+    are recomputed; everything else is reused from checkpoints. The rebuilds
+    are queued as one batch on the shared job queue, so content that is
+    already queued or running is not processed twice at the same time.
+    Content IDs without a stored content plan are reported and skipped.
+    """
+    plan = {}
+    missing = []
+    for content_id in content_ids:
+        try:
+            context = await load_context(content_id)
+        except FileNotFoundError:
+            missing.append(content_id)
+            continue
+        if adopt:
+            adopted = await asyncio.to_thread(checkpoints.adopt, content_id, CONTENT_PIPELINE, context)
+            if adopted:
+                print(f"{content_id}: adopted existing {', '.join(adopted)}")
+        stale = await asyncio.to_thread(checkpoints.stale_stages, content_id, CONTENT_PIPELINE, context)
+        if stale:
+            plan[content_id] = stale
+
+    total_stages = len(content_ids) * len(CONTENT_PIPELINE.stages)
+    stale_stages = sum(len(stale) for stale in plan.values())
+    print(f"=== Rebuild plan: {len(plan)}/{len(content_ids)} content items, "
+          f"{stale_stages}/{total_stages} stages to recompute ===")
+    for content_id, stale in plan.items():
+        print(f"{content_id}: {', '.join(stale)}")
+    for content_id in missing:
+        print(f"{content_id}: skipped, no stored content plan")
+
+    if dry_run or not plan:
+        return None
+
+    progress = await process_batch(list(plan), concurrency, report_interval=report_interval)
+    counts = progress["counts"]
+    print(f"=== Rebuild finished: {counts['completed']} completed, {counts['failed']} failed ===")
+    return progress
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute stale pipeline stages for stored content")
+    parser.add_argument("content_ids", nargs="*", help="Content IDs to rebuild (default: all stored content)")
+    parser.add_argument("--dry-run", action="store_true", help="Only show which stages would be recomputed")
+    parser.add_argument("--adopt", action="store_true",
+                        help="Treat artifacts from runs without checkpoints as up to date before planning")
+    parser.add_argument("--concurrency", type=int, default=2, help="Content items rebuilt at the same time")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Seconds between progress reports")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(rebuild(args.content_ids or list_stored_content(), args.dry_run, args.concurrency, args.adopt,
+                            args.report_interval))
+    except KeyboardInterrupt:
+        print("\nInterrupted; unfinished rebuilds are back in the queue")
@@ -0,0 +1,114 @@
+import time
+import importlib
+import threading
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+# Agents shared by every pipeline run, as "module:Class" so they can be re-imported on reload
+DEFAULT_AGENTS = {
+    "classification": "agents.classification_agent:ContentClassificationAgent",
+    "research": "agents.research_agent:ResearchAgent",
+    "writing": "agents.writing_agent:WritingAgent",
+    "fact_check": "agents.fact_check_agent:FactCheckAgent",
+    "proofreading": "agents.proofreading_agent:ProofreadingAgent",
+    "publishing": "agents.publishing_agent:PublishingAgent"
+}
+
+
+class AgentRegistry:
+    """Process-wide agent instances, created once and shared by concurrent pipelines.
+
+    Agents keep no per-article state, so one instance can serve any number of
+    pipelines at the same time; the expensive resources they hold (backends,
+    model handles, sessions, caches) are process-wide singletons already.
+    reload() re-imports an agent's module and swaps in a fresh instance;
+    pipelines that already hold the old instance finish with it.
+    """
+
+    def __init__(self, agents: Optional[Dict[str, str]] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            agents: Agent name to "module:Class" path, defaults to DEFAULT_AGENTS
+        """
+        self.paths = dict(agents or DEFAULT_AGENTS)
+        self._instances: Dict[str, Any] = {}
+        self._created_at: Dict[str, float] = {}
+        self._reloads: Dict[str, int] = {}
+        self._listeners: List[Callable[[List[str]], None]] = []
+        self._lock = threading.Lock()
+
+    def _create(self, name: str, reload_module: bool = False) -> Any:
+        module_name, _, class_name = self.paths[name].partition(":")
+        module = importlib.import_module(module_name)
+        if reload_module:
+            module = importlib.reload(module)
+        return getattr(module, class_name)()
+
+    def get(self, name: str) -> Any:
+        """Return the shared instance of an agent, creating it on first use."""
+        agent = self._instances.get(name)
+        if agent is not None:
+            return agent
+        if name not in self.paths:
+            raise KeyError(f"Unknown agent '{name}'")
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = self._create(name)
+                self._created_at[name] = time.time()
+                print(f"[Agent Registry] Created {name} agent")
+            return self._instances[name]
+
+    def add_reload_listener(self, listener: Callable[[List[str]], None]):
+        """Call listener with the reloaded agent names after every reload."""
+        self._listeners.append(listener)
+
+    def reload(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Re-import agent modules and replace their instances.
+
+        Args:
+            names: Agents to reload, defaults to all of them
+
+        Returns:
+            The names of the reloaded agents
+        """
+        names = list(names or self.paths)
+        unknown = [name for name in names if name not in self.paths]
+        if unknown:
+            raise KeyError(f"Unknown agent(s): {', '.join(unknown)}")
+
+        # Build every replacement before swapping, so a broken edit leaves the old agents in place
+        fresh = {name: self._create(name, reload_module=True) for name in names}
+        with self._lock:
+            for name, agent in fresh.items():
+                self._instances[name] = agent
+                self._created_at[name] = time.time()
+                self._reloads[name] = self._reloads.get(name, 0) + 1
+        print(f"[Agent Registry] Reloaded {', '.join(names)}")
+
+        for listener in self._listeners:
+            listener(names)
+        return names
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return which agents are loaded, since when, and how often they were reloaded."""
+        return {
+            name: {
+                "class": path,
+                "loaded": name in self._instances,
+                "created_at": self._created_at.get(name),
+                "reloads": self._reloads.get(name, 0)
+            }
+            for name, path in self.paths.items()
+        }
+
+
+_registry: Optional[AgentRegistry] = None
+
+def get_agent_registry() -> AgentRegistry:
+    """Return the process-wide agent registry."""
+    global _registry
+    if _registry is None:
+        _registry = AgentRegistry()
+    return _registry
@@ -0,0 +1,255 @@
+import os
+import json
+import gzip
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from dotenv import load_dotenv
+from .artifact_store import ArtifactStore, get_artifact_store
+
+# Server-side rendering and brotli are optional; without them pages are
+# rendered in the browser and served gzip-compressed only
+try:
+    import markdown
+except ImportError:
+    markdown = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Load environment variables
+load_dotenv()
+
+# Pipeline states whose page no longer changes and is served from a stored view
+FINISHED_STATUSES = ("completed", "error")
+
+
+def render_markdown(text: str) -> Optional[str]:
+    """Render article markdown to HTML, or None when the markdown package is not installed."""
+    if markdown is None:
+        return None
+    html = markdown.markdown(text, extensions=["tables", "fenced_code"])
+    return html.replace("<table>", '<table class="table table-striped table-bordered">')
+
+
+class ArticleView:
+    """One materialised article page in every encoding it is served in."""
+
+    def __init__(self, etag: str, bodies: Dict[str, bytes]):
+        self.etag = etag
+        self.bodies = bodies
+        self.checked_at = time.monotonic()
+
+    def etag_for(self, encoding: str) -> str:
+        # Each encoding is a different representation, so each gets its own strong ETag
+        return f'"{self.etag}"' if encoding == "identity" else f'"{self.etag}-{encoding}"'
+
+    def matches(self, if_none_match: str, encoding: str) -> bool:
+        """Whether an If-None-Match header names the representation served in the given encoding."""
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag_for(encoding) in tags
+
+    def select(self, accept_encoding: str) -> Tuple[str, bytes]:
+        """Pick the smallest encoding the client accepts."""
+        accepted = set()
+        for part in accept_encoding.split(","):
+            name, _, params = part.strip().partition(";")
+            quality = params.strip().removeprefix("q=")
+            try:
+                if params and float(quality) == 0:
+                    continue
+            except ValueError:
+                pass
+            if name:
+                accepted.add(name.strip().lower())
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                return encoding, self.bodies[encoding]
+        return "identity", self.bodies["identity"]
+
+
+class ArticleViews:
+    """Pre-rendered, pre-compressed article pages.
+
+    When a pipeline finishes, the article page is rendered once from the
+    article, status and content plan and stored with its gzip and brotli
+    encodings under views/<content_id>/<etag>.html[.gz|.br]. The pointer
+    views/<content_id>.etag is written last, so readers always see a
+    complete set. Served pages are kept in memory and revalidated against
+    the pointer at most every revalidate_seconds, which also picks up pages
+    materialised by other processes such as process_batch.py. Articles
+    finished before views existed are materialised on their first request.
+    """
+
+    def __init__(self, store: Optional[ArtifactStore] = None, template_dir: str = "templates",
+                 cache_size: Optional[int] = None, revalidate_seconds: Optional[float] = None):
+        """
+        Initialize the article views.
+
+        Args:
+            store: Artifact store holding the articles and the rendered views
+            template_dir: Directory of view_article.html
+            cache_size: Views kept in memory
+            revalidate_seconds: How long a view in memory is served before checking for a newer one
+        """
+        self.store = store or get_artifact_store()
+        self.env = Environment(loader=FileSystemLoader(template_dir), autoescape=select_autoescape(["html"]))
+        self.cache_size = cache_size or int(os.environ.get("VIEW_CACHE_SIZE", "256"))
+        self.revalidate_seconds = (revalidate_seconds if revalidate_seconds is not None
+                                   else float(os.environ.get("VIEW_REVALIDATE_SECONDS", "5")))
+        self._cache: "OrderedDict[str, ArticleView]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(content_id: str, etag: str) -> Dict[str, str]:
+        base = f"views/{content_id}/{etag}.html"
+        return {"identity": base, "gzip": base + ".gz", "br": base + ".br"}
+
+    def _remember(self, content_id: str, view: ArticleView):
+        with self._lock:
+            self._cache[content_id] = view
+            self._cache.move_to_end(content_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def render(self, content_id: str) -> Optional[bytes]:
+        """Render the article page from the stored artifacts; None if there is no article yet."""
+        return self._render(content_id)[0]
+
+    def _render(self, content_id: str) -> Tuple[Optional[bytes], Dict[str, Any]]:
+        """Render the article page and return it with the pipeline status it shows."""
+        found = self.store.get_many([
+            f"edited_article_{content_id}.md", f"article_{content_id}.md",
+            f"status_{content_id}.json", f"content_plans/{content_id}.json"
+        ])
+        # Prefer the proofread article
+        article = found[f"edited_article_{content_id}.md"] or found[f"article_{content_id}.md"]
+        if article is None:
+            return None, {}
+        article_content = article.decode("utf-8")
+
+        status = {"status": "unknown", "stages": {}}
+        if found[f"status_{content_id}.json"] is not None:
+            status = json.loads(found[f"status_{content_id}.json"])
+        content_plan = {}
+        if found[f"content_plans/{content_id}.json"] is not None:
+            content_plan = json.loads(found[f"content_plans/{content_id}.json"])
+
+        html = self.env.get_template("view_article.html").render(
+            content_id=content_id,
+            article_content=article_content,
+            article_html=render_markdown(article_content),
+            status=status,
+            content_plan=content_plan
+        )
+        return html.encode("utf-8"), status
+
+    def materialise(self, content_id: str) -> Optional[ArticleView]:
+        """Render, compress and store the page of a finished pipeline."""
+        html = self.render(content_id)
+        if html is None:
+            return None
+        return self._store_view(content_id, html)
+
+    def _store_view(self, content_id: str, html: bytes) -> ArticleView:
+        """Compress a rendered page and store it as the current view."""
+        bodies = {"identity": html, "gzip": gzip.compress(html, 9, mtime=0)}
+        if brotli is not None:
+            bodies["br"] = brotli.compress(html, quality=11)
+        view = ArticleView(hashlib.sha256(html).hexdigest()[:32], bodies)
+
+        previous = self.store.get_text(f"views/{content_id}.etag")
+        keys = self._keys(content_id, view.etag)
+        self.store.put_many({keys[encoding]: body for encoding, body in bodies.items()})
+        self.store.put(f"views/{content_id}.etag", view.etag)
+        if previous and previous != view.etag:
+            for key in self._keys(content_id, previous).values():
+                self.store.delete(key)
+
+        self._remember(content_id, view)
+        print(f"[Article Views] Materialised {content_id} ({len(html)} bytes, "
+              f"{', '.join(f'{e} {len(b)}' for e, b in bodies.items() if e != 'identity')})")
+        return view
+
+    def invalidate(self, content_id: str):
+        """Stop serving the stored page, e.g. because the pipeline is running again."""
+        with self._lock:
+            self._cache.pop(content_id, None)
+        etag = self.store.get_text(f"views/{content_id}.etag")
+        if etag:
+            self.store.delete(f"views/{content_id}.etag")
+            for key in self._keys(content_id, etag).values():
+                self.store.delete(key)
+
+    def cached(self, content_id: str) -> Optional[ArticleView]:
+        """Return the in-memory view if it does not need revalidating; never touches the store."""
+        with self._lock:
+            view = self._cache.get(content_id)
+            if view is None or time.monotonic() - view.checked_at > self.revalidate_seconds:
+                return None
+            self._cache.move_to_end(content_id)
+            return view
+
+    def get(self, content_id: str) -> Optional[ArticleView]:
+        """Return the materialised view, loading or revalidating it from the store if needed."""
+        view = self.cached(content_id)
+        if view is not None:
+            return view
+
+        etag = self.store.get_text(f"views/{content_id}.etag")
+        with self._lock:
+            view = self._cache.get(content_id)
+            if etag is None:
+                self._cache.pop(content_id, None)
+                return None
+            if view is not None and view.etag == etag:
+                view.checked_at = time.monotonic()
+                return view
+
+        keys = self._keys(content_id, etag)
+        found = self.store.get_many(keys.values())
+        bodies = {encoding: found[key] for encoding, key in keys.items() if found[key] is not None}
+        if "identity" not in bodies:
+            return None
+        view = ArticleView(etag, bodies)
+        self._remember(content_id, view)
+        return view
+
+    def load(self, content_id: str) -> Tuple[Optional[ArticleView], Optional[bytes]]:
+        """
+        Return the stored view of an article, or its live page while the pipeline runs.
+
+        A finished article without a stored view, e.g. one that finished before
+        views existed, is materialised now, so only its first request renders it.
+
+        Returns:
+            (view, None) for a finished article, (None, html) for one still
+            being written, and (None, None) if there is no article
+        """
+        view = self.get(content_id)
+        if view is not None:
+            return view, None
+
+        html, status = self._render(content_id)
+        if html is None or status.get("status") not in FINISHED_STATUSES:
+            return None, html
+
+        view = self._store_view(content_id, html)
+        # A run queued while this page was rendered has already invalidated the views; do not outlive it
+        if (self.store.get_json(f"status_{content_id}.json") or {}).get("status") not in FINISHED_STATUSES:
+            self.invalidate(content_id)
+        return view, None
+
+
+_article_views: Optional[ArticleViews] = None
+
+def get_article_views() -> ArticleViews:
+    """Return the process-wide article views."""
+    global _article_views
+    if _article_views is None:
+        _article_views = ArticleViews()
+    return _article_views
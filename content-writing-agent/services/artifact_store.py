@@ -0,0 +1,340 @@
+import io
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Union
+from dotenv import load_dotenv
+from .atomic_io import atomic_write_bytes
+
+# Load environment variables
+load_dotenv()
+
+ArtifactValue = Union[bytes, str, Dict[str, Any], List[Any]]
+
+
+def encode_artifact(value: ArtifactValue) -> bytes:
+    """Serialise an artifact: bytes as-is, text as UTF-8, anything else as indented JSON."""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return json.dumps(value, indent=2).encode("utf-8")
+
+
+class ArtifactStore:
+    """Key/value store for pipeline artifacts.
+
+    Keys are relative paths such as "status_<id>.json" or
+    "publications/blog/<id>.md". Every put is atomic: readers see the old
+    value or the new one, never a partial write. Backends implement the
+    blocking primitives; the async variants run them in a worker thread so
+    the event loop never waits on disk or network I/O.
+    """
+
+    name = "base"
+    # Whether link() can make one key share another key's stored copy
+    supports_links = False
+
+    # Blocking primitives implemented by each backend
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def put_bytes(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def list(self, prefix: str = "") -> List[str]:
+        """Return every key starting with prefix."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        return self.get_bytes(key) is not None
+
+    def link(self, key: str, target_key: str) -> bool:
+        """Store key as another name for target_key's copy; False if that is not possible."""
+        return False
+
+    def put_many(self, items: Dict[str, ArtifactValue]):
+        """Store several artifacts; backends override this to batch the writes."""
+        for key, value in items.items():
+            self.put_bytes(key, encode_artifact(value))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[bytes]]:
+        """Fetch several artifacts; missing keys map to None."""
+        return {key: self.get_bytes(key) for key in keys}
+
+    # Typed helpers
+
+    def put(self, key: str, value: ArtifactValue):
+        self.put_bytes(key, encode_artifact(value))
+
+    def get_text(self, key: str) -> Optional[str]:
+        data = self.get_bytes(key)
+        return data.decode("utf-8") if data is not None else None
+
+    def get_json(self, key: str) -> Optional[Any]:
+        data = self.get_bytes(key)
+        return json.loads(data) if data is not None else None
+
+    # Non-blocking variants
+
+    async def aput(self, key: str, value: ArtifactValue):
+        # Serialise on the caller's thread so later changes to value cannot race the write
+        await asyncio.to_thread(self.put_bytes, key, encode_artifact(value))
+
+    async def aget_bytes(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.get_bytes, key)
+
+    async def aget_text(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get_text, key)
+
+    async def aget_json(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get_json, key)
+
+    async def aexists(self, key: str) -> bool:
+        return await asyncio.to_thread(self.exists, key)
+
+    async def aput_many(self, items: Dict[str, ArtifactValue]):
+        encoded = {key: encode_artifact(value) for key, value in items.items()}
+        await asyncio.to_thread(self.put_many, encoded)
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Optional[bytes]]:
+        return await asyncio.to_thread(self.get_many, list(keys))
+
+    async def alist(self, prefix: str = "") -> List[str]:
+        return await asyncio.to_thread(self.list, prefix)
+
+    async def adelete(self, key: str):
+        await asyncio.to_thread(self.delete, key)
+
+
+class LocalArtifactStore(ArtifactStore):
+    """Artifacts as files under a root directory, written via temp file and rename."""
+
+    name = "local"
+    supports_links = True
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.environ.get("ARTIFACT_ROOT", "data")
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid artifact key: {key}")
+        return path
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_bytes(self, key: str, data: bytes):
+        atomic_write_bytes(self._path(key), data)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def link(self, key: str, target_key: str) -> bool:
+        # A hard link keeps both files plain and readable while their bytes are stored once
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f".tmp_{uuid.uuid4().hex}_{os.path.basename(path)}")
+        try:
+            os.link(self._path(target_key), tmp_path)
+        except OSError:
+            # Target already removed, or a filesystem without hard links
+            return False
+        os.replace(tmp_path, path)
+        return True
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str = "") -> List[str]:
+        directory = prefix.rpartition("/")[0]
+        base = os.path.join(self.root, directory) if directory else self.root
+        keys = []
+        for dirpath, dirnames, filenames in os.walk(base):
+            relative = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+            key_prefix = "" if relative == "." else relative + "/"
+            # Only descend into directories that can hold matching keys
+            dirnames[:] = [d for d in dirnames
+                           if (key_prefix + d + "/").startswith(prefix) or prefix.startswith(key_prefix + d + "/")]
+            keys.extend(key_prefix + filename for filename in filenames
+                        if not filename.startswith(".tmp_") and (key_prefix + filename).startswith(prefix))
+        return sorted(keys)
+
+
+class SQLiteArtifactStore(ArtifactStore):
+    """Artifacts as rows of one SQLite database; multi-puts are a single transaction."""
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get("ARTIFACT_DB_PATH", "data/artifacts.sqlite3")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS artifacts (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM artifacts WHERE key = ?", (key,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def put_bytes(self, key: str, data: bytes):
+        self.put_many({key: data})
+
+    def put_many(self, items: Dict[str, ArtifactValue]):
+        now = time.time()
+        rows = [(key, encode_artifact(value), now) for key, value in items.items()]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO artifacts (key, data, updated_at) VALUES (?, ?, ?)", rows
+                )
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[bytes]]:
+        keys = list(keys)
+        found: Dict[str, Optional[bytes]] = {key: None for key in keys}
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, data in self._conn.execute(
+                    f"SELECT key, data FROM artifacts WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = bytes(data)
+        return found
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM artifacts WHERE key = ?", (key,)).fetchone() is not None
+
+    def delete(self, key: str):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+
+    def list(self, prefix: str = "") -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM artifacts WHERE key >= ? AND key < ? ORDER BY key",
+                (prefix, prefix + "\uffff")
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+class MinioArtifactStore(ArtifactStore):
+    """Artifacts as objects in the MinIO content bucket.
+
+    Object puts are atomic in S3-compatible stores. Multi-gets and multi-puts
+    are spread over a small thread pool since every object is its own request.
+    """
+
+    name = "minio"
+
+    def __init__(self, prefix: Optional[str] = None, max_workers: int = 8):
+        # Imported here so the minio package is only needed when this backend is used
+        from .minio_storage_service import MinioStorageService
+        service = MinioStorageService()
+        self.client = service.client
+        self.bucket = service.content_bucket
+        self.prefix = prefix if prefix is not None else os.environ.get("ARTIFACT_MINIO_PREFIX", "artifacts/")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="minio-artifacts")
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        from minio.error import S3Error
+        try:
+            response = self.client.get_object(self.bucket, self.prefix + key)
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            raise
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def put_bytes(self, key: str, data: bytes):
+        self.client.put_object(self.bucket, self.prefix + key, io.BytesIO(data), len(data))
+
+    def put_many(self, items: Dict[str, ArtifactValue]):
+        futures = [self._executor.submit(self.put_bytes, key, encode_artifact(value)) for key, value in items.items()]
+        for future in futures:
+            future.result()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[bytes]]:
+        keys = list(keys)
+        return dict(zip(keys, self._executor.map(self.get_bytes, keys)))
+
+    def exists(self, key: str) -> bool:
+        from minio.error import S3Error
+        try:
+            self.client.stat_object(self.bucket, self.prefix + key)
+            return True
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return False
+            raise
+
+    def delete(self, key: str):
+        self.client.remove_object(self.bucket, self.prefix + key)
+
+    def list(self, prefix: str = "") -> List[str]:
+        objects = self.client.list_objects(self.bucket, prefix=self.prefix + prefix, recursive=True)
+        return sorted(obj.object_name[len(self.prefix):] for obj in objects)
+
+
+STORE_BACKENDS = {
+    "local": LocalArtifactStore,
+    "sqlite": SQLiteArtifactStore,
+    "minio": MinioArtifactStore
+}
+
+_artifact_store: Optional[ArtifactStore] = None
+
+def get_artifact_store() -> ArtifactStore:
+    """Return the process-wide artifact store selected by ARTIFACT_STORE (local, sqlite or minio).
+
+    The backend is wrapped in the content-addressed layer, which stores each
+    distinct blob once when ARTIFACT_DEDUP_ENABLED=true and otherwise writes
+    plain files while still reading artifacts that were stored deduplicated.
+    """
+    global _artifact_store
+    if _artifact_store is None:
+        backend = os.environ.get("ARTIFACT_STORE", "local").lower()
+        if backend not in STORE_BACKENDS:
+            raise ValueError(f"Unknown ARTIFACT_STORE '{backend}', expected one of: {', '.join(STORE_BACKENDS)}")
+        from .content_addressed_store import ContentAddressedStore
+        store = ContentAddressedStore(STORE_BACKENDS[backend](),
+                                      dedup=os.environ.get("ARTIFACT_DEDUP_ENABLED", "false").lower() == "true")
+        _artifact_store = store
+        print(f"[Artifact Store] Using {store.name} backend")
+    return _artifact_store
@@ -0,0 +1,95 @@
+import os
+import json
+import tempfile
+import threading
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: fall back to msvcrt byte-range locks
+    fcntl = None
+    import msvcrt
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Write a file so readers see either the old or the new content, never a partial one.
+
+    The data is written to a temporary file in the same directory, flushed to
+    disk, and then renamed over the target.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(path: str, text: str):
+    """Write text as UTF-8 atomically."""
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path: str, data: Any, indent: int = 2):
+    """Serialise data as JSON and write it atomically."""
+    atomic_write_text(path, json.dumps(data, indent=indent))
+
+
+class FileLock:
+    """Exclusive lock shared by every thread and process that uses the same path.
+
+    Use it around a read-modify-write of a file that several worker
+    processes update, e.g.:
+
+        with FileLock("data/task_queue.json"):
+            ...read, change and atomically rewrite the file...
+
+    The lock is held on a separate "<path>.lock" file, so the locked file
+    itself can still be replaced with atomic_write_*.
+    """
+
+    _thread_locks = {}
+    _thread_locks_guard = threading.Lock()
+
+    def __init__(self, path: str):
+        self.lock_path = path + ".lock"
+        # flock does not exclude threads of one process that share the lock, so pair it with a thread lock
+        with FileLock._thread_locks_guard:
+            self._thread_lock = FileLock._thread_locks.setdefault(os.path.abspath(self.lock_path), threading.Lock())
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        except Exception:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+            self._thread_lock.release()
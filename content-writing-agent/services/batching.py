@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+from dotenv import load_dotenv
+from .inference_backends import InferenceBackend
+
+# Load environment variables
+load_dotenv()
+
+class _PendingBatch:
+    """Prompts collected for one (backend, model, parameters) key."""
+
+    def __init__(self, backend: InferenceBackend, model_id: str, parameters: Dict[str, Any]):
+        self.backend = backend
+        self.model_id = model_id
+        self.parameters = parameters
+        self.prompts: List[str] = []
+        self.futures: List[asyncio.Future] = []
+        self.enqueued_at: List[float] = []
+        self.timeout: Optional[float] = None
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """Groups concurrent prompts for the same model into batched requests.
+
+    The first prompt for a key opens a short collection window. Every prompt
+    for the same backend, model and generation parameters that arrives inside
+    the window joins the batch, which is sent as soon as the window closes or
+    the batch is full. Each caller gets back its own completion.
+    """
+
+    def __init__(self, max_batch_size: Optional[int] = None, window_ms: Optional[float] = None):
+        """
+        Initialize the batcher.
+
+        Args:
+            max_batch_size: Largest number of prompts sent in one request
+            window_ms: How long to wait for more prompts after the first one
+        """
+        self.max_batch_size = max_batch_size or int(os.environ.get("LLM_BATCH_MAX_SIZE", "8"))
+        self.window_ms = window_ms if window_ms is not None else float(os.environ.get("LLM_BATCH_WINDOW_MS", "20"))
+
+        self._pending: Dict[Tuple[str, str, str], _PendingBatch] = {}
+
+        # Metrics
+        self.started_at = time.time()
+        self.batches_sent = 0
+        self.prompts_sent = 0
+        self.batch_errors = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.max_batch_seen = 0
+
+    async def submit(self, backend: InferenceBackend, model_id: str, prompt: str,
+                     parameters: Dict[str, Any], timeout: Optional[float] = None) -> str:
+        """Queue a prompt and wait for its completion."""
+        if self.max_batch_size <= 1:
+            self._record([0.0])
+            return await backend.generate(model_id, prompt, parameters, timeout=timeout)
+
+        loop = asyncio.get_running_loop()
+        key = (backend.name, model_id, json.dumps(parameters, sort_keys=True))
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch(backend, model_id, parameters)
+            self._pending[key] = batch
+            batch.flush_handle = loop.call_later(self.window_ms / 1000, self._flush, key)
+
+        future = loop.create_future()
+        batch.prompts.append(prompt)
+        batch.futures.append(future)
+        batch.enqueued_at.append(time.monotonic())
+        if timeout is not None:
+            batch.timeout = max(batch.timeout or 0, timeout)
+
+        if len(batch.prompts) >= self.max_batch_size:
+            batch.flush_handle.cancel()
+            self._flush(key)
+
+        return await future
+
+    def _flush(self, key: Tuple[str, str, str]):
+        """Detach the pending batch for a key and send it."""
+        batch = self._pending.pop(key, None)
+        if batch is not None:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: _PendingBatch):
+        """Send a batch to its backend and hand each result to its caller."""
+        now = time.monotonic()
+        self._record([now - t for t in batch.enqueued_at])
+
+        try:
+            results = await batch.backend.generate_batch(
+                batch.model_id, batch.prompts, batch.parameters, timeout=batch.timeout
+            )
+            # A short answer would leave the remaining callers waiting forever
+            if len(results) != len(batch.futures):
+                raise ValueError(f"{batch.model_id} returned {len(results)} generations "
+                                 f"for a batch of {len(batch.futures)}")
+        except Exception as e:
+            self.batch_errors += 1
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, waits: List[float]):
+        """Update batch size and queue-wait metrics."""
+        self.batches_sent += 1
+        self.prompts_sent += len(waits)
+        self.total_queue_wait += sum(waits)
+        self.max_queue_wait = max(self.max_queue_wait, max(waits))
+        self.max_batch_seen = max(self.max_batch_seen, len(waits))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return throughput and queue-wait metrics."""
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        return {
+            "batches_sent": self.batches_sent,
+            "prompts_sent": self.prompts_sent,
+            "batch_errors": self.batch_errors,
+            "avg_batch_size": self.prompts_sent / self.batches_sent if self.batches_sent else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "prompts_per_second": self.prompts_sent / elapsed,
+            "avg_queue_wait_ms": 1000 * self.total_queue_wait / self.prompts_sent if self.prompts_sent else 0.0,
+            "max_queue_wait_ms": 1000 * self.max_queue_wait,
+            "pending_batches": len(self._pending)
+        }
+
+
+_batcher: Optional[MicroBatcher] = None
+
+def get_batcher() -> MicroBatcher:
+    """Return the process-wide micro-batcher."""
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher()
+    return _batcher
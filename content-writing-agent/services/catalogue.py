@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import base64
+import socket
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence
+from dotenv import load_dotenv
+from .artifact_store import ArtifactStore, get_artifact_store
+
+# Load environment variables
+load_dotenv()
+
+# Columns a client may select, filter or sort by
+FIELDS = ["content_id", "title", "source", "url", "published_date", "created", "status",
+          "content_type", "current_stage", "updated_at", "duration_seconds", "error"]
+SORT_FIELDS = ["created", "updated_at", "published_date", "title", "status"]
+DEFAULT_FIELDS = ["content_id", "title", "status", "created"]
+
+
+class ContentCatalogue:
+    """SQLite index of every content item and its pipeline status.
+
+    The index is updated as plans are created and stages finish, so listing
+    content never has to read plan or status files. Listing uses keyset
+    (cursor) pagination over indexed columns, so a page costs the same no
+    matter how many articles exist.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the catalogue.
+
+        Args:
+            path: Location of the SQLite database file
+        """
+        self.path = path or os.environ.get("CATALOGUE_PATH", "data/catalogue.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS content (
+                content_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL DEFAULT '',
+                source TEXT NOT NULL DEFAULT '',
+                url TEXT NOT NULL DEFAULT '',
+                published_date TEXT NOT NULL DEFAULT '',
+                created TEXT NOT NULL DEFAULT '',
+                status TEXT NOT NULL DEFAULT 'pending',
+                content_type TEXT NOT NULL DEFAULT '',
+                current_stage TEXT,
+                updated_at REAL NOT NULL,
+                duration_seconds REAL,
+                error TEXT
+            )
+        """)
+        # Which process last changed a row, so a process can tell other workers' changes from its own
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(content)")}
+        if "updated_by" not in columns:
+            conn.execute("ALTER TABLE content ADD COLUMN updated_by TEXT")
+        # One index per filter, each ending in the sort key plus content_id for stable cursors
+        for column in SORT_FIELDS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_content_{column} ON content ({column}, content_id)")
+        for column in ["status", "content_type", "source"]:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_content_{column}_created "
+                         f"ON content ({column}, created, content_id)")
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def writer() -> str:
+        """Identity of the current process as recorded in updated_by."""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def add_plan(self, plan: Dict[str, Any], created: Optional[float] = None):
+        """Index a new content plan; an existing entry keeps its status."""
+        update = plan.get("original_update", {})
+        created_at = datetime.fromtimestamp(created or time.time()).isoformat(timespec="seconds")
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO content (content_id, title, source, url, published_date, created, updated_at, updated_by)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (content_id) DO UPDATE SET
+                    title = excluded.title, source = excluded.source, url = excluded.url,
+                    published_date = excluded.published_date
+            """, (plan["content_id"], update.get("title", ""), update.get("source", ""), update.get("url", ""),
+                  update.get("published_date") or "", plan.get("timestamp") or created_at, time.time(),
+                  self.writer()))
+            self._conn.commit()
+
+    def update(self, content_id: str, **fields: Any):
+        """Update indexed fields of a content item, e.g. update(id, status="completed")."""
+        unknown = [name for name in fields if name not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown catalogue field(s): {', '.join(unknown)}")
+        fields["updated_at"] = time.time()
+        fields["updated_by"] = self.writer()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE content SET {assignments} WHERE content_id = ?",
+                               (*fields.values(), content_id))
+            self._conn.commit()
+
+    def changes_since(self, cursor: Sequence[Any], limit: int = 500) -> List[Dict[str, Any]]:
+        """Return rows changed after an (updated_at, content_id) cursor, oldest change first.
+
+        Pass the last row's (updated_at, content_id) back to read the next page.
+        """
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT {", ".join(FIELDS)}, updated_by FROM content
+                WHERE (updated_at, content_id) > (?, ?)
+                ORDER BY updated_at, content_id LIMIT ?
+            """, (*cursor, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def sync(self, store: Optional[ArtifactStore] = None) -> int:
+        """Index stored plans that are missing from the catalogue, e.g. after an upgrade.
+
+        Returns the number of plans added.
+        """
+        store = store or get_artifact_store()
+        with self._lock:
+            known = {row[0] for row in self._conn.execute("SELECT content_id FROM content")}
+        missing = [key[len("content_plans/"):-len(".json")] for key in store.list("content_plans/")
+                   if key.endswith(".json")]
+        missing = [content_id for content_id in missing if content_id not in known]
+
+        added = 0
+        # Read the plans with their status and classification in batches rather than one key at a time
+        for start in range(0, len(missing), 100):
+            chunk = missing[start:start + 100]
+            found = store.get_many([key for content_id in chunk for key in (
+                f"content_plans/{content_id}.json", f"status_{content_id}.json",
+                f"classification_{content_id}.json")])
+            for content_id in chunk:
+                try:
+                    plan = json.loads(found[f"content_plans/{content_id}.json"])
+                    plan.setdefault("content_id", content_id)
+                    self.add_plan(plan)
+
+                    status = found[f"status_{content_id}.json"]
+                    if status is not None:
+                        status = json.loads(status)
+                        self.update(content_id, status=status.get("status", "pending"),
+                                    duration_seconds=status.get("duration_seconds"), error=status.get("error"))
+                    classification = found[f"classification_{content_id}.json"]
+                    if classification is not None:
+                        self.update(content_id, content_type=json.loads(classification).get("content_type", ""))
+                    added += 1
+                except Exception as e:
+                    print(f"[Catalogue] Could not index {content_id}: {e}")
+        if added:
+            print(f"[Catalogue] Indexed {added} stored content plan(s)")
+        return added
+
+    @staticmethod
+    def _encode_cursor(values: Sequence[Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(values)).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> List[Any]:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if not isinstance(values, list) or len(values) != 2:
+            raise ValueError("Invalid cursor")
+        return values
+
+    def query(self, status: Optional[str] = None, content_type: Optional[str] = None,
+              source: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+              sort: str = "created", order: str = "desc", limit: int = 50,
+              cursor: Optional[str] = None, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        List content items one page at a time.
+
+        Args:
+            status, content_type, source: Exact-match filters
+            since, until: ISO date/time bounds on the creation time (until is exclusive)
+            sort: Column to sort by, one of SORT_FIELDS
+            order: "asc" or "desc"
+            limit: Page size
+            cursor: next_cursor of the previous page
+            fields: Columns to return, defaults to DEFAULT_FIELDS
+
+        Returns:
+            {"items": [...], "next_cursor": cursor of the next page or None}
+
+        Raises:
+            ValueError: For an unknown sort column or field, or a malformed cursor
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_FIELDS)}")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+        fields = list(fields or DEFAULT_FIELDS)
+        unknown = [name for name in fields if name not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+        where, params = [], []
+        for column, value in (("status", status), ("content_type", content_type), ("source", source)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            where.append("created >= ?")
+            params.append(since)
+        if until:
+            where.append("created < ?")
+            params.append(until)
+        if cursor:
+            comparison = "<" if order == "desc" else ">"
+            where.append(f"({sort}, content_id) {comparison} (?, ?)")
+            params.extend(self._decode_cursor(cursor))
+
+        columns = list(dict.fromkeys(fields + [sort, "content_id"]))
+        sql = f"SELECT {', '.join(columns)} FROM content"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {sort} {order.upper()}, content_id {order.upper()} LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor([rows[-1][sort], rows[-1]["content_id"]])
+        return {
+            "items": [{name: row[name] for name in fields} for row in rows],
+            "next_cursor": next_cursor
+        }
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            if status:
+                return self._conn.execute("SELECT COUNT(*) FROM content WHERE status = ?", (status,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM content").fetchone()[0]
+
+
+_catalogue: Optional[ContentCatalogue] = None
+
+def get_catalogue() -> ContentCatalogue:
+    """Return the process-wide content catalogue."""
+    global _catalogue
+    if _catalogue is None:
+        _catalogue = ContentCatalogue()
+    return _catalogue
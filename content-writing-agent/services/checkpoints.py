@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import hashlib
+from typing import Dict, Any, List, Optional
+from .artifact_store import ArtifactStore, get_artifact_store
+from .atomic_io import FileLock
+from .pipeline import PipelineGraph
+
+
+class CheckpointStore:
+    """Durable record of which pipeline stages have finished for a content item.
+
+    Stages already write their output to an artifact; a checkpoint points at
+    that artifact together with a hash of its contents and the fingerprint of
+    the stage's inputs and code version. A stage counts as done only if its
+    artifact still matches the hash, its fingerprint is unchanged, and every
+    stage it depends on is done too. A resumed or rebuilt run therefore only
+    recomputes stages whose inputs or code changed, plus everything downstream.
+
+    All stages of a content item share one manifest, and stages that run side
+    by side commit at the same time, so commits hold a per-item file lock
+    that also excludes other processes such as rebuild.py.
+    """
+
+    def __init__(self, store: Optional[ArtifactStore] = None, prefix: str = "checkpoints/",
+                 lock_dir: str = "data/locks"):
+        self.store = store or get_artifact_store()
+        self.prefix = prefix
+        self.lock_dir = lock_dir
+
+    def _key(self, content_id: str) -> str:
+        return f"{self.prefix}{content_id}.json"
+
+    @staticmethod
+    def _hash(data: Optional[bytes]) -> Optional[str]:
+        return hashlib.sha256(data).hexdigest() if data is not None else None
+
+    def read(self, content_id: str) -> Dict[str, Any]:
+        """Return the raw checkpoint manifest for a content item."""
+        try:
+            manifest = self.store.get_json(self._key(content_id))
+        except Exception as e:
+            print(f"Error reading checkpoint for {content_id}: {e}")
+            manifest = None
+        return manifest or {"content_id": content_id, "stages": {}}
+
+    def commit(self, content_id: str, stage: str, artifact: str, extra: Optional[Dict[str, Any]] = None):
+        """Durably record that a stage finished and stored its output under the artifact key."""
+        entry = {
+            "artifact": artifact,
+            "sha256": self._hash(self.store.get_bytes(artifact)),
+            "completed_at": time.time(),
+            **(extra or {})
+        }
+        with FileLock(os.path.join(self.lock_dir, f"checkpoint_{content_id}")):
+            manifest = self.read(content_id)
+            manifest["stages"][stage] = entry
+            self.store.put(self._key(content_id), manifest)
+
+    def load(self, content_id: str, graph: PipelineGraph, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the outputs of stages that can be reused, keyed by stage name."""
+        manifest = self.read(content_id)
+        completed: Dict[str, Any] = {}
+        for name in graph.order():
+            entry = manifest["stages"].get(name)
+            if entry is None:
+                continue
+            depends_on = graph.stages[name].depends_on
+            if any(dep not in completed for dep in depends_on):
+                continue
+            inputs = {dep: completed[dep] for dep in depends_on}
+            if entry.get("fingerprint") != graph.fingerprint(name, context, inputs):
+                continue
+            data = self.store.get_bytes(graph.stages[name].artifact_path(context))
+            if data is None or self._hash(data) != entry.get("sha256"):
+                continue
+            completed[name] = json.loads(data)
+        return completed
+
+    def stale_stages(self, content_id: str, graph: PipelineGraph, context: Dict[str, Any]) -> List[str]:
+        """Return the stages a run would recompute, in execution order."""
+        completed = self.load(content_id, graph, context)
+        return [name for name in graph.order() if name not in completed]
+
+    def adopt(self, content_id: str, graph: PipelineGraph, context: Dict[str, Any]) -> List[str]:
+        """Checkpoint artifacts written before checkpoints existed as up to date.
+
+        This lets a back catalogue produced by older runs be rebuilt
+        incrementally from now on instead of being recomputed in full.
+        Returns the stages that were adopted.
+        """
+        manifest = self.read(content_id)
+        outputs: Dict[str, Any] = {}
+        adopted = []
+        for name in graph.order():
+            stage = graph.stages[name]
+            artifact = stage.artifact_path(context)
+            data = self.store.get_bytes(artifact) if artifact else None
+            if data is None:
+                continue
+            if any(dep not in outputs for dep in stage.depends_on):
+                continue
+            outputs[name] = json.loads(data)
+            if name in manifest["stages"]:
+                continue
+            inputs = {dep: outputs[dep] for dep in stage.depends_on}
+            self.commit(content_id, name, artifact, {"fingerprint": graph.fingerprint(name, context, inputs)})
+            adopted.append(name)
+        return adopted
+
+    def clear(self, content_id: str):
+        """Forget all checkpoints so the next run starts from the first stage."""
+        self.store.delete(self._key(content_id))
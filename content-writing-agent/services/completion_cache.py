@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import threading
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class CompletionCache:
+    """Disk-backed, content-addressed cache for LLM completions.
+
+    Entries live in a SQLite database in WAL mode so several uvicorn worker
+    processes can share it safely. The cache is bounded by an entry count
+    (least-recently-used entries are evicted first) and a time-to-live.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        """
+        Initialize the completion cache.
+
+        Args:
+            path: Location of the SQLite database file
+            max_entries: Maximum number of cached completions
+            ttl_seconds: How long a completion stays valid
+        """
+        self.path = path or os.environ.get("LLM_CACHE_PATH", "data/llm_cache.sqlite3")
+        self.max_entries = max_entries or int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "5000"))
+        self.ttl_seconds = ttl_seconds or float(os.environ.get("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                completion TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_access ON completions (last_access)")
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, prompt: str, parameters: Dict[str, Any]) -> str:
+        """Hash everything that influences a completion into a cache key."""
+        material = json.dumps({
+            "model": model,
+            "system_prompt": system_prompt,
+            "prompt": prompt,
+            "parameters": parameters
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached completion, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completion, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            completion, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                self.evictions += 1
+                return None
+
+            self._conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return completion
+
+    def set(self, key: str, model: str, completion: str):
+        """Store a completion and evict expired and least-recently-used entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, completion, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, completion, now, now)
+            )
+            expired = self._conn.execute(
+                "DELETE FROM completions WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            overflow = self._conn.execute(
+                "DELETE FROM completions WHERE key IN ("
+                "SELECT key FROM completions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+            self.evictions += expired + overflow
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async wrapper around get() that keeps disk I/O off the event loop."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, model: str, completion: str):
+        """Async wrapper around set() that keeps disk I/O off the event loop."""
+        await asyncio.to_thread(self.set, key, model, completion)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process and the current cache size."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+_completion_cache: Optional[CompletionCache] = None
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """Return the process-wide completion cache, or None when disabled."""
+    global _completion_cache
+    if os.environ.get("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _completion_cache is None:
+        _completion_cache = CompletionCache()
+    return _completion_cache
@@ -0,0 +1,446 @@
+import os
+import re
+import json
+import zlib
+import hashlib
+import threading
+from contextlib import ExitStack
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from .artifact_store import ArtifactStore, ArtifactValue, encode_artifact
+from .atomic_io import FileLock
+
+# A stored document that starts with this marker is a reference to blobs, not the document itself.
+# The leading NUL never occurs in the text and JSON artifacts the pipeline writes.
+REF_MAGIC = b"\x00CASREF1\n"
+BLOB_PREFIX = "cas/blobs/"
+# Raw copies that identical human-facing files are hard-linked to
+PLAIN_POOL_PREFIX = "cas/plain/"
+GROUP_PREFIX = "cas/groups/"
+# Placeholder for a long JSON string that was split out into its own blob
+STRING_REF = "$cas"
+# zlib only looks back 32 KiB, so that is all of a delta base that can help
+ZDICT_SIZE = 32 * 1024
+# Artifacts of one content item share its id, which makes them candidates for deltas
+GROUP_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+# Files people open directly (articles, publications) are always stored as plain text
+PLAIN_PREFIXES = ("publications/",)
+PLAIN_SUFFIXES = (".md", ".txt")
+
+
+class _NotSplittable(Exception):
+    pass
+
+
+def _string_refs(node: Any) -> List[str]:
+    """Return the blob ids of the strings split out of a JSON tree."""
+    if isinstance(node, dict):
+        if list(node) == [STRING_REF]:
+            return [node[STRING_REF]]
+        return [sha for item in node.values() for sha in _string_refs(item)]
+    if isinstance(node, list):
+        return [sha for item in node for sha in _string_refs(item)]
+    return []
+
+
+class _PendingWrite:
+    """Blobs and group index additions collected by one put_many call."""
+
+    def __init__(self):
+        self.blobs: Dict[str, Tuple[bytes, bytes, int]] = {}  # sha -> (record, data, depth)
+        self.groups: Dict[str, List[str]] = {}
+
+
+class ContentAddressedStore(ArtifactStore):
+    """Deduplicating, delta-compressing layer over another artifact store.
+
+    Every distinct piece of content is stored once as a blob keyed by its
+    sha256. An artifact key then holds only a small reference to its blobs:
+
+    - Pretty-printed JSON artifacts have their long strings (article text,
+      research reports) split into separate blobs, so the article body inside
+      article_<id>.json, the proofread and publication packages, and the
+      markdown and platform files all point at the same blob.
+    - A blob of a content item is zlib-compressed with an earlier blob of the
+      same item as preset dictionary when that is smaller, which stores an
+      edited article as a delta against the original.
+    - Other artifacts up to inline_max bytes (status files, checkpoints) are
+      stored as-is.
+    - Human-facing outputs (markdown and text files, everything under
+      publications/) stay plain files, but byte-identical ones (the article
+      and its blog and Medium copies) are hard links to a single copy when
+      the backend supports links. On other backends they are stored as a
+      reference to one blob each.
+
+    Readers get the original bytes back from get_bytes/get_many. Artifacts
+    written before this layer existed are read unchanged and converted the
+    next time they are written. Overwriting or deleting an artifact leaves
+    its blobs behind until gc() is run.
+
+    The per-item index of recent blobs (delta bases) is read and rewritten
+    under a file lock per content item, shared with other processes.
+
+    With dedup off, everything is written as plain files but references
+    written earlier are still resolved, so deduplication can be switched off
+    without converting the stored artifacts first.
+    """
+
+    def __init__(self, backend: ArtifactStore, dedup: bool = True, inline_max: int = 1024, min_split: int = 512,
+                 delta_min: int = 1024, max_depth: int = 4, candidates: int = 3, cache_size: int = 256,
+                 lock_dir: str = "data/locks"):
+        """
+        Initialize the content-addressed layer.
+
+        Args:
+            backend: Store that holds the references and blobs
+            dedup: Write new artifacts as references to blobs; otherwise only read them
+            inline_max: Artifacts up to this size without long JSON strings are stored as-is
+            min_split: JSON strings at least this long get their own blob
+            delta_min: Blobs at least this long are tried as deltas and offered as delta bases
+            max_depth: Longest chain of deltas a read has to resolve
+            candidates: Recent blobs of the same content item tried as delta base
+            cache_size: Decoded blobs kept in memory
+            lock_dir: Directory of the lock files guarding the group indexes
+        """
+        self.backend = backend
+        self.dedup = dedup
+        self.name = f"{backend.name}+cas" if dedup else backend.name
+        self.inline_max = inline_max
+        self.min_split = min_split
+        self.delta_min = delta_min
+        self.max_depth = max_depth
+        self.candidates = candidates
+        self.cache_size = cache_size
+        self.lock_dir = lock_dir
+        self._cache: "OrderedDict[str, Tuple[bytes, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Blob encoding
+
+    @staticmethod
+    def _sha(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def _blob_key(sha: str) -> str:
+        return f"{BLOB_PREFIX}{sha[:2]}/{sha}"
+
+    @staticmethod
+    def _pool_key(sha: str) -> str:
+        return f"{PLAIN_POOL_PREFIX}{sha[:2]}/{sha}"
+
+    @staticmethod
+    def _group(key: str) -> Optional[str]:
+        match = GROUP_PATTERN.search(key)
+        return match.group(0) if match else None
+
+    @staticmethod
+    def _is_plain(key: str) -> bool:
+        return key.startswith(PLAIN_PREFIXES) or key.endswith(PLAIN_SUFFIXES)
+
+    def _group_lock(self, group: str) -> FileLock:
+        return FileLock(os.path.join(self.lock_dir, f"cas_group_{group}"))
+
+    def _encode_blob(self, data: bytes, bases: List[Tuple[str, bytes, int]]) -> Tuple[bytes, int]:
+        """Return the smallest record for data: plain zlib, or a delta against one of bases."""
+        best, depth = b"Z" + zlib.compress(data, 9), 0
+        for base_sha, base, base_depth in bases:
+            compressor = zlib.compressobj(9, zdict=base[-ZDICT_SIZE:])
+            record = (b"D" + base_sha.encode("ascii") + bytes([base_depth + 1])
+                      + compressor.compress(data) + compressor.flush())
+            if len(record) < len(best):
+                best, depth = record, base_depth + 1
+        return best, depth
+
+    @staticmethod
+    def _decode_blob(record: bytes, base: Optional[bytes] = None) -> bytes:
+        if record[:1] == b"Z":
+            return zlib.decompress(record[1:])
+        decompressor = zlib.decompressobj(zdict=base[-ZDICT_SIZE:])
+        return decompressor.decompress(record[66:]) + decompressor.flush()
+
+    @staticmethod
+    def _record_base(record: bytes) -> Optional[Tuple[str, int]]:
+        """Return (base sha, depth) of a delta record, or None for a plain one."""
+        if record[:1] == b"D":
+            return record[1:65].decode("ascii"), record[65]
+        return None
+
+    def _cache_get(self, sha: str) -> Optional[Tuple[bytes, int]]:
+        with self._lock:
+            entry = self._cache.get(sha)
+            if entry is not None:
+                self._cache.move_to_end(sha)
+            return entry
+
+    def _cache_put(self, sha: str, data: bytes, depth: int):
+        with self._lock:
+            self._cache[sha] = (data, depth)
+            self._cache.move_to_end(sha)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _load_blobs(self, shas: Iterable[str], pending: Optional[_PendingWrite] = None) -> Dict[str, Tuple[bytes, int]]:
+        """Decode blobs and the delta bases they need, fetching each level of the chains in one batch."""
+        decoded: Dict[str, Tuple[bytes, int]] = {}
+        records: Dict[str, bytes] = {}
+        todo = set(shas)
+        while todo:
+            for sha in list(todo):
+                entry = decoded.get(sha) or self._cache_get(sha)
+                if entry is None and pending is not None and sha in pending.blobs:
+                    entry = pending.blobs[sha][1:]
+                if entry is not None:
+                    decoded[sha] = entry
+                    todo.discard(sha)
+
+            fetch = [sha for sha in todo if sha not in records]
+            if fetch:
+                found = self.backend.get_many(self._blob_key(sha) for sha in fetch)
+                for sha in fetch:
+                    record = found[self._blob_key(sha)]
+                    if record is None:
+                        raise KeyError(f"Missing artifact blob {sha}")
+                    records[sha] = record
+
+            needed = set()
+            for sha in todo:
+                base = self._record_base(records[sha])
+                if base is None:
+                    decoded[sha] = (self._decode_blob(records[sha]), 0)
+                elif base[0] in decoded:
+                    decoded[sha] = (self._decode_blob(records[sha], decoded[base[0]][0]), base[1])
+                else:
+                    needed.add(base[0])
+            for sha in todo & decoded.keys():
+                self._cache_put(sha, *decoded[sha])
+            todo = (todo - decoded.keys()) | needed
+        return decoded
+
+    # Writing
+
+    def _split_json(self, data: bytes) -> Optional[Tuple[Any, Dict[str, bytes]]]:
+        """Split long strings out of a JSON document.
+
+        Only documents that json.dumps(..., indent=2) reproduces byte for byte
+        are split, so reading them back returns exactly what was written.
+        """
+        try:
+            value = json.loads(data)
+        except ValueError:
+            return None
+        if json.dumps(value, indent=2).encode("utf-8") != data:
+            return None
+
+        strings: Dict[str, bytes] = {}
+
+        def split(node: Any) -> Any:
+            if isinstance(node, str) and len(node) >= self.min_split:
+                encoded = node.encode("utf-8")
+                sha = self._sha(encoded)
+                strings[sha] = encoded
+                return {STRING_REF: sha}
+            if isinstance(node, dict):
+                if list(node) == [STRING_REF]:
+                    raise _NotSplittable()
+                return {name: split(item) for name, item in node.items()}
+            if isinstance(node, list):
+                return [split(item) for item in node]
+            return node
+
+        try:
+            tree = split(value)
+        except _NotSplittable:
+            return None
+        return tree, strings
+
+    def _group_bases(self, group: str, pending: _PendingWrite) -> List[str]:
+        if group not in pending.groups:
+            index = self.backend.get_bytes(f"{GROUP_PREFIX}{group}.json")
+            pending.groups[group] = json.loads(index)["blobs"] if index else []
+        return pending.groups[group]
+
+    def _add_blob(self, data: bytes, group: Optional[str], pending: _PendingWrite) -> str:
+        sha = self._sha(data)
+        if sha in pending.blobs or self._cache_get(sha) is not None or self.backend.exists(self._blob_key(sha)):
+            return sha
+
+        bases = []
+        if group and len(data) >= self.delta_min:
+            recent = [base for base in self._group_bases(group, pending) if base != sha][-self.candidates:]
+            for base_sha, (base, depth) in self._load_blobs(recent, pending).items():
+                if base_sha in recent and depth < self.max_depth:
+                    bases.append((base_sha, base, depth))
+        record, depth = self._encode_blob(data, bases)
+        pending.blobs[sha] = (record, data, depth)
+
+        if group and len(data) >= self.delta_min and depth < self.max_depth:
+            self._group_bases(group, pending).append(sha)
+        return sha
+
+    def _document(self, data: bytes, group: Optional[str], pending: _PendingWrite) -> bytes:
+        """Return what to store under an artifact's key: the data itself or a reference to blobs."""
+        split = self._split_json(data)
+        if split is not None and split[1]:
+            # The remaining JSON skeleton is small, so it lives in the reference itself
+            tree, strings = split
+            for string in strings.values():
+                self._add_blob(string, group, pending)
+            ref = {"json": tree}
+        elif len(data) > self.inline_max:
+            ref = {"blob": self._add_blob(data, group, pending)}
+        else:
+            return data
+        return REF_MAGIC + json.dumps(ref, separators=(",", ":")).encode("utf-8")
+
+    def put_bytes(self, key: str, data: bytes):
+        self.put_many({key: data})
+
+    def put_many(self, items: Dict[str, ArtifactValue]):
+        documents: Dict[str, bytes] = {key: encode_artifact(value) for key, value in items.items()}
+        if not self.dedup:
+            self.backend.put_many(documents)
+            return
+        groups = sorted({self._group(key) for key in documents if not self._is_plain(key)} - {None})
+        with ExitStack() as locks:
+            # The group indexes are read, extended and rewritten while these are held; sorted to avoid deadlocks
+            for group in groups:
+                locks.enter_context(self._group_lock(group))
+
+            pending = _PendingWrite()
+            linked: Dict[str, bytes] = {}
+            for key, data in documents.items():
+                if not self._is_plain(key):
+                    documents[key] = self._document(data, self._group(key), pending)
+                elif len(data) > self.inline_max:
+                    if self.backend.supports_links:
+                        linked[key] = data
+                    else:
+                        # Nobody opens these files directly on such backends, so a reference costs nothing
+                        ref = {"blob": self._add_blob(data, None, pending)}
+                        documents[key] = REF_MAGIC + json.dumps(ref, separators=(",", ":")).encode("utf-8")
+            for key in linked:
+                del documents[key]
+
+            # Blobs go first so a reference never points at a blob that is not stored yet
+            if pending.blobs:
+                self.backend.put_many({self._blob_key(sha): record for sha, (record, _, _) in pending.blobs.items()})
+                for sha, (_, data, depth) in pending.blobs.items():
+                    self._cache_put(sha, data, depth)
+            for group, blobs in pending.groups.items():
+                documents[f"{GROUP_PREFIX}{group}.json"] = json.dumps({"blobs": blobs[-8:]}).encode("utf-8")
+            self.backend.put_many(documents)
+        for key, data in linked.items():
+            self._put_linked(key, data)
+
+    def _put_linked(self, key: str, data: bytes):
+        """Store a human-facing file as a hard link to the pooled copy of its bytes."""
+        pool_key = self._pool_key(self._sha(data))
+        if not self.backend.exists(pool_key):
+            self.backend.put_bytes(pool_key, data)
+        # gc may remove the pooled copy in between; the file is then written on its own
+        if not self.backend.link(key, pool_key):
+            self.backend.put_bytes(key, data)
+
+    # Reading
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[bytes]]:
+        found = self.backend.get_many(keys)
+        refs = {key: json.loads(data[len(REF_MAGIC):])
+                for key, data in found.items() if data is not None and data.startswith(REF_MAGIC)}
+        if not refs:
+            return found
+
+        needed = []
+        for ref in refs.values():
+            needed.extend(_string_refs(ref["json"]) if "json" in ref else [ref["blob"]])
+        blobs = self._load_blobs(needed)
+
+        def join(node: Any) -> Any:
+            if isinstance(node, dict):
+                if list(node) == [STRING_REF]:
+                    return blobs[node[STRING_REF]][0].decode("utf-8")
+                return {name: join(item) for name, item in node.items()}
+            if isinstance(node, list):
+                return [join(item) for item in node]
+            return node
+
+        for key, ref in refs.items():
+            if "json" in ref:
+                found[key] = json.dumps(join(ref["json"]), indent=2).encode("utf-8")
+            else:
+                found[key] = blobs[ref["blob"]][0]
+        return found
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        return self.get_many([key])[key]
+
+    def exists(self, key: str) -> bool:
+        return self.backend.exists(key)
+
+    def delete(self, key: str):
+        self.backend.delete(key)
+
+    def list(self, prefix: str = "") -> List[str]:
+        return [key for key in self.backend.list(prefix) if not key.startswith("cas/")]
+
+    # Maintenance
+
+    def gc(self) -> Dict[str, int]:
+        """Delete blobs no artifact refers to any more.
+
+        The recent blobs listed in each content item's index are kept as well,
+        and each index is read under its lock after the blobs are listed, so a
+        put of a content item running at the same time never loses a blob it
+        is about to reference. Artifacts without a content id in their key are
+        not covered by this; run gc while nothing writes those.
+        """
+        live = set()
+        live_pool = set()
+        # SQLite databases may share the root directory of the local backend; they never hold references
+        keys = [key for key in self.list() if not key.endswith((".sqlite3", ".sqlite3-wal", ".sqlite3-shm"))]
+        for start in range(0, len(keys), 500):
+            found = self.backend.get_many(keys[start:start + 500])
+            for key, data in found.items():
+                if data is None:
+                    continue
+                if not data.startswith(REF_MAGIC):
+                    if self._is_plain(key):
+                        live_pool.add(self._sha(data))
+                    continue
+                ref = json.loads(data[len(REF_MAGIC):])
+                live.update(_string_refs(ref["json"]) if "json" in ref else [ref["blob"]])
+
+        blob_keys = self.backend.list(BLOB_PREFIX)
+        for key in self.backend.list(GROUP_PREFIX):
+            with self._group_lock(key[len(GROUP_PREFIX):-len(".json")]):
+                index = self.backend.get_bytes(key)
+            if index is not None:
+                live.update(json.loads(index)["blobs"])
+
+        records = {}
+        for start in range(0, len(blob_keys), 500):
+            records.update(self.backend.get_many(blob_keys[start:start + 500]))
+        # Delta bases of live blobs stay live too
+        todo = list(live)
+        while todo:
+            record = records.get(self._blob_key(todo.pop()))
+            base = self._record_base(record) if record else None
+            if base and base[0] not in live:
+                live.add(base[0])
+                todo.append(base[0])
+
+        deleted = 0
+        for key in blob_keys:
+            if key.rsplit("/", 1)[-1] not in live:
+                self.backend.delete(key)
+                deleted += 1
+        # Removing a pooled copy never affects the files linked to it, only later writes of the same bytes
+        for key in self.backend.list(PLAIN_POOL_PREFIX):
+            if key.rsplit("/", 1)[-1] not in live_pool:
+                self.backend.delete(key)
+        with self._lock:
+            self._cache.clear()
+
+        print(f"[Artifact Store] Garbage collection kept {len(blob_keys) - deleted} blob(s), deleted {deleted}")
+        return {"blobs": len(blob_keys) - deleted, "deleted": deleted}
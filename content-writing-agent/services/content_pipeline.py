@@ -0,0 +1,346 @@
+import json
+import time
+import asyncio
+from typing import Dict, Any, List
+from agents.classification_agent import ContentClassificationAgent
+from agents.research_agent import ResearchAgent
+from agents.writing_agent import WritingAgent
+from agents.fact_check_agent import FactCheckAgent
+from agents.proofreading_agent import ProofreadingAgent
+from agents.publishing_agent import PublishingAgent
+from .pipeline import Stage, PipelineGraph
+from .agent_registry import get_agent_registry
+from .artifact_store import get_artifact_store
+from .checkpoints import CheckpointStore
+from .metrics import get_metrics
+from .events import get_event_bus
+from .catalogue import get_catalogue
+from .article_views import get_article_views
+
+# Agents are created once per process and shared by all pipeline runs
+agents = get_agent_registry()
+
+# Every artifact, status and plan is read and written through the artifact store
+store = get_artifact_store()
+
+# Stage names, in the order they are reported
+PIPELINE_STAGES = ["classification", "research", "writing", "fact_check", "proofreading", "publishing"]
+
+
+async def classification_stage(context: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    content_id = context["content_id"]
+    content_plan = context["content_plan"]
+
+    classification_agent = agents.get("classification")
+    classification_result = await classification_agent.process({
+        "content_id": content_id,
+        "title": content_plan["original_update"]["title"],
+        "content_snippet": content_plan["original_update"]["content_snippet"]
+    })
+
+    # Save classification results
+    await store.aput(f"classification_{content_id}.json", classification_result)
+    return classification_result
+
+
+async def research_stage(context: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    content_id = context["content_id"]
+    content_plan = context["content_plan"]
+
+    research_agent = agents.get("research")
+    research_result = await research_agent.process({
+        "content_id": content_id,
+        "content_plan": content_plan["content_plan"],
+        "original_update": content_plan["original_update"],
+        "classification": inputs["classification"]
+    })
+
+    # Save research results
+    await store.aput(f"research_{content_id}.json", research_result)
+    return research_result
+
+
+async def writing_stage(context: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    content_id = context["content_id"]
+    content_plan = context["content_plan"]
+
+    writing_agent = agents.get("writing")
+    writing_result = await writing_agent.process({
+        "content_id": content_id,
+        "content_plan": content_plan["content_plan"],
+        "research_report": inputs["research"]["research_report"],
+        "classification": inputs["classification"]
+    })
+
+    # Save writing results, plus markdown for easy viewing
+    await store.aput_many({
+        f"article_{content_id}.json": writing_result,
+        f"article_{content_id}.md": writing_result["article_content"]
+    })
+    return writing_result
+
+
+async def fact_check_stage(context: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    content_id = context["content_id"]
+
+    fact_check_agent = agents.get("fact_check")
+    fact_check_result = await fact_check_agent.process({
+        "content_id": content_id,
+        "article_content": inputs["writing"]["article_content"],
+        "research_report": inputs["research"]["research_report"]
+    })
+
+    # Save fact check results
+    await store.aput(f"fact_check_{content_id}.json", fact_check_result)
+    return fact_check_result
+
+
+async def proofreading_stage(context: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    content_id = context["content_id"]
+
+    proofreading_agent = agents.get("proofreading")
+    proofreading_result = await proofreading_agent.process({
+        "content_id": content_id,
+        "article_content": inputs["writing"]["article_content"]
+    })
+
+    # Save proofreading results and the edited article
+    await store.aput_many({
+        f"proofread_{content_id}.json": proofreading_result,
+        f"edited_article_{content_id}.md": proofreading_result["edited_article"]
+    })
+    return proofreading_result
+
+
+async def publishing_stage(context: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    content_id = context["content_id"]
+
+    publishing_agent = agents.get("publishing")
+    publishing_result = await publishing_agent.process({
+        "content_id": content_id,
+        "article_content": inputs["proofreading"]["edited_article"]
+    })
+
+    # Save publishing results
+    await store.aput(f"publishing_{content_id}.json", publishing_result)
+    return publishing_result
+
+
+# Fact checking and proofreading both only need the written article, so they run side by side.
+# Each stage's version hashes its own code and its agent's prompts, so editing
+# a prompt template invalidates that stage and everything downstream of it.
+CONTENT_PIPELINE = PipelineGraph([
+    Stage("classification", classification_stage,
+          artifact="classification_{content_id}.json",
+          sources=[ContentClassificationAgent]),
+    Stage("research", research_stage, depends_on=["classification"],
+          artifact="research_{content_id}.json",
+          sources=[ResearchAgent]),
+    Stage("writing", writing_stage, depends_on=["classification", "research"],
+          artifact="article_{content_id}.json",
+          sources=[WritingAgent]),
+    Stage("fact_check", fact_check_stage, depends_on=["writing", "research"],
+          artifact="fact_check_{content_id}.json",
+          sources=[FactCheckAgent]),
+    Stage("proofreading", proofreading_stage, depends_on=["writing"],
+          artifact="proofread_{content_id}.json",
+          sources=[ProofreadingAgent]),
+    Stage("publishing", publishing_stage, depends_on=["proofreading"],
+          artifact="publishing_{content_id}.json",
+          sources=[PublishingAgent])
+], fingerprint_keys=["content_plan"])
+
+# A hot-reloaded agent may have new prompts, so its stage's version must be recomputed
+agents.add_reload_listener(CONTENT_PIPELINE.refresh_versions)
+
+checkpoints = CheckpointStore(store)
+
+# Stage state shown in the status file for each pipeline event
+STAGE_STATES = {"started": "processing", "completed": "completed", "resumed": "completed", "failed": "error"}
+
+metrics = get_metrics()
+stage_duration = metrics.histogram(
+    "pipeline_stage_duration_seconds", "Wall-clock time of pipeline stages", ["stage"]
+)
+stage_failures = metrics.counter("pipeline_stage_failures_total", "Pipeline stage failures", ["stage"])
+stage_usage_total = metrics.counter(
+    "pipeline_stage_usage_total", "LLM calls, tokens and bytes used by pipeline stages", ["stage", "kind"]
+)
+pipeline_runs = metrics.counter("pipeline_runs_total", "Finished pipeline runs", ["status"])
+pipeline_duration = metrics.histogram("pipeline_duration_seconds", "Wall-clock time of whole pipeline runs")
+
+# Stage transitions are pushed to dashboards subscribed to /events
+events = get_event_bus()
+
+# Index behind /list-content
+catalogue = get_catalogue()
+
+# Pre-rendered pages behind /content/{content_id}
+views = get_article_views()
+
+
+async def refresh_view(content_id: str):
+    """Materialise the article page of a finished pipeline; a rendering failure does not fail the run."""
+    try:
+        await asyncio.to_thread(views.materialise, content_id)
+    except Exception as e:
+        print(f"Error rendering view for {content_id}: {e}")
+
+
+async def run_content_pipeline(content_id: str) -> str:
+    """
+    Run the content pipeline for one content plan, record and return its status.
+    
+    Stages checkpointed by an earlier run are reused when their inputs and
+    code are unchanged, so an interrupted pipeline resumes from the first
+    incomplete stage and a rebuild only recomputes what changed.
+    
+    The status file is rewritten on every stage transition, so it always shows
+    which stages are running and how long and how much each finished one took.
+    """
+    status = {
+        "content_id": content_id,
+        "status": "processing",
+        "started_at": time.time(),
+        "stages": {stage: "pending" for stage in PIPELINE_STAGES},
+        "stage_details": {stage: {} for stage in PIPELINE_STAGES},
+        "usage": {}
+    }
+    # Stage events can overlap; writing the status in order keeps an older snapshot from landing last
+    status_lock = asyncio.Lock()
+
+    async def save_status():
+        async with status_lock:
+            await store.aput(f"status_{content_id}.json", status)
+
+    try:
+        # The stored page would show the previous run's status; pages are rendered live until this run ends
+        await asyncio.to_thread(views.invalidate, content_id)
+
+        # Get the content plan
+        context = await load_context(content_id)
+        completed = await asyncio.to_thread(checkpoints.load, content_id, CONTENT_PIPELINE, context)
+        if completed:
+            print(f"Resuming pipeline for {content_id}, reusing: {', '.join(completed)}")
+        status["resumed_stages"] = list(completed)
+
+        async def on_stage_event(event: str, stage: str, details: Dict[str, Any]):
+            # Commit a checkpoint as soon as a stage's artifact is stored
+            if event == "completed":
+                artifact = CONTENT_PIPELINE.stages[stage].artifact_path(context)
+                await asyncio.to_thread(checkpoints.commit, content_id, stage, artifact,
+                                        {"fingerprint": details["fingerprint"]})
+                stage_duration.observe(details["duration_seconds"], stage=stage)
+            elif event == "failed":
+                stage_failures.inc(stage=stage)
+
+            status["stages"][stage] = STAGE_STATES[event]
+            status["stage_details"][stage] = {
+                key: value for key, value in details.items() if key != "fingerprint"
+            }
+            if event == "resumed":
+                status["stage_details"][stage]["resumed"] = True
+            if event == "started":
+                await asyncio.to_thread(catalogue.update, content_id, current_stage=stage)
+            elif stage == "classification" and event in ("completed", "resumed"):
+                classification = await store.aget_json(CONTENT_PIPELINE.stages[stage].artifact_path(context))
+                await asyncio.to_thread(catalogue.update, content_id,
+                                        content_type=classification.get("content_type", ""))
+            events.publish("stage", content_id, stage=stage, state=STAGE_STATES[event],
+                           duration_seconds=details.get("duration_seconds"), error=details.get("error"))
+            for key, value in details.get("usage", {}).items():
+                stage_usage_total.inc(value, stage=stage, kind=key)
+                status["usage"][key] = status["usage"].get(key, 0) + value
+            await save_status()
+
+        run = await CONTENT_PIPELINE.run(context, listener=on_stage_event, completed=completed)
+
+        # Update pipeline status
+        status.update({
+            "status": "completed",
+            "finished_at": run.finished_at,
+            "duration_seconds": run.duration
+        })
+        await save_status()
+        events.publish("status", content_id, status="completed", duration_seconds=run.duration)
+        await asyncio.to_thread(catalogue.update, content_id, status="completed", current_stage=None,
+                                duration_seconds=run.duration, error=None)
+        await refresh_view(content_id)
+        pipeline_runs.inc(status="completed")
+        pipeline_duration.observe(run.duration)
+        return "completed"
+
+    except Exception as e:
+        # On error, save the error status; per-stage details show where it stopped
+        status.update({
+            "status": "error",
+            "error": str(e),
+            "finished_at": time.time(),
+            "duration_seconds": time.time() - status["started_at"]
+        })
+        await save_status()
+        events.publish("status", content_id, status="error", error=str(e))
+        await asyncio.to_thread(catalogue.update, content_id, status="error", current_stage=None, error=str(e))
+        await refresh_view(content_id)
+        pipeline_runs.inc(status="error")
+
+        print(f"Error in content pipeline for {content_id}: {e}")
+        return "error"
+
+
+async def load_context(content_id: str) -> Dict[str, Any]:
+    """Build the pipeline context for a stored content plan."""
+    content_plan = await store.aget_json(f"content_plans/{content_id}.json")
+    if content_plan is None:
+        raise FileNotFoundError(f"No content plan for {content_id}")
+    return {"content_id": content_id, "content_plan": content_plan}
+
+
+def list_stored_content() -> List[str]:
+    """Return the content_ids of every stored content plan."""
+    return [key[len("content_plans/"):-len(".json")] for key in store.list("content_plans/") if key.endswith(".json")]
+
+
+async def mark_queued(content_id: str, job_id: int):
+    """Write the initial "processing" status for a newly queued pipeline."""
+    status = {
+        "content_id": content_id,
+        "status": "processing",
+        "job_id": job_id,
+        "stages": {stage: "pending" for stage in PIPELINE_STAGES}
+    }
+    await store.aput(f"status_{content_id}.json", status)
+    await asyncio.to_thread(views.invalidate, content_id)
+    events.publish("status", content_id, status="processing", job_id=job_id)
+    await asyncio.to_thread(catalogue.update, content_id, status="processing", current_stage=None, error=None)
+
+
+def _read_statuses(content_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch the status files of many content items in one batched read."""
+    statuses = {}
+    found = store.get_many(f"status_{content_id}.json" for content_id in content_ids)
+    for key, data in found.items():
+        if data is None:
+            continue
+        try:
+            statuses[key[len("status_"):-len(".json")]] = json.loads(data)
+        except ValueError as e:
+            print(f"Error reading {key}: {e}")
+    return statuses
+
+
+def find_pending_content() -> List[str]:
+    """Return stored content_ids whose pipeline has not completed."""
+    content_ids = list_stored_content()
+    statuses = _read_statuses(content_ids)
+    return [content_id for content_id in content_ids
+            if statuses.get(content_id, {}).get("status") != "completed"]
+
+
+def find_interrupted_pipelines() -> List[str]:
+    """Return content_ids whose status was left at "processing" by a process that died."""
+    stored = set(list_stored_content())
+    status_ids = [key[len("status_"):-len(".json")] for key in store.list("status_") if key.endswith(".json")]
+    statuses = _read_statuses(status_ids)
+    return [content_id for content_id, status in statuses.items()
+            if status.get("status") == "processing" and content_id in stored]
@@ -0,0 +1,245 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable
+from dotenv import load_dotenv
+from .catalogue import ContentCatalogue, get_catalogue
+
+# Load environment variables
+load_dotenv()
+
+
+class Subscription:
+    """One listener's queue of events, optionally limited to one content item."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, content_id: Optional[str], max_queued: int):
+        self.loop = loop
+        self.content_id = content_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self.dropped = 0
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        return self.content_id is None or event.get("content_id") in (None, self.content_id)
+
+    def _put(self, event: Dict[str, Any]):
+        # A slow client loses its oldest events rather than holding memory for them
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class EventBus:
+    """In-process publish/subscribe for pipeline status changes.
+
+    Publishing never blocks: every subscriber has a bounded queue, and events
+    are handed to it on the subscriber's event loop, so publish() may be called
+    from any thread. Recent events are kept so that a client reconnecting with
+    Last-Event-ID can catch up.
+    """
+
+    def __init__(self, max_queued: int = 100, history: int = 500):
+        """
+        Initialize the event bus.
+
+        Args:
+            max_queued: Events buffered per subscriber before the oldest is dropped
+            history: Recent events kept for replay to reconnecting clients
+        """
+        self.max_queued = max_queued
+        self._subscriptions: List[Subscription] = []
+        self._history = deque(maxlen=history)
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[int], None]] = []
+
+    def publish(self, event_type: str, content_id: Optional[str] = None, **data: Any) -> Dict[str, Any]:
+        """Send an event to every matching subscriber."""
+        with self._lock:
+            event = {"id": self._next_id, "type": event_type, "content_id": content_id,
+                     "time": time.time(), **data}
+            self._next_id += 1
+            self._history.append(event)
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            if subscription.wants(event):
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription._put, event)
+                except RuntimeError:
+                    # The subscriber's loop is closed; it will be removed on unsubscribe
+                    pass
+        return event
+
+    def subscribe(self, content_id: Optional[str] = None, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Start receiving events on the running event loop.
+
+        Args:
+            content_id: Only receive events for this content item (and global ones)
+            last_event_id: Replay buffered events published after this id
+        """
+        subscription = Subscription(asyncio.get_running_loop(), content_id, self.max_queued)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event["id"] > last_event_id and subscription.wants(event):
+                        subscription._put(event)
+            self._subscriptions.append(subscription)
+            count = len(self._subscriptions)
+        self._notify(count)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.remove(subscription)
+            count = len(self._subscriptions)
+        self._notify(count)
+
+    def add_subscriber_listener(self, listener: Callable[[int], None]):
+        """Call listener with the number of subscribers whenever it changes; it may run on any thread."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_subscriber_listener(self, listener: Callable[[int], None]):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify(self, count: int):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(count)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscriptions),
+                "published": self._next_id - 1,
+                "dropped": sum(s.dropped for s in self._subscriptions)
+            }
+
+
+class CatalogueRelay:
+    """Republishes status changes made by other processes on this process's event bus.
+
+    The bus only reaches subscribers in the process that publishes, but
+    pipelines also run in other uvicorn workers and in process_batch.py.
+    They all record stage and status changes in the shared catalogue, so each
+    API process polls it for rows last changed by another process and turns
+    them into the same events its own pipelines publish. It only polls while
+    the bus has subscribers, so an idle dashboard costs nothing.
+    """
+
+    def __init__(self, bus: Optional[EventBus] = None, catalogue: Optional[ContentCatalogue] = None,
+                 interval: Optional[float] = None):
+        """
+        Initialize the relay.
+
+        Args:
+            bus: Event bus to publish on
+            catalogue: Catalogue shared with the other processes
+            interval: Seconds between polls of the catalogue
+        """
+        self.bus = bus or get_event_bus()
+        self.catalogue = catalogue or get_catalogue()
+        self.interval = interval or float(os.environ.get("EVENTS_RELAY_INTERVAL", "2"))
+        self._since = time.time()
+        # Rows read within the last `overlap` seconds; a write can commit after a later-stamped one,
+        # so each poll looks back that far and skips rows it has already relayed
+        self.overlap = 5.0
+        self._relayed: Dict[str, float] = {}
+        # Changes made while nobody listened are relayed only if a client subscribes within this many seconds
+        self.resume_lookback = 30.0
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._active: Optional[asyncio.Event] = None
+
+    def _publish(self, row: Dict[str, Any]):
+        if row["status"] == "pending" and row["current_stage"] is None:
+            self.bus.publish("content_added", content_ids=[row["content_id"]])
+        elif row["status"] == "processing" and row["current_stage"]:
+            self.bus.publish("stage", row["content_id"], stage=row["current_stage"], state="processing")
+        else:
+            self.bus.publish("status", row["content_id"], status=row["status"],
+                             duration_seconds=row["duration_seconds"], error=row["error"])
+
+    def poll(self) -> int:
+        """Publish events for changes made elsewhere since the last poll; returns how many."""
+        published = 0
+        cursor = [self._since - self.overlap, ""]
+        while True:
+            rows = self.catalogue.changes_since(cursor)
+            for row in rows:
+                cursor = [row["updated_at"], row["content_id"]]
+                self._since = max(self._since, row["updated_at"])
+                if self._relayed.get(row["content_id"]) == row["updated_at"]:
+                    continue
+                self._relayed[row["content_id"]] = row["updated_at"]
+                if row["updated_by"] != self.catalogue.writer():
+                    self._publish(row)
+                    published += 1
+            if len(rows) < 500:
+                break
+        self._relayed = {content_id: updated_at for content_id, updated_at in self._relayed.items()
+                         if updated_at >= self._since - self.overlap}
+        return published
+
+    def _on_subscribers(self, count: int):
+        try:
+            self._loop.call_soon_threadsafe(self._set_active, count > 0)
+        except RuntimeError:
+            # The relay's loop is closed
+            pass
+
+    def _set_active(self, active: bool):
+        if active:
+            self._active.set()
+        else:
+            self._active.clear()
+
+    async def run(self):
+        """Poll while the bus has subscribers, until cancelled; a failed poll is retried on the next interval."""
+        while True:
+            if not self._active.is_set():
+                await self._active.wait()
+                self._since = max(self._since, time.time() - self.resume_lookback)
+            try:
+                await asyncio.to_thread(self.poll)
+            except Exception as e:
+                print(f"[Events] Could not read catalogue changes: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._active = asyncio.Event()
+            if self.bus.stats()["subscribers"]:
+                self._active.set()
+            self.bus.add_subscriber_listener(self._on_subscribers)
+            self._task = self._loop.create_task(self.run())
+
+    async def stop(self):
+        self.bus.remove_subscriber_listener(self._on_subscribers)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_event_bus: Optional[EventBus] = None
+
+def get_event_bus() -> EventBus:
+    """Return the process-wide event bus."""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus()
+    return _event_bus
@@ -0,0 +1,148 @@
+import os
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+from dotenv import load_dotenv
+from .metrics import get_metrics
+
+# Load environment variables
+load_dotenv()
+
+
+class _HostState:
+    """Politeness bookkeeping for one host."""
+
+    def __init__(self, connections: int):
+        self.semaphore = asyncio.Semaphore(connections)
+        self.next_start = 0.0
+
+
+class PoliteFetcher:
+    """Shared async HTTP client for polling feeds, fetching articles and research searches.
+
+    Requests to different hosts run concurrently, so a polling cycle takes
+    about as long as its slowest host. Each host gets at most
+    per_host_connections requests in flight and a gap of host_interval
+    seconds between request starts (longer if it answers with Retry-After),
+    and max_concurrency caps the requests in flight across all hosts.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, per_host_connections: Optional[int] = None,
+                 host_interval: Optional[float] = None, timeout: Optional[float] = None):
+        """
+        Initialize the fetcher.
+
+        Args:
+            max_concurrency: Maximum number of requests in flight across all hosts
+            per_host_connections: Maximum number of requests in flight to one host
+            host_interval: Minimum seconds between the starts of two requests to one host
+            timeout: Per-request timeout in seconds
+        """
+        self.max_concurrency = max_concurrency or int(os.environ.get("FEED_MAX_CONCURRENCY", "32"))
+        self.per_host_connections = per_host_connections or int(os.environ.get("FEED_PER_HOST_CONNECTIONS", "2"))
+        self.host_interval = (host_interval if host_interval is not None
+                              else float(os.environ.get("FEED_HOST_INTERVAL", "1.0")))
+        self.timeout = timeout or float(os.environ.get("FEED_TIMEOUT", "20"))
+        self.max_retry_after = 300.0
+
+        self.bytes_fetched = get_metrics().counter(
+            "web_fetched_bytes_total", "Bytes downloaded by the web monitor and research agent", ["kind"]
+        )
+
+        # The HTTP session, semaphores and host states are bound to the event loop that created them
+        self._session: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, _HostState] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = set()
+
+    def _ensure_session(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP session for the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._loop is not loop or self._session.is_closed:
+            if self._session is not None and not self._session.is_closed:
+                self._close_replaced(self._session, self._loop)
+            self._session = httpx.AsyncClient(
+                headers={"User-Agent": "Mozilla/5.0"},
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._hosts = {}
+            self._loop = loop
+        return self._session
+
+    def _close_replaced(self, session: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+        """Close a session left behind by another event loop so its connection pool is not leaked."""
+        async def close():
+            try:
+                await session.aclose()
+            except RuntimeError:
+                # Its loop has ended; the sockets are already shut when the pool reports the closed loop
+                pass
+
+        if loop is not None and loop.is_running() and loop is not asyncio.get_running_loop():
+            asyncio.run_coroutine_threadsafe(close(), loop)
+        else:
+            task = asyncio.get_running_loop().create_task(close())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    def _host(self, url: str) -> _HostState:
+        host = (urlsplit(url).hostname or "").lower()
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(self.per_host_connections)
+        return self._hosts[host]
+
+    async def _wait_for_turn(self, state: _HostState):
+        """Reserve the host's next start slot and sleep until it comes."""
+        now = self._loop.time()
+        start = max(now, state.next_start)
+        state.next_start = start + self.host_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def _back_off(self, state: _HostState, response: httpx.Response):
+        """Keep away from a host that asked us to slow down."""
+        if response.status_code not in (429, 503):
+            return
+        try:
+            delay = float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            delay = self.host_interval * 10
+        state.next_start = max(state.next_start, self._loop.time() + min(delay, self.max_retry_after))
+
+    async def get(self, url: str, kind: str = "article", headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """GET a URL, waiting for the host's turn and a free slot in the global budget."""
+        session = self._ensure_session()
+        state = self._host(url)
+
+        # Queue on the host first, so requests waiting for a busy host do not hold global slots;
+        # the start slot is reserved only once a global slot is free, so waiting never bunches requests
+        async with state.semaphore, self._semaphore:
+            await self._wait_for_turn(state)
+            response = await session.get(url, headers=headers)
+            self._back_off(state, response)
+        self.bytes_fetched.inc(len(response.content), kind=kind)
+        return response
+
+    async def aclose(self):
+        """Close the underlying HTTP session."""
+        if self._session is not None and not self._session.is_closed:
+            await self._session.aclose()
+        self._session = None
+
+
+_polite_fetcher: Optional[PoliteFetcher] = None
+
+def get_polite_fetcher() -> PoliteFetcher:
+    """Return the process-wide feed and article fetcher."""
+    global _polite_fetcher
+    if _polite_fetcher is None:
+        _polite_fetcher = PoliteFetcher()
+    return _polite_fetcher
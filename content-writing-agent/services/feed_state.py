@@ -0,0 +1,68 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+class FeedStateStore:
+    """What the web monitor remembers about each feed between polls.
+
+    Per feed URL it keeps the validators for conditional requests (ETag,
+    Last-Modified), a hash of the last body for servers that ignore them, and
+    the high-water mark: the publish time of the newest entry handled and the
+    IDs of the entries at the head of the feed. Shared by all worker processes;
+    if two workers poll the same feed the later write wins, which only costs a
+    repeated look at entries the seen-URL index already settles.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the store.
+
+        Args:
+            path: Location of the SQLite database file
+        """
+        self.path = path or os.environ.get("FEED_STATE_PATH", "data/feed_state.sqlite3")
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS feed_state (
+                url TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def get(self, url: str) -> Dict[str, Any]:
+        """Return the stored state of a feed, or an empty dict for a feed never polled."""
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM feed_state WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def put(self, url: str, state: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_state (url, state, updated_at) VALUES (?, ?, ?)",
+                (url, json.dumps(state), time.time())
+            )
+
+
+_feed_state_store: Optional[FeedStateStore] = None
+
+def get_feed_state_store() -> FeedStateStore:
+    """Return the process-wide feed state store."""
+    global _feed_state_store
+    if _feed_state_store is None:
+        _feed_state_store = FeedStateStore()
+    return _feed_state_store
@@ -0,0 +1,180 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from dotenv import load_dotenv
+from .inference_client import get_inference_client
+from .resilience import get_resilient_caller
+
+# Load environment variables
+load_dotenv()
+
+class InferenceBackend:
+    """Interface for anything that can turn a prompt into a completion."""
+
+    name = "base"
+
+    def is_available(self) -> bool:
+        """Return True if the backend can serve requests right now."""
+        return True
+
+    async def generate(self, model_id: str, prompt: str, parameters: Dict[str, Any],
+                       timeout: Optional[float] = None) -> str:
+        """Generate a completion for a prompt - to be implemented by subclasses."""
+        raise NotImplementedError
+
+    async def generate_batch(self, model_id: str, prompts: List[str], parameters: Dict[str, Any],
+                             timeout: Optional[float] = None) -> List[str]:
+        """Generate completions for several prompts; backends may override with a real batch."""
+        return list(await asyncio.gather(
+            *(self.generate(model_id, prompt, parameters, timeout=timeout) for prompt in prompts)
+        ))
+
+
+class RemoteHTTPBackend(InferenceBackend):
+    """Backend that calls the hosted Hugging Face inference API.
+
+    Calls go through a per-model ResilientCaller, so transient errors are
+    retried with backoff and an unhealthy model fails fast.
+    """
+
+    name = "remote"
+
+    def __init__(self):
+        self.client = get_inference_client()
+
+    def is_available(self) -> bool:
+        return bool(self.client.api_token)
+
+    async def generate(self, model_id: str, prompt: str, parameters: Dict[str, Any],
+                       timeout: Optional[float] = None) -> str:
+        caller = get_resilient_caller(model_id)
+        return await caller.call(lambda: self.client.generate(model_id, prompt, parameters, timeout=timeout))
+
+    async def generate_batch(self, model_id: str, prompts: List[str], parameters: Dict[str, Any],
+                             timeout: Optional[float] = None) -> List[str]:
+        if len(prompts) == 1:
+            return [await self.generate(model_id, prompts[0], parameters, timeout=timeout)]
+        caller = get_resilient_caller(model_id)
+        return await caller.call(lambda: self.client.generate_batch(model_id, prompts, parameters, timeout=timeout))
+
+
+class LocalTransformersBackend(InferenceBackend):
+    """Backend that runs models in-process on CPU with transformers.
+
+    Each model is loaded at most once per process, on first use, and shared by
+    every agent that asks for it. Generation runs on a small dedicated thread
+    pool so it never blocks the event loop.
+    """
+
+    name = "local"
+
+    # Loaded (model, tokenizer, is_encoder_decoder) tuples, keyed by model id
+    _models: Dict[str, Any] = {}
+    _load_lock = threading.Lock()
+
+    def __init__(self, quantize: Optional[bool] = None, num_threads: Optional[int] = None,
+                 max_workers: Optional[int] = None):
+        """
+        Initialize the local backend.
+
+        Args:
+            quantize: Apply dynamic int8 quantisation to Linear layers
+            num_threads: Number of intra-op threads torch may use
+            max_workers: Number of generations that may run at once
+        """
+        self.quantize = quantize if quantize is not None else \
+            os.environ.get("LOCAL_QUANTIZE", "true").lower() == "true"
+        self.num_threads = num_threads or int(os.environ.get("LOCAL_NUM_THREADS", "4"))
+        self.max_workers = max_workers or int(os.environ.get("LOCAL_MAX_WORKERS", "1"))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="local-inference")
+
+    def _load(self, model_id: str):
+        """Load a model and tokenizer once per process."""
+        if model_id in self._models:
+            return self._models[model_id]
+
+        with self._load_lock:
+            if model_id in self._models:
+                return self._models[model_id]
+
+            # Heavy imports are deferred until a local model is actually needed
+            import torch
+            from transformers import AutoConfig, AutoTokenizer, AutoModelForCausalLM, AutoModelForSeq2SeqLM
+
+            torch.set_num_threads(self.num_threads)
+            print(f"[Local Backend] Loading {model_id} (quantize={self.quantize}, threads={self.num_threads})")
+
+            config = AutoConfig.from_pretrained(model_id)
+            is_encoder_decoder = bool(getattr(config, "is_encoder_decoder", False))
+            model_class = AutoModelForSeq2SeqLM if is_encoder_decoder else AutoModelForCausalLM
+
+            tokenizer = AutoTokenizer.from_pretrained(model_id)
+            model = model_class.from_pretrained(model_id)
+            if self.quantize:
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            model.eval()
+
+            self._models[model_id] = (model, tokenizer, is_encoder_decoder)
+            return self._models[model_id]
+
+    def _generate_sync(self, model_id: str, prompts: List[str], parameters: Dict[str, Any]) -> List[str]:
+        """Run generation for a batch of prompts on the calling thread."""
+        import torch
+
+        model, tokenizer, is_encoder_decoder = self._load(model_id)
+        if tokenizer.pad_token_id is None and tokenizer.eos_token_id is not None:
+            tokenizer.pad_token = tokenizer.eos_token
+        # Decoder-only models must be left-padded so completions follow the prompt directly
+        tokenizer.padding_side = "right" if is_encoder_decoder else "left"
+        inputs = tokenizer(prompts, return_tensors="pt", truncation=True, padding=True)
+
+        temperature = parameters.get("temperature", 0.0)
+        generate_kwargs = {
+            "max_new_tokens": parameters.get("max_new_tokens", 512),
+            "do_sample": temperature > 0,
+            "pad_token_id": tokenizer.pad_token_id
+        }
+        if temperature > 0:
+            generate_kwargs["temperature"] = temperature
+            generate_kwargs["top_p"] = parameters.get("top_p", 1.0)
+
+        with torch.no_grad():
+            output = model.generate(**inputs, **generate_kwargs)
+
+        # Causal models return the prompt followed by the completion
+        if not is_encoder_decoder:
+            output = output[:, inputs["input_ids"].shape[1]:]
+        return [text.strip() for text in tokenizer.batch_decode(output, skip_special_tokens=True)]
+
+    async def generate(self, model_id: str, prompt: str, parameters: Dict[str, Any],
+                       timeout: Optional[float] = None) -> str:
+        return (await self.generate_batch(model_id, [prompt], parameters, timeout=timeout))[0]
+
+    async def generate_batch(self, model_id: str, prompts: List[str], parameters: Dict[str, Any],
+                             timeout: Optional[float] = None) -> List[str]:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._generate_sync, model_id, prompts, parameters)
+        return await asyncio.wait_for(future, timeout=timeout)
+
+
+_backends: Dict[str, InferenceBackend] = {}
+
+def get_backend(model_id: str) -> InferenceBackend:
+    """
+    Pick the backend that should serve a model.
+
+    INFERENCE_BACKEND selects "remote" (default), "local", or "auto". In auto
+    mode, models listed in LOCAL_MODELS run locally and all others remotely.
+    """
+    mode = os.environ.get("INFERENCE_BACKEND", "remote").lower()
+    if mode == "auto":
+        local_models = [m.strip() for m in os.environ.get("LOCAL_MODELS", "").split(",") if m.strip()]
+        mode = "local" if model_id in local_models else "remote"
+    mode = "local" if mode == "local" else "remote"
+
+    if mode not in _backends:
+        _backends[mode] = LocalTransformersBackend() if mode == "local" else RemoteHTTPBackend()
+    return _backends[mode]
@@ -0,0 +1,142 @@
+import os
+import asyncio
+from typing import Dict, Any, List, Optional
+import httpx
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class InferenceClient:
+    """Shared async client for the Hugging Face inference API.
+
+    One client is shared by every agent in the process so that HTTP connections
+    are kept alive and reused, and so that the number of in-flight model calls
+    is capped across all pipelines running at the same time.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, max_connections: Optional[int] = None,
+                 max_concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        Initialize the inference client.
+
+        Args:
+            base_url: Base URL of the inference API (model id is appended)
+            max_connections: Size of the keep-alive connection pool
+            max_concurrency: Maximum number of model calls in flight at once
+            timeout: Default per-call timeout in seconds
+        """
+        self.base_url = (base_url or os.environ.get(
+            "HF_INFERENCE_URL", "https://api-inference.huggingface.co/models")).rstrip("/")
+        self.max_connections = max_connections or int(os.environ.get("HF_MAX_CONNECTIONS", "20"))
+        self.max_concurrency = max_concurrency or int(os.environ.get("HF_MAX_CONCURRENCY", "8"))
+        self.timeout = timeout or float(os.environ.get("HF_TIMEOUT", "60"))
+        self.api_token = os.environ.get("HUGGINGFACE_API_KEY")
+        # Model loading (503) is retried with the server's estimated_time instead of blocking
+        self.wait_for_model = os.environ.get("HF_WAIT_FOR_MODEL", "false").lower() == "true"
+
+        # The HTTP session and semaphore are bound to the event loop that created them
+        self._session: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = set()
+
+    def _ensure_session(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP session for the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._loop is not loop or self._session.is_closed:
+            if self._session is not None and not self._session.is_closed:
+                self._close_replaced(self._session, self._loop)
+            headers = {}
+            if self.api_token:
+                headers["Authorization"] = f"Bearer {self.api_token}"
+            self._session = httpx.AsyncClient(
+                headers=headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session
+
+    def _close_replaced(self, session: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+        """Close a session left behind by another event loop so its connection pool is not leaked."""
+        async def close():
+            try:
+                await session.aclose()
+            except RuntimeError:
+                # Its loop has ended; the sockets are already shut when the pool reports the closed loop
+                pass
+
+        if loop is not None and loop.is_running() and loop is not asyncio.get_running_loop():
+            asyncio.run_coroutine_threadsafe(close(), loop)
+        else:
+            task = asyncio.get_running_loop().create_task(close())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    def model_url(self, model_id: str) -> str:
+        """Return the inference endpoint for a model."""
+        return f"{self.base_url}/{model_id}"
+
+    async def _post(self, model_id: str, inputs: Any, parameters: Dict[str, Any],
+                    timeout: Optional[float] = None) -> Any:
+        """Send one inference request through the pooled session and return the JSON body."""
+        session = self._ensure_session()
+        payload = {
+            "inputs": inputs,
+            # Ask the endpoint not to echo the prompt back in generated_text
+            "parameters": {**parameters, "return_full_text": False},
+            "options": {"wait_for_model": self.wait_for_model}
+        }
+
+        async with self._semaphore:
+            response = await session.post(
+                self.model_url(model_id),
+                json=payload,
+                timeout=timeout or self.timeout
+            )
+        response.raise_for_status()
+        return response.json()
+
+    async def generate(self, model_id: str, inputs: str, parameters: Dict[str, Any],
+                       timeout: Optional[float] = None) -> str:
+        """Run a text-generation request and return only the generated text."""
+        result = await self._post(model_id, inputs, parameters, timeout=timeout)
+        if isinstance(result, list) and len(result) > 0:
+            return result[0].get("generated_text", str(result[0]))
+        return str(result)
+
+    async def generate_batch(self, model_id: str, inputs: List[str], parameters: Dict[str, Any],
+                             timeout: Optional[float] = None) -> List[str]:
+        """Run several prompts for the same model in a single request."""
+        result = await self._post(model_id, inputs, parameters, timeout=timeout)
+        if not isinstance(result, list) or len(result) != len(inputs):
+            raise ValueError(f"Expected {len(inputs)} generations, got: {str(result)[:200]}")
+
+        # Each item is either a generation dict or a list holding one
+        outputs = []
+        for item in result:
+            if isinstance(item, list):
+                item = item[0] if item else {}
+            outputs.append(item.get("generated_text", str(item)) if isinstance(item, dict) else str(item))
+        return outputs
+
+    async def aclose(self):
+        """Close the underlying HTTP session."""
+        if self._session is not None and not self._session.is_closed:
+            await self._session.aclose()
+        self._session = None
+
+
+_inference_client: Optional[InferenceClient] = None
+
+def get_inference_client() -> InferenceClient:
+    """Return the process-wide inference client."""
+    global _inference_client
+    if _inference_client is None:
+        _inference_client = InferenceClient()
+    return _inference_client
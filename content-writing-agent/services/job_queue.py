@@ -0,0 +1,474 @@
+import os
+import time
+import socket
+import sqlite3
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, Any, List, Awaitable, Callable, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+class QueueFullError(Exception):
+    """Raised when the queue is too deep to accept more work."""
+
+
+class JobQueue:
+    """Persistent, prioritised job queue backed by SQLite.
+
+    Jobs survive process restarts. Claiming a job is a single atomic
+    transaction, so several worker processes can share one queue file.
+    Higher priority values are claimed first, oldest first within a priority.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_depth: Optional[int] = None):
+        """
+        Initialize the job queue.
+
+        Args:
+            path: Location of the SQLite database file
+            max_depth: Queued jobs above which new work is rejected
+        """
+        self.path = path or os.environ.get("JOB_QUEUE_PATH", "data/jobs.sqlite3")
+        self.max_depth = max_depth or int(os.environ.get("JOB_QUEUE_MAX_DEPTH", "100"))
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_id TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                owner TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                enqueued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority DESC, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_content ON jobs (content_id, status)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS batches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                concurrency INTEGER,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS batch_items (
+                batch_id INTEGER NOT NULL,
+                content_id TEXT NOT NULL,
+                job_id INTEGER NOT NULL,
+                PRIMARY KEY (batch_id, content_id)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_batch_items_job ON batch_items (job_id)")
+        return conn
+
+    def _enqueue_locked(self, content_id: str, priority: int, force: bool) -> Dict[str, Any]:
+        """Insert or find a job; the caller holds the lock inside a transaction."""
+        existing = self._conn.execute(
+            "SELECT * FROM jobs WHERE content_id = ? AND status IN ('queued', 'running')",
+            (content_id,)
+        ).fetchone()
+        if existing is not None:
+            return dict(existing)
+
+        depth = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        if depth >= self.max_depth and not force:
+            raise QueueFullError(f"Job queue is full ({depth} queued)")
+
+        cursor = self._conn.execute(
+            "INSERT INTO jobs (content_id, priority, status, enqueued_at) VALUES (?, ?, 'queued', ?)",
+            (content_id, priority, time.time())
+        )
+        return dict(self._conn.execute("SELECT * FROM jobs WHERE id = ?", (cursor.lastrowid,)).fetchone())
+
+    def enqueue(self, content_id: str, priority: int = 0, force: bool = False) -> Dict[str, Any]:
+        """
+        Add a job, or return the existing job if one is already queued or running.
+
+        Raises:
+            QueueFullError: If the queue is at max_depth and force is False
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                job = self._enqueue_locked(content_id, priority, force)
+                self._conn.execute("COMMIT")
+                return job
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def enqueue_batch(self, content_ids: List[str], priority: int = 0,
+                      concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Queue many jobs as one batch.
+
+        A batch is admitted as a whole regardless of max_depth; instead, at most
+        concurrency of its jobs run at once across all workers, which leaves
+        capacity for interactive requests while a backlog drains.
+
+        Args:
+            content_ids: Content to process; duplicates are ignored
+            priority: Priority of the batch's jobs
+            concurrency: Maximum number of the batch's jobs running at once, or None for no limit
+
+        Returns:
+            The batch record with its id and the jobs it tracks
+        """
+        content_ids = list(dict.fromkeys(content_ids))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                batch_id = self._conn.execute(
+                    "INSERT INTO batches (concurrency, created_at) VALUES (?, ?)", (concurrency, time.time())
+                ).lastrowid
+                jobs = []
+                for content_id in content_ids:
+                    job = self._enqueue_locked(content_id, priority, True)
+                    self._conn.execute(
+                        "INSERT INTO batch_items (batch_id, content_id, job_id) VALUES (?, ?, ?)",
+                        (batch_id, content_id, job["id"])
+                    )
+                    jobs.append(job)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return {"batch_id": batch_id, "concurrency": concurrency, "jobs": jobs}
+
+    def claim(self, batch_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Atomically take the highest-priority queued job, or return None.
+
+        Jobs belonging to a batch that already has its maximum number of jobs
+        running are skipped.
+
+        Args:
+            batch_id: Only claim jobs of this batch, or None for any job
+        """
+        batch_filter = ""
+        params = ()
+        if batch_id is not None:
+            batch_filter = "AND EXISTS (SELECT 1 FROM batch_items bo WHERE bo.job_id = j.id AND bo.batch_id = ?)"
+            params = (batch_id,)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                job = self._conn.execute(f"""
+                    SELECT * FROM jobs j WHERE j.status = 'queued' {batch_filter} AND NOT EXISTS (
+                        SELECT 1 FROM batch_items bi JOIN batches b ON b.id = bi.batch_id
+                        WHERE bi.job_id = j.id AND b.concurrency IS NOT NULL AND b.concurrency <= (
+                            SELECT COUNT(*) FROM batch_items bj JOIN jobs r ON r.id = bj.job_id
+                            WHERE bj.batch_id = b.id AND r.status = 'running'
+                        )
+                    )
+                    ORDER BY j.priority DESC, j.id LIMIT 1
+                """, params).fetchone()
+                if job is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                now = time.time()
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, attempts = attempts + 1, started_at = ? "
+                    "WHERE id = ?",
+                    (self.owner, now, job["id"])
+                )
+                self._conn.execute("COMMIT")
+                claimed = dict(job)
+                claimed.update({"status": "running", "owner": self.owner, "started_at": now,
+                                "attempts": job["attempts"] + 1})
+                return claimed
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def finish(self, job_id: int, status: str, error: Optional[str] = None):
+        """Mark a job as completed or failed."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+    def release(self, job_id: int) -> bool:
+        """Put a job this process is running back in the queue, e.g. because its worker is stopping."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, started_at = NULL "
+                "WHERE id = ? AND status = 'running' AND owner = ?",
+                (job_id, self.owner)
+            )
+        return cursor.rowcount > 0
+
+    def requeue_orphaned(self) -> int:
+        """Put back jobs left 'running' by processes on this host that no longer exist."""
+        host = socket.gethostname()
+        requeued = 0
+        with self._lock:
+            rows = self._conn.execute("SELECT id, owner FROM jobs WHERE status = 'running'").fetchall()
+            for row in rows:
+                owner_host, _, pid = (row["owner"] or "").rpartition(":")
+                if owner_host == host and pid.isdigit() and self._process_alive(int(pid)):
+                    continue
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', owner = NULL, started_at = NULL WHERE id = ?",
+                    (row["id"],)
+                )
+                requeued += 1
+        return requeued
+
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        if pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def depth(self) -> int:
+        """Return the number of queued jobs."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Return job counts by status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the most recent jobs, optionally filtered by status."""
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+    def batch_progress(self, batch_id: int) -> Optional[Dict[str, Any]]:
+        """Return aggregate progress, throughput and per-item outcomes of a batch."""
+        with self._lock:
+            batch = self._conn.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+            if batch is None:
+                return None
+            rows = self._conn.execute("""
+                SELECT bi.content_id, j.id AS job_id, j.status, j.attempts, j.error,
+                       j.enqueued_at, j.started_at, j.finished_at
+                FROM batch_items bi JOIN jobs j ON j.id = bi.job_id
+                WHERE bi.batch_id = ? ORDER BY j.id
+            """, (batch_id,)).fetchall()
+
+        items = []
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        for row in rows:
+            item = dict(row)
+            if item["started_at"] and item["finished_at"]:
+                item["duration_seconds"] = item["finished_at"] - item["started_at"]
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+            items.append(item)
+
+        total = len(items)
+        done = counts["completed"] + counts["failed"]
+        finished_times = [item["finished_at"] for item in items if item["finished_at"]]
+        finished = done == total
+        elapsed = ((max(finished_times) if finished and finished_times else time.time())
+                   - batch["created_at"])
+        throughput = counts["completed"] / (elapsed / 60) if elapsed > 0 else 0.0
+        return {
+            "batch_id": batch_id,
+            "concurrency": batch["concurrency"],
+            "created_at": batch["created_at"],
+            "finished": finished,
+            "total": total,
+            "counts": counts,
+            "progress": done / total if total else 1.0,
+            "elapsed_seconds": elapsed,
+            "articles_per_minute": throughput,
+            "eta_seconds": (total - done) / (throughput / 60) if throughput and not finished else None,
+            "items": items
+        }
+
+    def list_batches(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return summaries of the most recent batches."""
+        with self._lock:
+            ids = [row["id"] for row in self._conn.execute(
+                "SELECT id FROM batches ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()]
+        summaries = []
+        for batch_id in ids:
+            progress = self.batch_progress(batch_id)
+            progress.pop("items")
+            summaries.append(progress)
+        return summaries
+
+
+class WorkerPool:
+    """Fixed pool of async workers draining a JobQueue.
+
+    Workers wake immediately when this process enqueues work and otherwise
+    poll, so jobs enqueued by other processes are picked up too. Jobs still
+    running when the pool stops go straight back to the queue.
+    """
+
+    def __init__(self, queue: JobQueue, handler: Callable[[str], Awaitable[str]],
+                 size: Optional[int] = None, poll_interval: Optional[float] = None,
+                 batch_id: Optional[int] = None):
+        """
+        Initialize the worker pool.
+
+        Args:
+            queue: Queue to drain
+            handler: Coroutine run for each job's content_id; returns "completed" or "error"
+            size: Number of concurrent workers
+            poll_interval: Seconds between polls when idle
+            batch_id: Only run jobs of this batch, or None for any job
+        """
+        self.queue = queue
+        self.handler = handler
+        self.size = size or int(os.environ.get("WORKER_POOL_SIZE", "2"))
+        self.poll_interval = poll_interval or float(os.environ.get("WORKER_POLL_INTERVAL", "1.0"))
+        self.batch_id = batch_id
+
+        self._workers: List[asyncio.Task] = []
+        # Claimed jobs not yet finished, keyed by job id
+        self._in_flight: Dict[int, Dict[str, Any]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+
+        # Metrics
+        self.started_at = time.time()
+        self.busy = 0
+        self.busy_seconds = 0.0
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self.recent_waits = deque(maxlen=200)
+
+    def start(self):
+        """Start the workers on the running event loop."""
+        if self._running:
+            return
+        self._running = True
+        self._wakeup = asyncio.Event()
+        self.started_at = time.time()
+        requeued = self.queue.requeue_orphaned()
+        if requeued:
+            print(f"[Worker Pool] Requeued {requeued} job(s) orphaned by a previous process")
+        self._workers = [asyncio.ensure_future(self._work(i)) for i in range(self.size)]
+
+    async def stop(self) -> int:
+        """Stop the workers and put the jobs they were running back in the queue.
+
+        Returns:
+            The number of jobs requeued
+        """
+        self._running = False
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        requeued = 0
+        for job_id in list(self._in_flight):
+            if await asyncio.to_thread(self.queue.release, job_id):
+                requeued += 1
+            self._in_flight.pop(job_id, None)
+        if requeued:
+            print(f"[Worker Pool] Requeued {requeued} unfinished job(s)")
+        return requeued
+
+    def notify(self):
+        """Wake idle workers because new work was enqueued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Claim a job on a worker thread, which may finish after stop() has cancelled its worker."""
+        job = self.queue.claim(self.batch_id)
+        if job is None:
+            return None
+        # Recorded before the check, so either stop() sees the job or this thread sees the stop
+        self._in_flight[job["id"]] = job
+        if not self._running:
+            self.queue.release(job["id"])
+            self._in_flight.pop(job["id"], None)
+            return None
+        return job
+
+    async def _work(self, index: int):
+        while self._running:
+            job = await asyncio.to_thread(self._claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.recent_waits.append(job["started_at"] - job["enqueued_at"])
+            self.busy += 1
+            started = time.monotonic()
+            print(f"[Worker {index}] Running job {job['id']} for content {job['content_id']}")
+            try:
+                status = await self.handler(job["content_id"])
+                error = None
+            except Exception as e:
+                status, error = "error", str(e)
+            finally:
+                self.busy -= 1
+                self.busy_seconds += time.monotonic() - started
+
+            if status == "completed":
+                self.jobs_completed += 1
+                await asyncio.to_thread(self.queue.finish, job["id"], "completed")
+            else:
+                self.jobs_failed += 1
+                await asyncio.to_thread(self.queue.finish, job["id"], "failed", error)
+            self._in_flight.pop(job["id"], None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, worker utilisation and wait-time metrics."""
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        waits = sorted(self.recent_waits)
+        return {
+            "queue_depth": self.queue.depth(),
+            "max_depth": self.queue.max_depth,
+            "jobs": self.queue.counts(),
+            "workers": self.size,
+            "busy_workers": self.busy,
+            "utilisation": min(self.busy_seconds / (elapsed * self.size), 1.0),
+            "jobs_completed": self.jobs_completed,
+            "jobs_failed": self.jobs_failed,
+            "avg_wait_seconds": sum(waits) / len(waits) if waits else 0.0,
+            "p95_wait_seconds": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0
+        }
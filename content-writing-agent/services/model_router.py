@@ -0,0 +1,195 @@
+import os
+import json
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional
+from dotenv import load_dotenv
+from .resilience import LatencyTracker
+
+# Load environment variables
+load_dotenv()
+
+LARGE_MODEL = "mistralai/Mistral-7B-Instruct-v0.2"
+SMALL_MODEL = "google/flan-t5-large"
+
+# Model tiers per "agent:task", most capable first. Later tiers are cheaper/faster
+# and are used when the earlier ones break their SLO. Routes that are not listed
+# use the agent's own model_name.
+DEFAULT_ROUTES = {
+    "content_classification:classify": {"models": [SMALL_MODEL]},
+    "publishing:metadata": {"models": [SMALL_MODEL]},
+    "publishing:linkedin": {"models": [LARGE_MODEL, SMALL_MODEL]},
+    "writing:article": {"models": [LARGE_MODEL, SMALL_MODEL], "p95_slo_seconds": 90}
+}
+
+
+class ModelStats:
+    """Live latency and error-rate observations for one model.
+
+    Observations older than max_age seconds are ignored, so a model that was
+    routed around because it broke its SLO becomes eligible again once its
+    bad samples age out.
+    """
+
+    def __init__(self, window: int = 100, max_age: float = 300):
+        self.samples = deque(maxlen=window)
+        self.max_age = max_age
+
+    def record(self, seconds: float, ok: bool):
+        self.samples.append((time.monotonic(), seconds, ok))
+
+    def _recent(self) -> List[tuple]:
+        cutoff = time.monotonic() - self.max_age
+        return [sample for sample in self.samples if sample[0] >= cutoff]
+
+    def count(self) -> int:
+        return len(self._recent())
+
+    def percentile(self, q: float) -> Optional[float]:
+        latency = LatencyTracker(len(self.samples) or 1)
+        for _, seconds, ok in self._recent():
+            if ok:
+                latency.record(seconds)
+        return latency.percentile(q)
+
+    def error_rate(self) -> float:
+        recent = self._recent()
+        if not recent:
+            return 0.0
+        return 1 - sum(1 for _, _, ok in recent if ok) / len(recent)
+
+
+class ModelRouter:
+    """Chooses a model for each (agent, task) pair from a routing table.
+
+    Every route lists model tiers in order of preference. The first tier whose
+    observed p95 latency and error rate are within the route's SLO is used;
+    if every tier is in breach, the last (cheapest) tier is used. If the
+    chosen tier fails a call or misses the SLO on it, the caller moves on to
+    the route's other tiers (see candidates).
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Initialize the router.
+
+        Args:
+            routes: Routing table, defaults to DEFAULT_ROUTES merged with the
+                JSON file named by MODEL_ROUTES_FILE
+        """
+        self.routes = dict(DEFAULT_ROUTES) if routes is None else dict(routes)
+        routes_file = os.environ.get("MODEL_ROUTES_FILE")
+        if routes is None and routes_file and os.path.exists(routes_file):
+            with open(routes_file, "r") as f:
+                self.routes.update(json.load(f))
+
+        self.default_p95_slo = float(os.environ.get("ROUTER_P95_SLO", "30"))
+        self.default_max_error_rate = float(os.environ.get("ROUTER_MAX_ERROR_RATE", "0.5"))
+        self.min_samples = int(os.environ.get("ROUTER_MIN_SAMPLES", "5"))
+        self.window_seconds = float(os.environ.get("ROUTER_WINDOW_SECONDS", "300"))
+
+        self.stats: Dict[str, ModelStats] = {}
+        self.decisions = deque(maxlen=500)
+
+    def _model_stats(self, model_id: str) -> ModelStats:
+        if model_id not in self.stats:
+            self.stats[model_id] = ModelStats(max_age=self.window_seconds)
+        return self.stats[model_id]
+
+    def _route(self, agent: str, task: str) -> Dict[str, Any]:
+        return self.routes.get(f"{agent}:{task}") or self.routes.get(agent) or {}
+
+    def models_for(self, agent: str, task: str, default_model: str) -> List[str]:
+        """Return the model tiers configured for an agent's task."""
+        route = self._route(agent, task)
+        return list(route["models"]) if route else [default_model]
+
+    def slo_for(self, agent: str, task: str) -> float:
+        """Return the route's p95 latency SLO in seconds."""
+        return self._route(agent, task).get("p95_slo_seconds", self.default_p95_slo)
+
+    def _breach(self, model_id: str, route: Dict[str, Any]) -> Optional[str]:
+        """Return why a model currently breaks the route's SLO, or None."""
+        stats = self.stats.get(model_id)
+        if stats is None or stats.count() < self.min_samples:
+            return None
+        p95 = stats.percentile(95)
+        slo = route.get("p95_slo_seconds", self.default_p95_slo)
+        if p95 is not None and p95 > slo:
+            return f"p95 {p95:.1f}s > {slo}s"
+        max_error_rate = route.get("max_error_rate", self.default_max_error_rate)
+        if stats.error_rate() > max_error_rate:
+            return f"error rate {stats.error_rate():.0%} > {max_error_rate:.0%}"
+        return None
+
+    def choose(self, agent: str, task: str, default_model: str) -> str:
+        """Pick the model that should serve this call, and log the decision."""
+        route = self._route(agent, task)
+        tiers = self.models_for(agent, task, default_model)
+
+        chosen, reasons = tiers[-1], []
+        for model_id in tiers:
+            breach = self._breach(model_id, route)
+            if breach is None:
+                chosen = model_id
+                break
+            reasons.append(f"{model_id}: {breach}")
+
+        reason = "; ".join(reasons) if reasons else "primary tier healthy"
+        self.decisions.append({
+            "time": time.time(),
+            "stage": agent,
+            "task": task,
+            "model": chosen,
+            "fallback": chosen != tiers[0],
+            "reason": reason
+        })
+        print(f"[Router] stage={agent} task={task} -> {chosen} ({reason})")
+        return chosen
+
+    def candidates(self, agent: str, task: str, default_model: str) -> List[str]:
+        """Return the models to try for a call: the chosen tier, then the route's other tiers in order."""
+        chosen = self.choose(agent, task, default_model)
+        return [chosen] + [model_id for model_id in self.models_for(agent, task, default_model)
+                           if model_id != chosen]
+
+    def record_fallback(self, agent: str, task: str, failed_model: str, next_model: str, reason: str):
+        """Log that a call moved on to another tier after its model failed it."""
+        self.decisions.append({
+            "time": time.time(),
+            "stage": agent,
+            "task": task,
+            "model": next_model,
+            "fallback": True,
+            "reason": f"{failed_model}: {reason}"
+        })
+        print(f"[Router] stage={agent} task={task} {failed_model} failed ({reason}), trying {next_model}")
+
+    def record(self, model_id: str, seconds: float, ok: bool):
+        """Record the outcome of a model call."""
+        self._model_stats(model_id).record(seconds, ok)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return live per-model statistics and recent routing decisions."""
+        return {
+            "models": {
+                model_id: {
+                    "p50_seconds": stats.percentile(50),
+                    "p95_seconds": stats.percentile(95),
+                    "error_rate": stats.error_rate(),
+                    "samples": stats.count()
+                }
+                for model_id, stats in self.stats.items()
+            },
+            "recent_decisions": list(self.decisions)[-20:]
+        }
+
+
+_router: Optional[ModelRouter] = None
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide model router."""
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
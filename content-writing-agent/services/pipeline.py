@@ -0,0 +1,222 @@
+import json
+import time
+import asyncio
+import hashlib
+import inspect
+from typing import Dict, Any, List, Awaitable, Callable, Iterable, Optional, Sequence
+from .metrics import stage_usage
+
+# A stage receives the shared run context and the outputs of the stages it depends on
+StageFunction = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]]
+
+# Called with (event, stage_name, details) as stages start, finish or fail
+StageListener = Callable[[str, str, Dict[str, Any]], Awaitable[None]]
+
+
+def code_version(*objects: Any) -> str:
+    """Hash the source of functions/classes so edits to code or prompts change a stage's version."""
+    digest = hashlib.sha256()
+    for obj in objects:
+        try:
+            digest.update(inspect.getsource(obj).encode("utf-8"))
+        except (OSError, TypeError):
+            digest.update(repr(obj).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class Stage:
+    """One node in a pipeline graph."""
+
+    def __init__(self, name: str, run: StageFunction, depends_on: Iterable[str] = (),
+                 artifact: Optional[str] = None, version: Optional[str] = None,
+                 sources: Iterable[Any] = ()):
+        """
+        Initialize a stage.
+
+        Args:
+            name: Unique stage name; also the key its output is passed under
+            run: Coroutine function taking (context, inputs) and returning the output
+            depends_on: Names of stages whose outputs this stage needs
+            artifact: Path template (formatted with the context) of the JSON file
+                holding the stage's output, used for checkpointing
+            version: Version of the stage's code and prompts; by default a hash of
+                the source of run and sources
+            sources: Further functions/classes whose code the stage's output depends on
+        """
+        self.name = name
+        self.run = run
+        self.depends_on = list(depends_on)
+        self.artifact = artifact
+        self.sources = list(sources)
+        self.fixed_version = version
+        self.refresh_version()
+
+    def refresh_version(self):
+        """Recompute the version from the current source files, e.g. after a hot reload."""
+        self.version = self.fixed_version or code_version(self.run, *self.sources)
+
+    def artifact_path(self, context: Dict[str, Any]) -> Optional[str]:
+        """Return where this stage's output is stored for a given run context."""
+        return self.artifact.format(**context) if self.artifact else None
+
+
+class PipelineRun:
+    """Outputs and timings of one pipeline execution."""
+
+    def __init__(self):
+        self.outputs: Dict[str, Any] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class PipelineGraph:
+    """Declarative stage graph that runs independent stages concurrently.
+
+    Every stage starts as soon as all of its dependencies have finished and
+    receives their outputs. If a stage fails, stages that have not started yet
+    are cancelled and the error is raised from run().
+    """
+
+    def __init__(self, stages: List[Stage], fingerprint_keys: Sequence[str] = ()):
+        """
+        Initialize the graph.
+
+        Args:
+            stages: The stages, in any order
+            fingerprint_keys: Context keys that are stage inputs, for fingerprinting
+        """
+        self.fingerprint_keys = list(fingerprint_keys)
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self._validate()
+
+    def _validate(self):
+        """Reject unknown dependencies and cycles."""
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+        self.order()
+
+    def order(self) -> List[str]:
+        """Return stage names in a valid execution order."""
+        ordered, visiting, done = [], set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    def downstream(self, names: Iterable[str]) -> List[str]:
+        """Return the given stages plus everything that depends on them, in order."""
+        affected = set(names)
+        for name in self.order():
+            if any(dep in affected for dep in self.stages[name].depends_on):
+                affected.add(name)
+        return [name for name in self.order() if name in affected]
+
+    def refresh_versions(self, *_):
+        """Recompute every stage's version from the current source files."""
+        for stage in self.stages.values():
+            stage.refresh_version()
+
+    def fingerprint(self, name: str, context: Dict[str, Any], inputs: Dict[str, Any]) -> str:
+        """Hash a stage's version together with everything it reads.
+
+        Two runs of a stage with the same fingerprint would do the same work,
+        so a stored output with a matching fingerprint can be reused.
+        """
+        material = json.dumps({
+            "stage": name,
+            "version": self.stages[name].version,
+            "context": {key: context.get(key) for key in self.fingerprint_keys},
+            "inputs": inputs
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def run(self, context: Dict[str, Any], listener: Optional[StageListener] = None,
+                  completed: Optional[Dict[str, Any]] = None) -> PipelineRun:
+        """
+        Execute the graph and return every stage's output and timing.
+
+        Args:
+            context: Shared values every stage receives
+            listener: Optional coroutine notified as stages start, finish or fail
+            completed: Outputs of stages finished by an earlier run; these stages
+                are not executed again
+        """
+        run = PipelineRun()
+        tasks: Dict[str, asyncio.Task] = {}
+        completed = completed or {}
+
+        async def execute(stage: Stage):
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+            inputs = {dep: run.outputs[dep] for dep in stage.depends_on}
+
+            if stage.name in completed:
+                run.outputs[stage.name] = completed[stage.name]
+                run.timings[stage.name] = {"resumed": True}
+                if listener:
+                    await listener("resumed", stage.name, {})
+                return completed[stage.name]
+
+            fingerprint = self.fingerprint(stage.name, context, inputs)
+            started = time.time()
+            run.timings[stage.name] = {"started_at": started}
+            if listener:
+                await listener("started", stage.name, {"started_at": started})
+
+            # LLM calls, tokens and bytes recorded while the stage runs are attributed to it
+            usage: Dict[str, int] = {}
+            token = stage_usage.set(usage)
+            try:
+                output = await stage.run(context, inputs)
+            except Exception as e:
+                finished = time.time()
+                run.timings[stage.name].update({"finished_at": finished, "duration_seconds": finished - started,
+                                                "usage": usage})
+                if listener:
+                    await listener("failed", stage.name, {**run.timings[stage.name], "error": str(e)})
+                raise
+            finally:
+                stage_usage.reset(token)
+
+            finished = time.time()
+            run.outputs[stage.name] = output
+            run.timings[stage.name].update({"finished_at": finished, "duration_seconds": finished - started,
+                                            "usage": usage})
+            if listener:
+                await listener("completed", stage.name, {**run.timings[stage.name], "fingerprint": fingerprint})
+            return output
+
+        for name in self.order():
+            tasks[name] = asyncio.ensure_future(execute(self.stages[name]))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            run.finished_at = time.time()
+        return run
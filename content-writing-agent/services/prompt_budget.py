@@ -0,0 +1,242 @@
+import os
+import re
+import math
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from dotenv import load_dotenv
+from .inference_backends import LocalTransformersBackend
+
+# Load environment variables
+load_dotenv()
+
+# Context windows (in tokens) of the models the agents use
+MODEL_CONTEXT_WINDOWS = {
+    "mistralai/Mistral-7B-Instruct-v0.2": 32768,
+    "google/flan-t5-large": 512
+}
+
+# Encoder-decoder models generate into a separate window, so the prompt gets all of it
+ENCODER_DECODER_PREFIXES = ("google/flan-t5", "t5-", "google/t5")
+
+DEFAULT_CONTEXT_WINDOW = 4096
+
+
+class PromptSection:
+    """A named piece of variable-length prompt material."""
+
+    def __init__(self, name: str, text: str, weight: float = 1.0, compressible: bool = True):
+        """
+        Initialize a prompt section.
+
+        Args:
+            name: Section name, used in the savings report
+            text: The section content
+            weight: Relative share of the budget this section receives
+            compressible: Whether the section may be compacted to fit
+        """
+        self.name = name
+        self.text = text or ""
+        self.weight = weight
+        self.compressible = compressible
+
+
+class PromptBudgeter:
+    """Fits prompt sections into a model's token budget.
+
+    Tokens are counted with the target model's tokenizer when transformers can
+    load it, and estimated otherwise. Sections over their share of the budget
+    are compacted: duplicated lines and passages already present in an earlier
+    section are dropped, then the passages most relevant to the query are kept
+    (in their original order) until the section fits.
+    """
+
+    # Tokenizers shared across budgeters, keyed by model id (None = unavailable)
+    _tokenizers: Dict[str, Any] = {}
+    _tokenizer_lock = threading.Lock()
+
+    def __init__(self, model_id: str, max_new_tokens: int = 512, max_prompt_tokens: Optional[int] = None):
+        """
+        Initialize the budgeter.
+
+        Args:
+            model_id: Model the prompt is bound for
+            max_new_tokens: Tokens reserved for the completion
+            max_prompt_tokens: Hard cap on prompt size, even below the context window
+        """
+        self.model_id = model_id
+        self.max_new_tokens = max_new_tokens
+        self.max_prompt_tokens = max_prompt_tokens or int(os.environ.get("PROMPT_MAX_TOKENS", "6000"))
+
+    def prompt_budget(self) -> int:
+        """Return how many tokens the whole prompt may use."""
+        context = MODEL_CONTEXT_WINDOWS.get(self.model_id, DEFAULT_CONTEXT_WINDOW)
+        if not self.model_id.startswith(ENCODER_DECODER_PREFIXES):
+            context -= self.max_new_tokens
+        return max(min(context, self.max_prompt_tokens), 0)
+
+    def _tokenizer(self):
+        """Load the model's tokenizer once, reusing a locally loaded model's if present."""
+        if self.model_id in self._tokenizers:
+            return self._tokenizers[self.model_id]
+
+        with self._tokenizer_lock:
+            if self.model_id in self._tokenizers:
+                return self._tokenizers[self.model_id]
+
+            tokenizer = None
+            loaded = LocalTransformersBackend._models.get(self.model_id)
+            if loaded is not None:
+                tokenizer = loaded[1]
+            elif os.environ.get("PROMPT_TOKENIZER_ENABLED", "true").lower() == "true":
+                try:
+                    from transformers import AutoTokenizer
+                    tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+                except Exception as e:
+                    print(f"[Prompt Budget] Tokenizer for {self.model_id} unavailable, estimating tokens: {e}")
+
+            self._tokenizers[self.model_id] = tokenizer
+            return tokenizer
+
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens a piece of text uses with the target model."""
+        if not text:
+            return 0
+        tokenizer = self._tokenizer()
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        # Roughly four characters per token for English text
+        return math.ceil(len(text) / 4)
+
+    @staticmethod
+    def _passages(text: str) -> List[str]:
+        """Split text into passages: paragraphs, or lines if there are no blank lines."""
+        blocks = [b.strip() for b in re.split(r"\n\s*\n", text) if b.strip()]
+        if len(blocks) <= 1:
+            blocks = [line.strip() for line in text.split("\n") if line.strip()]
+        return blocks
+
+    @staticmethod
+    def _normalize(passage: str) -> str:
+        return re.sub(r"\s+", " ", passage).strip().lower()
+
+    @staticmethod
+    def _score(passage: str, query_terms: set, position: int) -> float:
+        """Rank a passage by query-term overlap, with a small bonus for appearing early."""
+        words = re.findall(r"\w+", passage.lower())
+        if not words:
+            return 0.0
+        overlap = sum(1 for w in words if w in query_terms)
+        return overlap / math.sqrt(len(words)) + 0.1 / (1 + position)
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Cut text down to roughly budget tokens at a word boundary."""
+        words = text.split()
+        low, high = 0, len(words)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count_tokens(" ".join(words[:mid])) <= budget:
+                low = mid
+            else:
+                high = mid - 1
+        return " ".join(words[:low])
+
+    def _compact(self, text: str, budget: int, query_terms: set, seen: set) -> str:
+        """Deduplicate a section and keep its top-ranked passages within budget."""
+        passages = []
+        for passage in self._passages(text):
+            key = self._normalize(passage)
+            if key in seen:
+                continue
+            seen.add(key)
+            passages.append(passage)
+
+        compacted = "\n\n".join(passages)
+        if self.count_tokens(compacted) <= budget:
+            return compacted
+
+        ranked = sorted(range(len(passages)),
+                        key=lambda i: self._score(passages[i], query_terms, i), reverse=True)
+        kept, used = [], 0
+        for i in ranked:
+            cost = self.count_tokens(passages[i])
+            if used + cost <= budget:
+                kept.append(i)
+                used += cost
+
+        if not kept and passages:
+            return self._truncate(passages[ranked[0]], budget)
+        return "\n\n".join(passages[i] for i in sorted(kept))
+
+    def _allocate(self, sections: List[PromptSection], available: int) -> Dict[str, int]:
+        """Split the available tokens between compressible sections by weight.
+
+        Sections that need less than their share give the remainder back to
+        the others.
+        """
+        needs = {s.name: self.count_tokens(s.text) for s in sections}
+        budgets: Dict[str, int] = {}
+        remaining = [s for s in sections]
+        while remaining:
+            total_weight = sum(s.weight for s in remaining) or 1.0
+            share = {s.name: int(available * s.weight / total_weight) for s in remaining}
+            satisfied = [s for s in remaining if needs[s.name] <= share[s.name]]
+            if not satisfied:
+                budgets.update(share)
+                break
+            for s in satisfied:
+                budgets[s.name] = needs[s.name]
+                available -= needs[s.name]
+                remaining.remove(s)
+        return budgets
+
+    def fit(self, sections: List[PromptSection], overhead: str = "",
+            query: str = "") -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Fit sections into the prompt budget.
+
+        Args:
+            sections: Variable prompt material, in prompt order
+            overhead: Everything else in the prompt (system prompt, instructions)
+            query: Text describing what matters, used to rank passages
+
+        Returns:
+            The fitted text for each section, and a report of tokens saved
+        """
+        query_terms = {w for w in re.findall(r"\w+", query.lower()) if len(w) > 2}
+        budget = self.prompt_budget()
+        overhead_tokens = self.count_tokens(overhead)
+
+        fixed = [s for s in sections if not s.compressible]
+        compressible = [s for s in sections if s.compressible]
+        available = budget - overhead_tokens - sum(self.count_tokens(s.text) for s in fixed)
+        allocation = self._allocate(compressible, max(available, 0))
+
+        fitted: Dict[str, str] = {}
+        report_sections: Dict[str, Dict[str, int]] = {}
+        seen: set = set()
+        for section in sections:
+            before = self.count_tokens(section.text)
+            if section.compressible and before > allocation.get(section.name, before):
+                text = self._compact(section.text, allocation[section.name], query_terms, seen)
+            else:
+                text = section.text
+                seen.update(self._normalize(p) for p in self._passages(text))
+            fitted[section.name] = text
+            after = self.count_tokens(text)
+            report_sections[section.name] = {
+                "tokens_before": before,
+                "tokens_after": after,
+                "tokens_saved": before - after
+            }
+
+        tokens_before = overhead_tokens + sum(r["tokens_before"] for r in report_sections.values())
+        tokens_after = overhead_tokens + sum(r["tokens_after"] for r in report_sections.values())
+        report = {
+            "model": self.model_id,
+            "budget": budget,
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": tokens_before - tokens_after,
+            "sections": report_sections
+        }
+        return fitted, report
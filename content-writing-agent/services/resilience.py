@@ -0,0 +1,271 @@
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Dict, Any, Awaitable, Callable, Optional
+import httpx
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# HTTP statuses worth retrying: rate limiting, model loading and gateway errors
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose circuit breaker is open."""
+
+
+class RetryPolicy:
+    """Bounded exponential backoff that honours server retry hints."""
+
+    def __init__(self, max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_attempts: Total attempts per call, including the first
+            base_delay: Delay before the first retry, doubled on each attempt
+            max_delay: Upper bound on any single delay, including server hints
+        """
+        self.max_attempts = max_attempts or int(os.environ.get("LLM_RETRY_ATTEMPTS", "4"))
+        self.base_delay = base_delay if base_delay is not None else float(os.environ.get("LLM_RETRY_BASE_DELAY", "1.0"))
+        self.max_delay = max_delay if max_delay is not None else float(os.environ.get("LLM_RETRY_MAX_DELAY", "30"))
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """Return True for transient transport errors and retryable HTTP statuses."""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRYABLE_STATUSES
+        return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+    @staticmethod
+    def hinted_delay(error: Exception) -> Optional[float]:
+        """Extract a Retry-After header or Hugging Face estimated_time hint."""
+        if not isinstance(error, httpx.HTTPStatusError):
+            return None
+        response = error.response
+
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+
+        # 503 "model is loading" responses carry {"error": ..., "estimated_time": seconds}
+        try:
+            body = response.json()
+            if isinstance(body, dict) and "estimated_time" in body:
+                return float(body["estimated_time"])
+        except Exception:
+            pass
+        return None
+
+    def delay_for(self, attempt: int, error: Exception) -> float:
+        """Return how long to wait before the given retry attempt (1-based)."""
+        hint = self.hinted_delay(error)
+        if hint is not None:
+            return min(hint, self.max_delay)
+        backoff = self.base_delay * (2 ** (attempt - 1))
+        # Full jitter keeps many pipelines from retrying in lockstep
+        return random.uniform(0, min(backoff, self.max_delay))
+
+
+class CircuitBreaker:
+    """Per-model breaker that fails fast while an endpoint is unhealthy.
+
+    After failure_threshold consecutive failed calls the circuit opens and calls
+    are rejected for reset_timeout seconds. Then a single trial call is let
+    through (half-open); its success closes the circuit, its failure re-opens it.
+    Only failures that say the endpoint is unhealthy are recorded; a call that
+    ends in a client error is released without counting either way.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self.failure_threshold = failure_threshold or int(os.environ.get("LLM_BREAKER_THRESHOLD", "5"))
+        self.reset_timeout = reset_timeout or float(os.environ.get("LLM_BREAKER_RESET", "30"))
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def allow(self) -> bool:
+        """Return True if a call may go ahead now."""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self.trial_in_flight = False
+        if self.state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """End a call that says nothing about the endpoint's health, freeing the half-open trial."""
+        self.trial_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of call latencies."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile (0-100) of recent latencies, or None if empty."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+
+class ResilientCaller:
+    """Wraps calls to one model with retries, a circuit breaker and optional hedging."""
+
+    def __init__(self, model_id: str, retry_policy: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None, hedge: Optional[bool] = None):
+        """
+        Initialize the caller.
+
+        Args:
+            model_id: Model this caller protects
+            retry_policy: Backoff settings, defaults from the environment
+            breaker: Circuit breaker, defaults from the environment
+            hedge: Race a second attempt once the call exceeds the observed p95
+        """
+        self.model_id = model_id
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge if hedge is not None else os.environ.get("LLM_HEDGE_ENABLED", "false").lower() == "true"
+        self.hedge_min_samples = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.latency = LatencyTracker()
+
+        # Metrics
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() with retries, failing fast while the circuit is open.
+
+        The breaker sees the call once, not each attempt: it is asked before the
+        first attempt and told the outcome after the last one.
+        """
+        self.calls += 1
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit open for {self.model_id}, failing fast")
+
+        attempt = 1
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    result = await self._attempt(fn)
+                except Exception as e:
+                    retryable = self.retry_policy.is_retryable(e)
+                    # Stop early if other calls have opened the circuit in the meantime
+                    if attempt >= self.retry_policy.max_attempts or not retryable or self.breaker.state == "open":
+                        self.failures += 1
+                        # Rate limiting, server errors and timeouts count against the endpoint; client errors do not
+                        if retryable:
+                            self.breaker.record_failure()
+                        else:
+                            self.breaker.release()
+                        raise
+                    delay = self.retry_policy.delay_for(attempt, e)
+                    reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+                    print(f"[Resilience] {self.model_id} attempt {attempt} failed ({reason}), retrying in {delay:.1f}s")
+                    self.retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+
+                self.breaker.record_success()
+                self.latency.record(time.monotonic() - started)
+                return result
+        except asyncio.CancelledError:
+            # A cancelled trial call must not leave the half-open circuit rejecting everything
+            self.breaker.release()
+            raise
+
+    async def _attempt(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run one attempt, hedging with a second request if it is slower than p95."""
+        p95 = self.latency.percentile(95)
+        if not self.hedge or p95 is None or len(self.latency.samples) < self.hedge_min_samples:
+            return await fn()
+
+        primary = asyncio.ensure_future(fn())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=p95)
+            if done:
+                return primary.result()
+
+            self.hedges += 1
+            backup = asyncio.ensure_future(fn())
+            tasks.append(backup)
+            pending = {primary, backup}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The losing request, or both if the caller was cancelled, must not keep holding inference capacity
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return retry, breaker and hedging metrics."""
+        return {
+            "model": self.model_id,
+            "breaker_state": self.breaker.state,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p50_seconds": self.latency.percentile(50),
+            "p95_seconds": self.latency.percentile(95)
+        }
+
+
+_callers: Dict[str, ResilientCaller] = {}
+
+def get_resilient_caller(model_id: str) -> ResilientCaller:
+    """Return the process-wide resilient caller for a model."""
+    if model_id not in _callers:
+        _callers[model_id] = ResilientCaller(model_id)
+    return _callers[model_id]
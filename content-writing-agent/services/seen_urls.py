@@ -0,0 +1,384 @@
+import os
+import json
+import math
+import time
+import socket
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Query parameters that only track where a click came from; the same article with or without them is one URL
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "yclid",
+                   "ref", "ref_src", "ref_url", "source", "cmpid", "_hsenc", "_hsmi", "guccounter", "ncid", "sr_share"}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_", "oly_")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of an article URL.
+
+    Lower-cases the scheme and host, drops default ports, the fragment and
+    tracking parameters (utm_*, fbclid, ...), and sorts the remaining query
+    parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == "http" and parts.port == 80 or scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES))
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def url_key(url: str) -> int:
+    """64-bit key of a normalised URL, stored instead of the URL text to keep the index small."""
+    return int.from_bytes(hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=8).digest(),
+                          "big", signed=True)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over URL keys.
+
+    Answers "definitely not seen" without touching storage. It never forgets,
+    so expired URLs stay "maybe seen" and are settled by the index.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: int) -> Iterator[int]:
+        # Double hashing: k positions from two halves of a 64-bit mix of the key
+        mixed = hashlib.blake2b(key.to_bytes(8, "big", signed=True), digest_size=16).digest()
+        h1, h2 = int.from_bytes(mixed[:8], "big"), int.from_bytes(mixed[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: int):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: int) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SeenUrlIndex:
+    """URLs the web monitor has already looked at, shared by all worker processes.
+
+    Every entry expires: a URL turned into content after ttl seconds, a claim
+    of a worker that died after claim_timeout seconds. Claiming is atomic, so
+    only one worker fetches a new article. An optional Bloom filter in front
+    answers most lookups of new URLs from memory; lookups of known URLs and
+    all writes go to the backend, one row at a time.
+
+    Backends implement the _-prefixed primitives on 64-bit URL keys.
+    """
+
+    name = "base"
+
+    def __init__(self, ttl: Optional[float] = None, claim_timeout: Optional[float] = None,
+                 bloom_capacity: Optional[int] = None):
+        """
+        Initialize the index.
+
+        Args:
+            ttl: Seconds a processed URL is remembered
+            claim_timeout: Seconds after which an unfinished claim can be taken over
+            bloom_capacity: URLs the Bloom filter is sized for; 0 disables it
+        """
+        self.ttl = ttl or float(os.environ.get("SEEN_URL_TTL_DAYS", "90")) * 86400
+        self.claim_timeout = claim_timeout or float(os.environ.get("URL_CLAIM_TIMEOUT", "600"))
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        capacity = bloom_capacity if bloom_capacity is not None else int(
+            os.environ.get("SEEN_URL_BLOOM_CAPACITY", "1000000"))
+        self.bloom = BloomFilter(capacity) if capacity > 0 else None
+        self._bloom_ready = threading.Event()
+
+    def _start_bloom(self):
+        """Fill the Bloom filter from the stored keys in the background; until then every URL is "maybe"."""
+        if self.bloom is None:
+            return
+
+        def fill():
+            count = 0
+            for key in self._iter_keys():
+                self.bloom.add(key)
+                count += 1
+            self._bloom_ready.set()
+            print(f"[Seen URLs] Bloom filter loaded with {count} URL(s)")
+
+        threading.Thread(target=fill, name="seen-urls-bloom", daemon=True).start()
+
+    # Primitives implemented by each backend
+
+    def _claim(self, key: int, now: float) -> bool:
+        raise NotImplementedError
+
+    def _mark(self, key: int, now: float):
+        raise NotImplementedError
+
+    def _release(self, key: int):
+        raise NotImplementedError
+
+    def _seen_keys(self, keys: List[int], now: float) -> set:
+        """Return the keys that have an unexpired entry."""
+        raise NotImplementedError
+
+    def _iter_keys(self) -> Iterable[int]:
+        raise NotImplementedError
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Delete expired entries; returns how many were removed."""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    # Public operations on URLs
+
+    def unseen(self, urls: Iterable[str]) -> List[str]:
+        """Return the URLs no worker has processed or is processing, in their original order."""
+        urls = list(urls)
+        keys = {url: url_key(url) for url in urls}
+        maybe = list(keys.values())
+        if self.bloom is not None and self._bloom_ready.is_set():
+            # Another process may have added URLs this filter does not know; claim() settles those
+            maybe = [key for key in maybe if key in self.bloom]
+        seen = self._seen_keys(maybe, time.time()) if maybe else set()
+        return [url for url in urls if keys[url] not in seen]
+
+    def is_seen(self, url: str) -> bool:
+        return not self.unseen([url])
+
+    def claim(self, url: str) -> bool:
+        """Atomically claim a URL; False if it is processed or another worker is on it."""
+        return self._claim(url_key(url), time.time())
+
+    def mark_processed(self, url: str):
+        """Record that the URL was turned into content; it is not claimed again until it expires."""
+        key = url_key(url)
+        self._mark(key, time.time())
+        if self.bloom is not None:
+            self.bloom.add(key)
+
+    def release(self, url: str):
+        """Give up a claim so the URL is considered again on the next check."""
+        self._release(url_key(url))
+
+
+class SQLiteSeenUrlIndex(SeenUrlIndex):
+    """Seen URLs in a SQLite table keyed by the 64-bit URL key, with an index on expiry."""
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None, legacy_file: str = "data/processed_urls.json", **kwargs):
+        """
+        Initialize the SQLite index.
+
+        Args:
+            path: Location of the SQLite database file
+            legacy_file: JSON list written by earlier versions, imported once
+        """
+        super().__init__(**kwargs)
+        self.path = path or os.environ.get("PROCESSED_URLS_PATH", "data/processed_urls.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._import_legacy(legacy_file)
+        self._start_bloom()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                key INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                owner TEXT,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_urls_expires ON seen_urls (expires_at)")
+        return conn
+
+    def _insert_processed(self, urls: Iterable[str]) -> int:
+        expires_at = time.time() + self.ttl
+        rows = [(url_key(url), expires_at) for url in urls]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO seen_urls (key, status, expires_at) VALUES (?, 'processed', ?)", rows
+                )
+        if self.bloom is not None:
+            for key, _ in rows:
+                self.bloom.add(key)
+        return len(rows)
+
+    def _import_legacy(self, legacy_file: str):
+        """Import the JSON list of processed URLs kept by earlier versions."""
+        if not legacy_file or not os.path.exists(legacy_file):
+            return
+        try:
+            with open(legacy_file, "r") as f:
+                count = self._insert_processed(json.load(f))
+            try:
+                os.replace(legacy_file, legacy_file + ".imported")
+            except FileNotFoundError:
+                # Another worker imported it at the same time
+                return
+            print(f"[Seen URLs] Imported {count} URL(s) from {legacy_file}")
+        except Exception as e:
+            print(f"[Seen URLs] Could not import {legacy_file}: {e}")
+
+    def _claim(self, key: int, now: float) -> bool:
+        # A new key, or one whose entry has expired (finished long ago, or claimed by a worker that died)
+        with self._lock:
+            cursor = self._conn.execute("""
+                INSERT INTO seen_urls (key, status, owner, expires_at) VALUES (?, 'claimed', ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    status = 'claimed', owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE seen_urls.expires_at < ?
+            """, (key, self.owner, now + self.claim_timeout, now))
+            return cursor.rowcount == 1
+
+    def _mark(self, key: int, now: float):
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO seen_urls (key, status, expires_at) VALUES (?, 'processed', ?)
+                ON CONFLICT (key) DO UPDATE SET status = 'processed', owner = NULL, expires_at = excluded.expires_at
+            """, (key, now + self.ttl))
+
+    def _release(self, key: int):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM seen_urls WHERE key = ? AND status = 'claimed' AND owner = ?", (key, self.owner)
+            )
+
+    def _seen_keys(self, keys: List[int], now: float) -> set:
+        seen = set()
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                seen.update(row[0] for row in self._conn.execute(
+                    f"SELECT key FROM seen_urls WHERE key IN ({placeholders}) AND expires_at >= ?", (*chunk, now)
+                ))
+        return seen
+
+    def _iter_keys(self) -> Iterator[int]:
+        # Page through the primary key so the lock is never held for long
+        last = None
+        while True:
+            with self._lock:
+                if last is None:
+                    rows = self._conn.execute("SELECT key FROM seen_urls ORDER BY key LIMIT 10000").fetchall()
+                else:
+                    rows = self._conn.execute(
+                        "SELECT key FROM seen_urls WHERE key > ? ORDER BY key LIMIT 10000", (last,)
+                    ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[0]
+            last = rows[-1][0]
+
+    def expire(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        removed = 0
+        while True:
+            # Small batches keep the write lock short while other workers claim URLs
+            with self._lock:
+                cursor = self._conn.execute(
+                    "DELETE FROM seen_urls WHERE key IN "
+                    "(SELECT key FROM seen_urls WHERE expires_at < ? LIMIT 10000)", (now,)
+                )
+            removed += cursor.rowcount
+            if cursor.rowcount < 10000:
+                return removed
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM seen_urls WHERE status = 'processed' AND expires_at >= ?", (time.time(),)
+            ).fetchone()[0]
+
+
+class MemorySeenUrlIndex(SeenUrlIndex):
+    """Seen URLs in a dict; for a single process or tests, lost on restart."""
+
+    name = "memory"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entries: Dict[int, Tuple[str, Optional[str], float]] = {}  # key -> (status, owner, expires_at)
+        self._lock = threading.Lock()
+        self._start_bloom()
+
+    def _claim(self, key: int, now: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] >= now:
+                return False
+            self._entries[key] = ("claimed", self.owner, now + self.claim_timeout)
+            return True
+
+    def _mark(self, key: int, now: float):
+        with self._lock:
+            self._entries[key] = ("processed", None, now + self.ttl)
+
+    def _release(self, key: int):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == "claimed" and entry[1] == self.owner:
+                del self._entries[key]
+
+    def _seen_keys(self, keys: List[int], now: float) -> set:
+        with self._lock:
+            return {key for key in keys if key in self._entries and self._entries[key][2] >= now}
+
+    def _iter_keys(self) -> Iterator[int]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def expire(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry[2] < now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+    def count(self) -> int:
+        now = time.time()
+        with self._lock:
+            return sum(1 for status, _, expires_at in self._entries.values()
+                       if status == "processed" and expires_at >= now)
+
+
+INDEX_BACKENDS = {
+    "sqlite": SQLiteSeenUrlIndex,
+    "memory": MemorySeenUrlIndex
+}
+
+_seen_url_index: Optional[SeenUrlIndex] = None
+
+def get_seen_url_index() -> SeenUrlIndex:
+    """Return the process-wide seen-URL index selected by SEEN_URL_INDEX (sqlite or memory)."""
+    global _seen_url_index
+    if _seen_url_index is None:
+        backend = os.environ.get("SEEN_URL_INDEX", "sqlite").lower()
+        if backend not in INDEX_BACKENDS:
+            raise ValueError(f"Unknown SEEN_URL_INDEX '{backend}', expected one of: {', '.join(INDEX_BACKENDS)}")
+        _seen_url_index = INDEX_BACKENDS[backend]()
+    return _seen_url_index
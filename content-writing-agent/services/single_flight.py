@@ -0,0 +1,66 @@
+import asyncio
+from typing import Dict, Any, Awaitable, Callable, Optional
+
+class SingleFlight:
+    """Collapses identical concurrent calls into one.
+
+    The first caller for a key starts the work; every caller that arrives with
+    the same key while it is still running waits for, and shares, that result
+    (or exception). Nothing is stored once the call finishes.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+        # Metrics
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0
+        self.max_waiters = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join the call already in flight for it."""
+        self.calls += 1
+        task = self._in_flight.get(key)
+
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.shared += 1
+            self._waiters[key] += 1
+            self.max_waiters = max(self.max_waiters, self._waiters[key])
+
+        # Shield so one cancelled caller does not cancel the shared call for everyone else
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        """Drop a finished call from the in-flight table."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+            self._waiters.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return deduplication metrics."""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "shared": self.shared,
+            "in_flight": len(self._in_flight),
+            "current_waiters": sum(self._waiters.values()),
+            "max_waiters": self.max_waiters
+        }
+
+
+_single_flight: Optional[SingleFlight] = None
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight table for LLM calls."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from dotenv import load_dotenv
+from .atomic_io import FileLock, atomic_write_json
+
+# Load environment variables
+load_dotenv()
+
+
+class TaskJournal:
+    """The coordinator's task queue as an append-only journal plus periodic snapshots.
+
+    Adding a plan appends one JSON line to the current journal file, so it
+    costs the same I/O however long the queue's history is. Every process
+    keeps an in-memory index of the queue and catches up by reading only the
+    lines appended since it last looked. After compact_after journal entries
+    the queue is written to a snapshot and a new, empty journal generation is
+    started:
+
+        <base>.snapshot.json   {"generation": g, "tasks": [...]}
+        <base>.<g>.journal     entries added since snapshot g
+
+    Journals are created before the snapshot that supersedes them, so a crash
+    at any point leaves a snapshot plus the journals to replay after it.
+    """
+
+    def __init__(self, base_path: str = "data/task_queue", compact_after: Optional[int] = None):
+        """
+        Initialize the journal and load the queue.
+
+        Args:
+            base_path: Path prefix of the snapshot, journal and lock files
+            compact_after: Journal entries after which a snapshot is written
+        """
+        self.base_path = base_path
+        self.snapshot_path = base_path + ".snapshot.json"
+        self.legacy_path = base_path + ".json"
+        self.compact_after = compact_after or int(os.environ.get("TASK_JOURNAL_COMPACT_AFTER", "1000"))
+        self._file_lock = FileLock(base_path)
+        self._lock = threading.Lock()
+
+        self._tasks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._generation = 0
+        self._offset = 0
+        self._journal_entries = 0
+
+        directory = os.path.dirname(base_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, self._file_lock:
+            self._import_legacy()
+            self._reload()
+
+    def _journal_path(self, generation: int) -> str:
+        return f"{self.base_path}.{generation}.journal"
+
+    def _journal_generations(self) -> List[int]:
+        directory = os.path.dirname(self.base_path) or "."
+        pattern = re.compile(re.escape(os.path.basename(self.base_path)) + r"\.(\d+)\.journal$")
+        return sorted(int(match.group(1)) for match in map(pattern.match, os.listdir(directory)) if match)
+
+    def _import_legacy(self):
+        """Turn the single JSON list written by earlier versions into snapshot 0."""
+        if os.path.exists(self.snapshot_path) or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r") as f:
+                tasks = json.load(f)
+            atomic_write_json(self.snapshot_path, {"generation": 0, "tasks": tasks})
+            os.replace(self.legacy_path, self.legacy_path + ".imported")
+            print(f"[Task Journal] Imported {len(tasks)} task(s) from {self.legacy_path}")
+        except Exception as e:
+            print(f"[Task Journal] Could not import {self.legacy_path}: {e}")
+
+    def _apply(self, entry: Dict[str, Any]):
+        if entry.get("op") == "add":
+            plan = entry["plan"]
+            self._tasks[plan["content_id"]] = plan
+
+    def _reload(self):
+        """Rebuild the index from the snapshot and every journal written after it."""
+        self._tasks = OrderedDict()
+        generation = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+            generation = snapshot["generation"]
+            for plan in snapshot["tasks"]:
+                self._tasks[plan["content_id"]] = plan
+
+        generations = [g for g in self._journal_generations() if g >= generation] or [generation]
+        for g in generations:
+            self._generation, self._offset, self._journal_entries = g, 0, 0
+            self._catch_up_current()
+        # The current journal always exists, so its disappearance signals a compaction
+        open(self._journal_path(self._generation), "ab").close()
+
+    def _catch_up_current(self):
+        """Apply lines appended to the current journal since the last read."""
+        try:
+            with open(self._journal_path(self._generation), "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # A line still being written by another process is picked up next time
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+                self._journal_entries += 1
+        self._offset += len(complete)
+
+    def _catch_up(self, file_locked: bool = False):
+        """Bring the index up to date with entries written by any process."""
+        # Two stat calls instead of listing the data directory on every read
+        if (not os.path.exists(self._journal_path(self._generation))
+                or os.path.exists(self._journal_path(self._generation + 1))):
+            # Another process compacted the journal since we last looked; reload while it cannot do so again
+            if file_locked:
+                self._reload()
+            else:
+                with self._file_lock:
+                    self._reload()
+        else:
+            self._catch_up_current()
+
+    def add(self, plans: List[Dict[str, Any]]):
+        """Append plans to the queue."""
+        if not plans:
+            return
+        lines = b"".join(json.dumps({"op": "add", "plan": plan}).encode("utf-8") + b"\n" for plan in plans)
+        with self._lock, self._file_lock:
+            self._catch_up(file_locked=True)
+            with open(self._journal_path(self._generation), "ab") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self._catch_up_current()
+            if self._journal_entries >= self.compact_after:
+                self._compact()
+
+    def _compact(self):
+        """Write a snapshot and start a new journal generation; the caller holds both locks."""
+        generation = self._generation + 1
+        open(self._journal_path(generation), "ab").close()
+        atomic_write_json(self.snapshot_path, {"generation": generation, "tasks": list(self._tasks.values())})
+        for g in self._journal_generations():
+            if g < generation:
+                os.remove(self._journal_path(g))
+        self._generation, self._offset, self._journal_entries = generation, 0, 0
+        print(f"[Task Journal] Compacted {len(self._tasks)} task(s) into snapshot {generation}")
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Return every task in the order it was added."""
+        with self._lock:
+            self._catch_up()
+            return list(self._tasks.values())
+
+    def get(self, content_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._catch_up()
+            return self._tasks.get(content_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._catch_up()
+            return len(self._tasks)
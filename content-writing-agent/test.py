@@ -1,6 +1,4 @@
 import asyncio
-import json
-import os
 from agents.coordinator_agent import CoordinatorAgent
 from agents.classification_agent import ContentClassificationAgent
 from agents.research_agent import ResearchAgent
@@ -8,10 +6,11 @@ from agents.writing_agent import WritingAgent
 from agents.fact_check_agent import FactCheckAgent
 from agents.proofreading_agent import ProofreadingAgent
 from agents.publishing_agent import PublishingAgent
+from services.artifact_store import get_artifact_store
 
 async def run_complete_pipeline():
-    # Ensure data directories exist
-    os.makedirs("data", exist_ok=True)
+    # All results are saved through the configured artifact store
+    store = get_artifact_store()
     
     print("=== Starting Complete Content Creation Pipeline ===")
     
@@ -23,8 +22,7 @@ async def run_complete_pipeline():
     update_result = await coordinator.process({"command": "check_updates", "force": True})  # Add force=True to reprocess
     
     # Save the update results
-    with open("data/update_results.json", "w") as f:
-        json.dump(update_result, f, indent=2)
+    await store.aput("update_results.json", update_result)
     
     if update_result["status"] == "no_updates":
         print("No new updates found.")
@@ -52,8 +50,7 @@ async def run_complete_pipeline():
         })
         
         # Save classification results
-        with open(f"data/classification_{content_id}.json", "w") as f:
-            json.dump(classification_result, f, indent=2)
+        await store.aput(f"classification_{content_id}.json", classification_result)
         
         print(f"Classification completed. Content type: {classification_result['content_type']}")
         
@@ -69,8 +66,7 @@ async def run_complete_pipeline():
         })
         
         # Save research results
-        with open(f"data/research_{content_id}.json", "w") as f:
-            json.dump(research_result, f, indent=2)
+        await store.aput(f"research_{content_id}.json", research_result)
         
         print(f"Research completed and saved.")
         
@@ -85,13 +81,11 @@ async def run_complete_pipeline():
             "classification": classification_result  # Pass classification to writing
         })
         
-        # Save the written article
-        with open(f"data/article_{content_id}.json", "w") as f:
-            json.dump(writing_result, f, indent=2)
-        
-        # Also save as markdown for easy viewing
-        with open(f"data/article_{content_id}.md", "w") as f:
-            f.write(writing_result["article_content"])
+        # Save the written article, plus markdown for easy viewing
+        await store.aput_many({
+            f"article_{content_id}.json": writing_result,
+            f"article_{content_id}.md": writing_result["article_content"]
+        })
         
         print(f"Article written and saved.")
         
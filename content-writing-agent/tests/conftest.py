@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# Tests import the agent modules the way api.py does, from the project directory
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+# Services open their databases and artifact directories under data/ when they are
+# first imported, so the whole session runs in a scratch directory with local storage
+os.chdir(tempfile.mkdtemp(prefix="content-agent-tests-"))
+os.environ.update({
+    "ARTIFACT_STORE": "local",
+    "SEEN_URL_INDEX": "sqlite",
+    "HUGGINGFACE_API_KEY": "",
+    "HF_INFERENCE_URL": "http://127.0.0.1:9/models"
+})
@@ -0,0 +1,71 @@
+import sys
+import threading
+import pytest
+from services.agent_registry import AgentRegistry
+
+AGENT_SOURCE = '''
+created = []
+
+class GreetingAgent:
+    def __init__(self):
+        created.append(self)
+
+    def greet(self):
+        return "{greeting}"
+'''
+
+
+@pytest.fixture
+def agent_module(tmp_path, monkeypatch):
+    path = tmp_path / "greeting_agent_module.py"
+
+    def write(greeting):
+        path.write_text(AGENT_SOURCE.format(greeting=greeting))
+
+    write("hello")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    yield write
+    sys.modules.pop("greeting_agent_module", None)
+
+
+def test_agents_are_created_once_and_shared(agent_module):
+    registry = AgentRegistry({"greeting": "greeting_agent_module:GreetingAgent"})
+    instances = []
+    threads = [threading.Thread(target=lambda: instances.append(registry.get("greeting"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(agent) for agent in instances}) == 1
+    assert len(sys.modules["greeting_agent_module"].created) == 1
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_reload_swaps_in_edited_code_and_notifies_listeners(agent_module):
+    registry = AgentRegistry({"greeting": "greeting_agent_module:GreetingAgent"})
+    old = registry.get("greeting")
+    reloaded = []
+    registry.add_reload_listener(reloaded.append)
+
+    agent_module("hello again")
+    assert registry.reload() == ["greeting"]
+
+    new = registry.get("greeting")
+    assert new is not old and new.greet() == "hello again"
+    # A pipeline still holding the old instance finishes with it
+    assert old.greet() == "hello"
+    assert reloaded == [["greeting"]]
+    assert registry.snapshot()["greeting"]["reloads"] == 1
+
+
+def test_broken_edit_keeps_the_working_agent(agent_module, tmp_path):
+    registry = AgentRegistry({"greeting": "greeting_agent_module:GreetingAgent"})
+    old = registry.get("greeting")
+
+    (tmp_path / "greeting_agent_module.py").write_text("class GreetingAgent(:\n")
+    with pytest.raises(SyntaxError):
+        registry.reload(["greeting"])
+    assert registry.get("greeting") is old
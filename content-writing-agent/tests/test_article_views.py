@@ -0,0 +1,77 @@
+import os
+import json
+import pytest
+from fastapi.testclient import TestClient
+from services.artifact_store import LocalArtifactStore
+from services.article_views import ArticleViews
+from tests.conftest import PROJECT_DIR
+
+TEMPLATES = os.path.join(PROJECT_DIR, "templates")
+
+
+def write_article(store, content_id, status):
+    store.put(f"article_{content_id}.md", "# Title\n\nBody of the article.")
+    store.put(f"status_{content_id}.json", json.dumps({"status": status, "stages": {}}))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalArtifactStore(root=str(tmp_path / "artifacts"))
+
+
+def test_article_finished_before_views_is_materialised_on_first_request(store):
+    write_article(store, "legacy", "completed")
+    views = ArticleViews(store=store, template_dir=TEMPLATES)
+    assert views.get("legacy") is None
+
+    view, html = views.load("legacy")
+    assert view is not None and html is None
+    assert store.get_text("views/legacy.etag") == view.etag
+
+    # Another process serves the stored page without rendering it again
+    other = ArticleViews(store=store, template_dir=TEMPLATES)
+    other._render = lambda content_id: pytest.fail("stored view should be served")
+    again, _ = other.load("legacy")
+    assert again.etag == view.etag
+
+
+def test_running_article_is_rendered_live_and_not_stored(store):
+    write_article(store, "running", "processing")
+    views = ArticleViews(store=store, template_dir=TEMPLATES)
+
+    view, html = views.load("running")
+    assert view is None and b"Body of the article." in html
+    assert store.get_text("views/running.etag") is None
+    assert views.load("missing") == (None, None)
+
+
+def test_etag_matches_only_the_encoding_served(store):
+    write_article(store, "encodings", "completed")
+    view = ArticleViews(store=store, template_dir=TEMPLATES).materialise("encodings")
+
+    gzip_tag = view.etag_for("gzip")
+    assert view.matches(gzip_tag, "gzip")
+    assert view.matches(f'W/{gzip_tag}, "other"', "gzip")
+    assert not view.matches(gzip_tag, "identity")
+    assert view.matches("*", "identity")
+
+
+def test_content_endpoint_revalidates_per_encoding(store, monkeypatch):
+    import api
+    write_article(store, "served", "completed")
+    monkeypatch.setattr(api, "article_views", ArticleViews(store=store, template_dir=TEMPLATES))
+    client = TestClient(api.app)
+
+    first = client.get("/content/served", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["Content-Encoding"] == "gzip"
+    etag = first.headers["ETag"]
+
+    cached = client.get("/content/served", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    # A cache holding the gzip body must not be told it is valid for an identity request
+    plain = client.get("/content/served", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert plain.status_code == 200
+    assert "Content-Encoding" not in plain.headers
+    assert b"Body of the article." in plain.content
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from services.artifact_store import LocalArtifactStore, SQLiteArtifactStore
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "local":
+        return LocalArtifactStore(root=str(tmp_path / "artifacts"))
+    return SQLiteArtifactStore(path=str(tmp_path / "artifacts.sqlite3"))
+
+
+def test_typed_round_trips(store):
+    store.put("status_a.json", {"status": "completed", "stages": {}})
+    store.put("publications/blog/a.md", "# Título")
+    store.put("raw.bin", b"\x00\x01")
+
+    assert store.get_json("status_a.json") == {"status": "completed", "stages": {}}
+    assert store.get_text("publications/blog/a.md") == "# Título"
+    assert store.get_bytes("raw.bin") == b"\x00\x01"
+    assert store.get_bytes("missing.json") is None
+    assert store.exists("raw.bin") and not store.exists("missing.json")
+
+
+def test_many_keys_at_once(store):
+    store.put_many({"content_plans/a.json": {"n": 1}, "content_plans/b.json": {"n": 2}})
+    found = store.get_many(["content_plans/a.json", "content_plans/b.json", "content_plans/c.json"])
+    assert found["content_plans/c.json"] is None
+    assert b'"n": 2' in found["content_plans/b.json"]
+
+
+def test_list_by_prefix_and_delete(store):
+    for key in ["content_plans/a.json", "content_plans/b.json", "content_plans_old.txt",
+                "publications/blog/a.md", "publications/linkedin/a.txt", "status_a.json"]:
+        store.put(key, "x")
+
+    assert store.list("content_plans/") == ["content_plans/a.json", "content_plans/b.json"]
+    assert store.list("publications/") == ["publications/blog/a.md", "publications/linkedin/a.txt"]
+    assert store.list("status_") == ["status_a.json"]
+
+    store.delete("content_plans/a.json")
+    store.delete("content_plans/never-existed.json")
+    assert store.list("content_plans/") == ["content_plans/b.json"]
+
+
+def test_overwrite_replaces_the_whole_value(store):
+    store.put("article_a.md", "first version, rather long")
+    store.put("article_a.md", "second")
+    assert store.get_text("article_a.md") == "second"
+
+
+def test_async_variants_do_not_block(store):
+    async def run():
+        await asyncio.gather(*(store.aput(f"status_{n}.json", {"n": n}) for n in range(10)))
+        return await asyncio.gather(*(store.aget_json(f"status_{n}.json") for n in range(10)))
+
+    assert asyncio.run(run()) == [{"n": n} for n in range(10)]
+
+
+def test_local_keys_cannot_escape_the_root(tmp_path):
+    store = LocalArtifactStore(root=str(tmp_path / "artifacts"))
+    with pytest.raises(ValueError):
+        store.put("../outside.json", {})
+    store.put("inside.json", {})
+    assert store.list() == ["inside.json"]
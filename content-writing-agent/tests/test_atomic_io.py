@@ -0,0 +1,64 @@
+import os
+import json
+import threading
+import multiprocessing
+import pytest
+from services.atomic_io import FileLock, atomic_write_bytes, atomic_write_json
+
+
+def bump(path, times):
+    """Read-modify-write a shared counter file, as worker processes update shared state."""
+    for _ in range(times):
+        with FileLock(path):
+            with open(path, "r") as f:
+                count = json.load(f)["count"]
+            atomic_write_json(path, {"count": count + 1})
+
+
+def test_lock_serialises_updates_from_processes_and_threads(tmp_path):
+    path = str(tmp_path / "counter.json")
+    atomic_write_json(path, {"count": 0})
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=bump, args=(path, 25)) for _ in range(3)]
+    threads = [threading.Thread(target=bump, args=(path, 25)) for _ in range(3)]
+    for worker in processes + threads:
+        worker.start()
+    for worker in processes + threads:
+        worker.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    with open(path, "r") as f:
+        assert json.load(f) == {"count": 150}
+
+
+def test_failed_write_keeps_the_old_content_and_leaves_no_temp_file(tmp_path):
+    path = str(tmp_path / "state.json")
+    atomic_write_json(path, {"version": 1})
+
+    with pytest.raises(TypeError):
+        atomic_write_json(path, {"version": object()})
+    with pytest.raises(TypeError):
+        atomic_write_bytes(path, "not bytes")
+
+    with open(path, "r") as f:
+        assert json.load(f) == {"version": 1}
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_lock_is_released_when_the_block_raises(tmp_path):
+    path = str(tmp_path / "state.json")
+    with pytest.raises(RuntimeError):
+        with FileLock(path):
+            raise RuntimeError("boom")
+
+    acquired = threading.Event()
+
+    def take():
+        with FileLock(path):
+            acquired.set()
+
+    thread = threading.Thread(target=take)
+    thread.start()
+    thread.join(timeout=5)
+    assert acquired.is_set()
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from services.batching import MicroBatcher
+from services.inference_backends import InferenceBackend
+
+
+class RecordingBackend(InferenceBackend):
+    name = "recording"
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def generate_batch(self, model_id, prompts, parameters, timeout=None):
+        self.batches.append(list(prompts))
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("backend down")
+        return [f"{model_id}:{prompt}" for prompt in prompts]
+
+
+def submit_all(batcher, backend, prompts, parameters=None):
+    async def run():
+        return await asyncio.gather(*(
+            batcher.submit(backend, "model", prompt, parameters or {"temperature": 0.7}) for prompt in prompts
+        ), return_exceptions=True)
+    return asyncio.run(run())
+
+
+def test_concurrent_prompts_share_one_request_and_keep_their_order():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(max_batch_size=8, window_ms=20)
+
+    results = submit_all(batcher, backend, ["a", "b", "c"])
+    assert results == ["model:a", "model:b", "model:c"]
+    assert backend.batches == [["a", "b", "c"]]
+    assert batcher.stats()["avg_batch_size"] == 3
+
+
+def test_full_batches_are_sent_without_waiting_for_the_window():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(max_batch_size=2, window_ms=10_000)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(backend, "model", p, {}) for p in "abcd")), timeout=2
+        )
+
+    results = asyncio.run(run())
+    assert results == ["model:a", "model:b", "model:c", "model:d"]
+    assert backend.batches == [["a", "b"], ["c", "d"]]
+
+
+def test_different_parameters_are_never_batched_together():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(max_batch_size=8, window_ms=20)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit(backend, "model", "a", {"temperature": 0.7}),
+            batcher.submit(backend, "model", "b", {"temperature": 0.0})
+        )
+
+    asyncio.run(run())
+    assert sorted(backend.batches) == [["a"], ["b"]]
+
+
+def test_batch_failure_reaches_every_caller():
+    backend = RecordingBackend(fail=True)
+    batcher = MicroBatcher(max_batch_size=8, window_ms=20)
+
+    results = submit_all(batcher, backend, ["a", "b"])
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.batch_errors == 1
+
+
+def test_short_batch_answer_fails_every_caller_instead_of_hanging():
+    class Short(RecordingBackend):
+        async def generate_batch(self, model_id, prompts, parameters, timeout=None):
+            return (await super().generate_batch(model_id, prompts, parameters, timeout))[:-1]
+
+    backend = Short()
+    batcher = MicroBatcher(max_batch_size=8, window_ms=20)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(
+            *(batcher.submit(backend, "model", p, {}) for p in "abc"), return_exceptions=True
+        ), timeout=2)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert batcher.batch_errors == 1
+
+
+def test_batching_disabled_calls_the_backend_directly():
+    class Single(InferenceBackend):
+        async def generate(self, model_id, prompt, parameters, timeout=None):
+            return prompt
+
+    batcher = MicroBatcher(max_batch_size=1)
+    assert asyncio.run(batcher.submit(Single(), "model", "solo", {})) == "solo"
+    assert batcher.stats()["pending_batches"] == 0
+
+
+@pytest.mark.parametrize("window_ms", [0, 5])
+def test_small_windows_still_deliver(window_ms):
+    backend = RecordingBackend()
+    batcher = MicroBatcher(max_batch_size=4, window_ms=window_ms)
+    assert submit_all(batcher, backend, ["x"]) == ["model:x"]
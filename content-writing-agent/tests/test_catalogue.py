@@ -0,0 +1,85 @@
+import pytest
+from fastapi.testclient import TestClient
+from services.artifact_store import LocalArtifactStore
+from services.catalogue import ContentCatalogue
+
+
+def plan(content_id, title="", source="TechCrunch AI", timestamp="2026-01-01T00:00:00"):
+    return {"content_id": content_id, "timestamp": timestamp,
+            "original_update": {"title": title or content_id, "source": source}}
+
+
+@pytest.fixture
+def catalogue(tmp_path):
+    catalogue = ContentCatalogue(path=str(tmp_path / "catalogue.sqlite3"))
+    # Many items share a creation time, so the cursor must break ties by content_id
+    for n in range(25):
+        catalogue.add_plan(plan(f"item-{n:02d}", source="VentureBeat AI" if n % 5 == 0 else "TechCrunch AI",
+                                timestamp=f"2026-01-0{1 + n // 10}T00:00:00"))
+    return catalogue
+
+
+def walk(catalogue, **query):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = catalogue.query(cursor=cursor, **query)
+        ids += [item["content_id"] for item in page["items"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+def test_cursor_pages_cover_every_item_once_in_order(catalogue):
+    ids, pages = walk(catalogue, limit=10)
+    assert pages == 3
+    assert ids == sorted(ids, key=lambda i: (int(i[-2:]) // 10, i), reverse=True)
+    assert len(set(ids)) == 25
+
+    ascending, _ = walk(catalogue, limit=7, order="asc", sort="title")
+    assert ascending == sorted(f"item-{n:02d}" for n in range(25))
+
+
+def test_filters_and_field_selection(catalogue):
+    catalogue.update("item-05", status="completed", content_type="product_launch")
+
+    page = catalogue.query(source="VentureBeat AI", fields=["content_id", "source"])
+    assert {item["content_id"] for item in page["items"]} == {f"item-{n:02d}" for n in (0, 5, 10, 15, 20)}
+    assert set(page["items"][0]) == {"content_id", "source"}
+
+    completed = catalogue.query(status="completed", content_type="product_launch")["items"]
+    assert [item["content_id"] for item in completed] == ["item-05"]
+    assert len(walk(catalogue, since="2026-01-02", until="2026-01-03")[0]) == 10
+
+
+def test_bad_queries_are_rejected(catalogue):
+    for query in ({"sort": "url"}, {"order": "sideways"}, {"fields": ["secret"]}, {"cursor": "not-a-cursor"}):
+        with pytest.raises(ValueError):
+            catalogue.query(**query)
+
+
+def test_re_adding_a_plan_keeps_its_status(catalogue):
+    catalogue.update("item-01", status="completed")
+    catalogue.add_plan(plan("item-01", title="Renamed"))
+    item = catalogue.query(status="completed", fields=["content_id", "title"])["items"][0]
+    assert item == {"content_id": "item-01", "title": "Renamed"}
+
+
+def test_sync_indexes_plans_stored_before_the_catalogue(tmp_path):
+    store = LocalArtifactStore(root=str(tmp_path / "artifacts"))
+    store.put("content_plans/legacy.json", plan("legacy"))
+    store.put("status_legacy.json", {"status": "error", "error": "boom"})
+    catalogue = ContentCatalogue(path=str(tmp_path / "catalogue.sqlite3"))
+
+    assert catalogue.sync(store) == 1
+    assert catalogue.sync(store) == 0
+    assert catalogue.query(fields=["content_id", "status", "error"])["items"] == [
+        {"content_id": "legacy", "status": "error", "error": "boom"}
+    ]
+
+
+def test_list_content_reports_bad_queries_as_client_errors():
+    import api
+    client = TestClient(api.app)
+    assert client.get("/list-content", params={"sort": "url"}).status_code == 400
+    assert client.get("/list-content", params={"limit": 10}).json()["content_plans"] is not None
@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from services import content_pipeline
+from services.content_pipeline import CONTENT_PIPELINE, checkpoints, store, run_content_pipeline
+
+
+ALL_STAGES = ["classification", "research", "writing", "fact_check", "proofreading", "publishing"]
+
+
+class StageLog(list):
+    pass
+
+
+def fake_stage(name, log, failing):
+    async def run(context, inputs):
+        log.append(name)
+        # Long enough for fact_check and proofreading to overlap and commit together
+        await asyncio.sleep(0.05)
+        if name in failing:
+            failing.discard(name)
+            raise RuntimeError(f"{name} crashed")
+        output = {"stage": name, "inputs": sorted(inputs)}
+        await store.aput(CONTENT_PIPELINE.stages[name].artifact_path(context), output)
+        return output
+    return run
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    """Stages that log each run; a stage named in .failing raises once."""
+    log = StageLog()
+    log.failing = set()
+    for name, stage in CONTENT_PIPELINE.stages.items():
+        monkeypatch.setattr(stage, "run", fake_stage(name, log, log.failing))
+    return log
+
+
+def stored_plan(content_id):
+    store.put(f"content_plans/{content_id}.json", {"content_id": content_id, "content_plan": {}})
+
+
+def stale(content_id):
+    context = asyncio.run(content_pipeline.load_context(content_id))
+    return checkpoints.stale_stages(content_id, CONTENT_PIPELINE, context)
+
+
+def test_concurrent_stages_keep_every_checkpoint(fake_stages):
+    for n in range(3):
+        content_id = f"concurrent-{n}"
+        store.put(f"content_plans/{content_id}.json", {"content_id": content_id, "content_plan": {}})
+
+        assert asyncio.run(run_content_pipeline(content_id)) == "completed"
+
+        manifest = checkpoints.read(content_id)
+        assert set(manifest["stages"]) == set(content_pipeline.PIPELINE_STAGES)
+
+
+def test_resume_reuses_both_concurrent_stages(fake_stages):
+    content_id = "resume-concurrent"
+    store.put(f"content_plans/{content_id}.json", {"content_id": content_id, "content_plan": {}})
+    asyncio.run(run_content_pipeline(content_id))
+
+    context = asyncio.run(content_pipeline.load_context(content_id))
+    assert checkpoints.stale_stages(content_id, CONTENT_PIPELINE, context) == []
+
+
+def test_commits_from_many_threads_are_not_lost():
+    content_id = "threaded-commits"
+    stages = [f"stage_{n}" for n in range(20)]
+    for stage in stages:
+        store.put(f"threaded/{stage}.json", {"stage": stage})
+
+    async def commit_all():
+        await asyncio.gather(*(asyncio.to_thread(checkpoints.commit, content_id, stage, f"threaded/{stage}.json")
+                               for stage in stages))
+
+    asyncio.run(commit_all())
+    assert set(checkpoints.read(content_id)["stages"]) == set(stages)
+
+
+def test_interrupted_run_resumes_from_the_first_incomplete_stage(fake_stages):
+    content_id = "resume-after-crash"
+    stored_plan(content_id)
+    fake_stages.failing.add("proofreading")
+
+    assert asyncio.run(run_content_pipeline(content_id)) == "error"
+    assert stale(content_id) == ["proofreading", "publishing"]
+
+    fake_stages.clear()
+    assert asyncio.run(run_content_pipeline(content_id)) == "completed"
+    assert fake_stages == ["proofreading", "publishing"]
+    status = store.get_json(f"status_{content_id}.json")
+    assert status["resumed_stages"] == ["classification", "research", "writing", "fact_check"]
+
+
+def test_missing_artifact_makes_its_stage_and_downstream_stale(fake_stages):
+    content_id = "missing-artifact"
+    stored_plan(content_id)
+    asyncio.run(run_content_pipeline(content_id))
+
+    store.delete(f"research_{content_id}.json")
+    assert stale(content_id) == ["research", "writing", "fact_check", "proofreading", "publishing"]
+
+    checkpoints.clear(content_id)
+    assert stale(content_id) == ALL_STAGES
+
+
+def test_adopt_checkpoints_artifacts_written_before_checkpoints_existed(fake_stages):
+    content_id = "back-catalogue"
+    stored_plan(content_id)
+    asyncio.run(run_content_pipeline(content_id))
+    checkpoints.clear(content_id)
+    store.delete(f"fact_check_{content_id}.json")
+
+    context = asyncio.run(content_pipeline.load_context(content_id))
+    # Only the stage whose artifact is gone is left; proofreading and publishing do not depend on it
+    assert checkpoints.adopt(content_id, CONTENT_PIPELINE, context) == [
+        "classification", "research", "writing", "proofreading", "publishing"]
+    assert checkpoints.adopt(content_id, CONTENT_PIPELINE, context) == []
+    assert stale(content_id) == ["fact_check"]
@@ -0,0 +1,72 @@
+import time
+import asyncio
+import agents.base_agent as base_agent
+from agents.base_agent import BaseAgent
+from services.completion_cache import CompletionCache
+from services.inference_backends import InferenceBackend
+from services.model_router import ModelRouter
+
+
+class CountingBackend(InferenceBackend):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, model_id, prompt, parameters, timeout=None):
+        self.calls += 1
+        return f"completion {self.calls}"
+
+
+def test_key_covers_everything_that_changes_the_completion():
+    key = CompletionCache.make_key("model", "system", "prompt", {"temperature": 0.7})
+    assert key == CompletionCache.make_key("model", "system", "prompt", {"temperature": 0.7})
+    assert key != CompletionCache.make_key("other", "system", "prompt", {"temperature": 0.7})
+    assert key != CompletionCache.make_key("model", "system", "prompt!", {"temperature": 0.7})
+    assert key != CompletionCache.make_key("model", "system", "prompt", {"temperature": 0.2})
+
+
+def test_entries_persist_across_instances_and_expire(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = CompletionCache(path=path, ttl_seconds=0.2)
+    cache.set("key", "model", "text")
+
+    other = CompletionCache(path=path, ttl_seconds=0.2)
+    assert other.get("key") == "text"
+    assert other.get("missing") is None
+    assert (other.hits, other.misses) == (1, 1)
+
+    time.sleep(0.3)
+    assert other.get("key") is None
+    assert other.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = CompletionCache(path=str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.set("a", "model", "A")
+    time.sleep(0.01)
+    cache.set("b", "model", "B")
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", "model", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+
+def test_agent_serves_repeated_prompts_from_the_cache(tmp_path, monkeypatch):
+    backend = CountingBackend()
+    monkeypatch.setattr(base_agent, "get_backend", lambda model_id: backend)
+    agent = BaseAgent(name="Cache Agent", system_prompt="Answer.", model_name="model")
+    agent.router = ModelRouter(routes={})
+    agent.completion_cache = CompletionCache(path=str(tmp_path / "cache.sqlite3"))
+
+    async def run():
+        first = await agent.process_with_model("Same question")
+        second = await agent.process_with_model("Same question")
+        uncached = await agent.process_with_model("Same question", use_cache=False)
+        return first, second, uncached
+
+    assert asyncio.run(run()) == ("completion 1", "completion 1", "completion 2")
+    assert backend.calls == 2
@@ -0,0 +1,185 @@
+import os
+import json
+import uuid
+import random
+import threading
+from services.artifact_store import LocalArtifactStore, SQLiteArtifactStore
+from services.content_addressed_store import ContentAddressedStore, REF_MAGIC, GROUP_PREFIX
+
+
+def article(n: int) -> str:
+    return f"Article {n}. " + " ".join(f"sentence {n}-{i} about machine learning." for i in range(200))
+
+
+def stores(tmp_path, dedup=True):
+    backend = LocalArtifactStore(str(tmp_path / "data"))
+    return backend, ContentAddressedStore(backend, dedup=dedup, lock_dir=str(tmp_path / "locks"))
+
+
+def test_round_trip_and_shared_article_text(tmp_path):
+    backend, store = stores(tmp_path)
+    content_id = str(uuid.uuid4())
+    text = article(1)
+    document = {"content_id": content_id, "article_content": text}
+
+    store.put_many({f"article_{content_id}.json": document, f"proofread_{content_id}.json": document})
+
+    assert json.loads(store.get_bytes(f"article_{content_id}.json")) == document
+    assert backend.get_bytes(f"article_{content_id}.json").startswith(REF_MAGIC)
+    assert len(backend.list("cas/blobs/")) == 1
+
+
+def test_human_facing_files_stay_plain_text(tmp_path):
+    backend, store = stores(tmp_path)
+    content_id = str(uuid.uuid4())
+    text = article(2)
+
+    store.put_many({
+        f"article_{content_id}.md": text,
+        f"publications/blog/{content_id}.md": text,
+        f"publications/publication_{content_id}.json": {"platforms": {"blog": {"content": text}}}
+    })
+
+    assert backend.get_bytes(f"article_{content_id}.md") == text.encode("utf-8")
+    assert backend.get_bytes(f"publications/blog/{content_id}.md") == text.encode("utf-8")
+    assert not backend.get_bytes(f"publications/publication_{content_id}.json").startswith(REF_MAGIC)
+
+
+def test_disabled_dedup_writes_plain_files_and_still_reads_references(tmp_path):
+    backend, store = stores(tmp_path)
+    content_id = str(uuid.uuid4())
+    document = {"article_content": article(3)}
+    store.put(f"article_{content_id}.json", document)
+
+    plain = ContentAddressedStore(backend, dedup=False, lock_dir=str(tmp_path / "locks"))
+    assert json.loads(plain.get_bytes(f"article_{content_id}.json")) == document
+
+    plain.put(f"fact_check_{content_id}.json", document)
+    assert json.loads(backend.get_bytes(f"fact_check_{content_id}.json")) == document
+
+
+def test_concurrent_puts_keep_every_index_entry(tmp_path):
+    backend, store = stores(tmp_path)
+    content_id = str(uuid.uuid4())
+
+    def put(n):
+        # Separate layers share nothing in memory, like separate worker processes
+        writer = ContentAddressedStore(backend, lock_dir=str(tmp_path / "locks"))
+        writer.put(f"variant_{n}_{content_id}.json", {"article_content": article(n)})
+
+    threads = [threading.Thread(target=put, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    index = json.loads(backend.get_bytes(f"{GROUP_PREFIX}{content_id}.json"))
+    assert len(index["blobs"]) == 6
+
+
+def test_gc_during_writes_keeps_referenced_blobs(tmp_path):
+    backend, store = stores(tmp_path)
+    content_ids = [str(uuid.uuid4()) for _ in range(4)]
+    stop = threading.Event()
+
+    def collect():
+        while not stop.is_set():
+            ContentAddressedStore(backend, lock_dir=str(tmp_path / "locks")).gc()
+
+    collector = threading.Thread(target=collect)
+    collector.start()
+    try:
+        for round_ in range(5):
+            for n, content_id in enumerate(content_ids):
+                store.put(f"article_{content_id}.json", {"article_content": article(round_ * 10 + n)})
+    finally:
+        stop.set()
+        collector.join()
+
+    fresh = ContentAddressedStore(backend, lock_dir=str(tmp_path / "locks"))
+    for n, content_id in enumerate(content_ids):
+        assert json.loads(fresh.get_bytes(f"article_{content_id}.json")) == {"article_content": article(40 + n)}
+
+
+def test_gc_removes_blobs_of_overwritten_artifacts(tmp_path):
+    backend, store = stores(tmp_path)
+    content_id = str(uuid.uuid4())
+    for n in range(12):
+        store.put(f"article_{content_id}.json", {"article_content": article(n)})
+
+    result = store.gc()
+
+    assert result["deleted"] > 0
+    assert json.loads(store.get_bytes(f"article_{content_id}.json")) == {"article_content": article(11)}
+
+
+def test_edited_versions_are_stored_as_short_delta_chains(tmp_path):
+    backend = LocalArtifactStore(str(tmp_path / "data"))
+    store = ContentAddressedStore(backend, max_depth=2, lock_dir=str(tmp_path / "locks"))
+    content_id = str(uuid.uuid4())
+    words = random.Random(7).choices(["model", "agent", "latency", "token", "cache", "GPU", "benchmark",
+                                      "dataset", "release", "open", "weights", "inference"], k=2000)
+    versions = [" ".join(words) + "".join(f" Edit {e}." for e in range(n)) for n in range(6)]
+    for n, text in enumerate(versions):
+        store.put(f"draft_{n}_{content_id}.json", {"article_content": text})
+
+    records = [backend.get_bytes(key) for key in backend.list("cas/blobs/")]
+    deltas = [record for record in records if record[:1] == b"D"]
+    plain = [record for record in records if record[:1] == b"Z"]
+    assert len(records) == 6 and deltas and plain
+    # An edit costs a few bytes next to its base, and no read has to resolve more than max_depth deltas
+    assert max(len(record) for record in deltas) < min(len(record) for record in plain) / 5
+    assert max(record[65] for record in deltas) <= 2
+
+    fresh = ContentAddressedStore(backend, lock_dir=str(tmp_path / "locks"))
+    for n, text in enumerate(versions):
+        assert json.loads(fresh.get_bytes(f"draft_{n}_{content_id}.json")) == {"article_content": text}
+
+
+def test_identical_human_facing_files_share_one_copy_on_disk(tmp_path):
+    backend, store = stores(tmp_path)
+    content_id = str(uuid.uuid4())
+    text = article(8)
+    store.put(f"article_{content_id}.md", text)
+    store.put_many({f"publications/blog/{content_id}.md": text, f"publications/medium/{content_id}.md": text})
+
+    paths = [backend._path(key) for key in (f"article_{content_id}.md", f"publications/blog/{content_id}.md",
+                                            f"publications/medium/{content_id}.md")]
+    assert len({os.stat(path).st_ino for path in paths}) == 1
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            assert f.read() == text
+
+    # Rewriting one copy replaces its link and leaves the others alone
+    store.put(f"publications/medium/{content_id}.md", text + "\nEdited for Medium.")
+    assert store.get_text(f"publications/blog/{content_id}.md") == text
+    assert os.stat(paths[2]).st_ino != os.stat(paths[0]).st_ino
+
+    store.delete(f"article_{content_id}.md")
+    store.delete(f"publications/blog/{content_id}.md")
+    store.gc()
+    # Only the pooled copy of the edited Medium file is still linked
+    edited = ContentAddressedStore._sha((text + "\nEdited for Medium.").encode("utf-8"))
+    assert backend.list("cas/plain/") == [f"cas/plain/{edited[:2]}/{edited}"]
+
+
+def test_identical_publications_are_stored_once_without_links(tmp_path):
+    backend = SQLiteArtifactStore(str(tmp_path / "artifacts.sqlite3"))
+    store = ContentAddressedStore(backend, lock_dir=str(tmp_path / "locks"))
+    content_id = str(uuid.uuid4())
+    text = article(9)
+    store.put_many({f"publications/blog/{content_id}.md": text, f"publications/medium/{content_id}.md": text})
+
+    assert len(backend.list("cas/blobs/")) == 1
+    assert store.get_text(f"publications/medium/{content_id}.md") == text
+
+
+def test_default_store_keeps_separate_copies(tmp_path):
+    backend, store = stores(tmp_path, dedup=False)
+    content_id = str(uuid.uuid4())
+    text = article(10)
+    store.put_many({f"publications/blog/{content_id}.md": text, f"publications/medium/{content_id}.md": text})
+
+    blog, medium = (os.stat(backend._path(f"publications/{platform}/{content_id}.md")) for platform in ("blog", "medium"))
+    assert blog.st_ino != medium.st_ino
+    assert backend.list("cas/") == []
@@ -0,0 +1,182 @@
+import asyncio
+import multiprocessing
+from services.catalogue import ContentCatalogue
+from services.events import EventBus, CatalogueRelay
+
+
+def plan(content_id):
+    return {"content_id": content_id, "original_update": {"title": content_id}}
+
+
+def run_elsewhere(path, steps):
+    """Apply catalogue updates from another process, like a second uvicorn worker."""
+    catalogue = ContentCatalogue(path)
+    for content_id, fields in steps:
+        if fields is None:
+            catalogue.add_plan(plan(content_id))
+        else:
+            catalogue.update(content_id, **fields)
+
+
+def in_other_process(path, *steps):
+    # A fresh interpreter, as uvicorn starts its workers; forking a threaded test process is unsafe
+    process = multiprocessing.get_context("spawn").Process(target=run_elsewhere, args=(path, list(steps)))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_relay_publishes_changes_made_by_other_processes(tmp_path):
+    path = str(tmp_path / "catalogue.sqlite3")
+    catalogue = ContentCatalogue(path)
+    bus = EventBus()
+    relay = CatalogueRelay(bus, catalogue, interval=0.05)
+
+    async def scenario():
+        subscription = bus.subscribe()
+
+        in_other_process(path, ("remote", None))
+        relay.poll()
+        await asyncio.sleep(0)
+        added = drain(subscription)
+
+        in_other_process(path, ("remote", {"status": "processing", "current_stage": "writing"}))
+        relay.poll()
+        await asyncio.sleep(0)
+        stage = drain(subscription)
+
+        in_other_process(path, ("remote", {"status": "completed", "current_stage": None, "duration_seconds": 3.0}))
+        relay.poll()
+        await asyncio.sleep(0)
+        return added, stage, drain(subscription)
+
+    added, stage, finished = asyncio.run(scenario())
+
+    assert [(e["type"], e["content_ids"]) for e in added] == [("content_added", ["remote"])]
+    assert [(e["type"], e["content_id"], e["stage"]) for e in stage] == [("stage", "remote", "writing")]
+    assert [(e["type"], e["status"]) for e in finished] == [("status", "completed")]
+
+
+def test_relay_skips_own_changes_and_does_not_repeat(tmp_path):
+    catalogue = ContentCatalogue(str(tmp_path / "catalogue.sqlite3"))
+    bus = EventBus()
+    relay = CatalogueRelay(bus, catalogue)
+
+    catalogue.add_plan(plan("local"))
+    catalogue.update("local", status="completed")
+    assert relay.poll() == 0
+
+    in_other_process(catalogue.path, ("remote", None), ("remote", {"status": "error", "error": "boom"}))
+    assert relay.poll() == 1
+    assert relay.poll() == 0
+
+
+def test_relay_runs_in_the_background(tmp_path):
+    catalogue = ContentCatalogue(str(tmp_path / "catalogue.sqlite3"))
+    bus = EventBus()
+    relay = CatalogueRelay(bus, catalogue, interval=0.05)
+
+    async def scenario():
+        subscription = bus.subscribe(content_id="remote")
+        relay.start()
+        await asyncio.to_thread(in_other_process, catalogue.path, ("remote", None),
+                                ("remote", {"status": "completed"}))
+        event = await asyncio.wait_for(subscription.queue.get(), timeout=2)
+        await relay.stop()
+        return event
+
+    event = asyncio.run(scenario())
+    assert event["type"] == "status" and event["status"] == "completed"
+
+
+def test_subscribers_only_receive_their_content_and_global_events():
+    bus = EventBus()
+
+    async def scenario():
+        everything, only_a = bus.subscribe(), bus.subscribe(content_id="a")
+        bus.publish("stage", "a", stage="writing")
+        bus.publish("stage", "b", stage="research")
+        bus.publish("content_added", content_ids=["c"])
+        await asyncio.sleep(0)
+        return drain(everything), drain(only_a)
+
+    everything, only_a = asyncio.run(scenario())
+    assert [e["content_id"] for e in everything] == ["a", "b", None]
+    assert [(e["type"], e["content_id"]) for e in only_a] == [("stage", "a"), ("content_added", None)]
+
+
+def test_reconnecting_client_replays_missed_events():
+    bus = EventBus()
+    for stage in ("research", "writing", "fact_check"):
+        bus.publish("stage", "a", stage=stage)
+
+    async def scenario():
+        return drain(bus.subscribe(content_id="a", last_event_id=1))
+
+    assert [e["stage"] for e in asyncio.run(scenario())] == ["writing", "fact_check"]
+
+
+def test_slow_subscriber_drops_its_oldest_events():
+    bus = EventBus(max_queued=3)
+
+    async def scenario():
+        subscription = bus.subscribe()
+        for n in range(5):
+            bus.publish("stage", "a", stage=str(n))
+        await asyncio.sleep(0)
+        return subscription, drain(subscription)
+
+    subscription, events = asyncio.run(scenario())
+    assert [e["stage"] for e in events] == ["2", "3", "4"]
+    assert subscription.dropped == 2 and bus.stats()["dropped"] == 2
+
+
+def test_events_published_from_worker_threads_reach_the_loop():
+    bus = EventBus()
+
+    async def scenario():
+        subscription = bus.subscribe()
+        await asyncio.to_thread(bus.publish, "status", "a", status="completed")
+        event = await asyncio.wait_for(subscription.queue.get(), timeout=2)
+        bus.unsubscribe(subscription)
+        return event
+
+    assert asyncio.run(scenario())["status"] == "completed"
+    assert bus.stats()["subscribers"] == 0
+
+
+def test_relay_only_polls_while_someone_is_subscribed(tmp_path, monkeypatch):
+    catalogue = ContentCatalogue(str(tmp_path / "catalogue.sqlite3"))
+    bus = EventBus()
+    relay = CatalogueRelay(bus, catalogue, interval=0.02)
+    polls = []
+    poll = relay.poll
+    monkeypatch.setattr(relay, "poll", lambda: polls.append(1) or poll())
+
+    async def scenario():
+        relay.start()
+        await asyncio.sleep(0.1)
+        idle = len(polls)
+
+        subscription = bus.subscribe()
+        await asyncio.sleep(0.1)
+        listening = len(polls)
+
+        bus.unsubscribe(subscription)
+        await asyncio.sleep(0.05)
+        stopped = len(polls)
+        await asyncio.sleep(0.1)
+        await relay.stop()
+        return idle, listening, stopped, len(polls)
+
+    idle, listening, stopped, final = asyncio.run(scenario())
+    assert idle == 0
+    assert listening >= 2
+    assert final == stopped
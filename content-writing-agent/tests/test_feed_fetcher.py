@@ -0,0 +1,121 @@
+import time
+import asyncio
+import httpx
+import pytest
+from collections import Counter
+from services import feed_fetcher
+from services.feed_fetcher import PoliteFetcher
+
+
+class FakeHosts:
+    """Answers every request in-process after a delay, recording when each one started."""
+
+    def __init__(self, delay: float = 0.0, responses=None):
+        self.delay = delay
+        self.responses = responses or {}
+        self.starts = []
+        self.in_flight = Counter()
+        self.peak_per_host = Counter()
+        self.peak_total = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.starts.append((host, time.monotonic()))
+        self.in_flight[host] += 1
+        self.peak_per_host[host] = max(self.peak_per_host[host], self.in_flight[host])
+        self.peak_total = max(self.peak_total, sum(self.in_flight.values()))
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight[host] -= 1
+        status, headers = self.responses.get(str(request.url), (200, {}))
+        return httpx.Response(status, headers=headers, content=b"ok")
+
+    def gaps(self, host):
+        starts = [started for name, started in self.starts if name == host]
+        return [later - earlier for earlier, later in zip(starts, starts[1:])]
+
+
+@pytest.fixture
+def hosts(monkeypatch):
+    hosts = FakeHosts()
+    client = httpx.AsyncClient
+
+    def with_fake_transport(**kwargs):
+        return client(transport=httpx.MockTransport(hosts.handle), **kwargs)
+
+    monkeypatch.setattr(feed_fetcher.httpx, "AsyncClient", with_fake_transport)
+    return hosts
+
+
+def fetch_all(fetcher, urls):
+    async def run():
+        try:
+            return await asyncio.gather(*(fetcher.get(url) for url in urls))
+        finally:
+            await fetcher.aclose()
+
+    return asyncio.run(run())
+
+
+def test_requests_to_one_host_are_spaced_while_other_hosts_proceed(hosts):
+    fetcher = PoliteFetcher(max_concurrency=8, per_host_connections=4, host_interval=0.1)
+    began = time.monotonic()
+    fetch_all(fetcher, ["http://a.example.com/1", "http://a.example.com/2", "http://a.example.com/3",
+                        "http://b.example.com/1"])
+
+    assert all(gap >= 0.09 for gap in hosts.gaps("a.example.com"))
+    b_started = [started for host, started in hosts.starts if host == "b.example.com"][0]
+    assert b_started - began < 0.09
+
+
+def test_per_host_and_global_concurrency_limits(hosts):
+    hosts.delay = 0.05
+    fetcher = PoliteFetcher(max_concurrency=3, per_host_connections=2, host_interval=0.0)
+    urls = [f"http://{host}.example.com/{n}" for host in "abcd" for n in range(4)]
+    responses = fetch_all(fetcher, urls)
+
+    assert [response.status_code for response in responses] == [200] * len(urls)
+    assert max(hosts.peak_per_host.values()) <= 2
+    assert hosts.peak_total == 3
+
+
+def test_retry_after_pushes_back_only_that_host(hosts):
+    hosts.responses["http://busy.example.com/1"] = (429, {"Retry-After": "0.3"})
+    fetcher = PoliteFetcher(max_concurrency=8, per_host_connections=1, host_interval=0.0)
+
+    async def run():
+        try:
+            first = await fetcher.get("http://busy.example.com/1")
+            await asyncio.gather(fetcher.get("http://busy.example.com/2"), fetcher.get("http://calm.example.com/1"))
+            return first
+        finally:
+            await fetcher.aclose()
+
+    assert asyncio.run(run()).status_code == 429
+    busy_gap = hosts.gaps("busy.example.com")[0]
+    calm_started = [started for host, started in hosts.starts if host == "calm.example.com"][0]
+    assert busy_gap >= 0.28
+    assert calm_started - hosts.starts[0][1] < 0.2
+
+
+def test_session_follows_the_event_loop(hosts):
+    fetcher = PoliteFetcher(host_interval=0.0)
+    fetch_all(fetcher, ["http://a.example.com/1"])
+    # A second asyncio.run gets a fresh session rather than one bound to the closed loop
+    fetch_all(fetcher, ["http://a.example.com/2"])
+    assert len(hosts.starts) == 2
+
+
+def test_session_of_a_finished_loop_is_closed_when_replaced(hosts):
+    fetcher = PoliteFetcher(host_interval=0.0)
+
+    async def fetch(url):
+        await fetcher.get(url)
+        session = fetcher._session
+        await asyncio.sleep(0.01)
+        return session
+
+    first = asyncio.run(fetch("http://a.example.com/1"))
+    second = asyncio.run(fetch("http://a.example.com/2"))
+    assert first is not second and first.is_closed
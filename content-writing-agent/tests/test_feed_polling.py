@@ -0,0 +1,120 @@
+import time
+import asyncio
+import httpx
+import pytest
+from email.utils import formatdate
+from agents import monitor_agent
+from agents.monitor_agent import WebMonitorAgent
+from services.feed_state import FeedStateStore
+from services.seen_urls import MemorySeenUrlIndex
+
+FEED_URL = "http://feeds.example.com/ai.xml"
+
+
+class FakeFeedServer:
+    """Serves one RSS feed with ETag support and AI-related article pages."""
+
+    def __init__(self, entries: int, validators: bool = True):
+        now = time.time()
+        self.validators = validators
+        self.items = [(f"id-{n}", f"http://news.example.com/a/{n}", now - 3600 * (entries - n))
+                      for n in range(entries)]
+        self.requests = []
+
+    @property
+    def etag(self) -> str:
+        return f'"v{len(self.items)}"'
+
+    def feed(self) -> bytes:
+        items = "".join(
+            f"<item><guid>{guid}</guid><title>AI story {guid}</title><link>{link}</link>"
+            f"<pubDate>{formatdate(published, usegmt=True)}</pubDate></item>"
+            for guid, link, published in reversed(self.items)
+        )
+        return f'<?xml version="1.0"?><rss version="2.0"><channel><title>f</title>{items}</channel></rss>'.encode()
+
+    async def get(self, url, kind="article", headers=None):
+        self.requests.append((kind, url))
+        request = httpx.Request("GET", url)
+        if kind == "feed" and not self.validators:
+            self.feed_headers = dict(headers or {})
+            return httpx.Response(200, content=self.feed(), request=request)
+        if kind == "feed":
+            if (headers or {}).get("If-None-Match") == self.etag:
+                return httpx.Response(304, request=request)
+            return httpx.Response(200, content=self.feed(), headers={"ETag": self.etag}, request=request)
+        return httpx.Response(200, content=b"<p>machine learning news</p>", request=request)
+
+    def articles_fetched(self):
+        return [url for kind, url in self.requests if kind == "article"]
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    agent = WebMonitorAgent()
+    agent.sources = [{"name": "Example AI", "url": FEED_URL}]
+    agent.seen_urls = MemorySeenUrlIndex(bloom_capacity=0)
+    agent.feed_states = FeedStateStore(str(tmp_path / "feed_state.sqlite3"))
+    return agent
+
+
+def poll(agent):
+    return [update["url"] for update in asyncio.run(agent.check_for_updates())]
+
+
+def test_entries_beyond_the_per_poll_cap_are_handled_on_later_polls(monitor):
+    server = FakeFeedServer(entries=7)
+    monitor.fetcher = server
+
+    first, second, third = poll(monitor), poll(monitor), poll(monitor)
+
+    assert len(first) == 3 and len(second) == 3 and len(third) == 1
+    assert sorted(first + second + third) == sorted(link for _, link, _ in server.items)
+    assert sorted(server.articles_fetched()) == sorted(link for _, link, _ in server.items)
+
+
+def test_unchanged_feed_costs_one_conditional_request(monitor):
+    server = FakeFeedServer(entries=2)
+    monitor.fetcher = server
+    assert len(poll(monitor)) == 2
+
+    server.requests.clear()
+    assert poll(monitor) == []
+    assert server.requests == [("feed", FEED_URL)]
+
+
+def test_only_entries_added_since_the_last_poll_are_checked(monitor):
+    server = FakeFeedServer(entries=2)
+    monitor.fetcher = server
+    poll(monitor)
+
+    server.items.append(("id-new", "http://news.example.com/a/new", time.time()))
+    server.requests.clear()
+    assert poll(monitor) == ["http://news.example.com/a/new"]
+    assert server.articles_fetched() == ["http://news.example.com/a/new"]
+
+
+def test_entries_older_than_the_cutoff_are_ignored(monitor):
+    server = FakeFeedServer(entries=1)
+    server.items.insert(0, ("id-old", "http://news.example.com/a/old", time.time() - 3 * 86400))
+    monitor.fetcher = server
+
+    assert poll(monitor) == ["http://news.example.com/a/0"]
+
+
+def test_unchanged_body_from_a_server_without_validators_is_not_read_again(monitor, monkeypatch):
+    parsed = []
+    parse = monitor_agent.feedparser.parse
+    monkeypatch.setattr(monitor_agent.feedparser, "parse", lambda content: parsed.append(1) or parse(content))
+    server = FakeFeedServer(entries=2, validators=False)
+    monitor.fetcher = server
+    assert len(poll(monitor)) == 2
+    assert server.feed_headers == {}
+
+    server.requests.clear()
+    assert poll(monitor) == []
+    assert server.requests == [("feed", FEED_URL)] and len(parsed) == 1
+
+    # A changed document is read even though the server never sends validators
+    server.items.append(("id-new", "http://news.example.com/a/new", time.time()))
+    assert poll(monitor) == ["http://news.example.com/a/new"]
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+import rebuild
+from services import content_pipeline
+from services.content_pipeline import CONTENT_PIPELINE, checkpoints, store, run_content_pipeline
+from services.job_queue import JobQueue
+
+ALL_STAGES = ["classification", "research", "writing", "fact_check", "proofreading", "publishing"]
+
+
+@pytest.fixture
+def ran(monkeypatch):
+    """Replace every stage with one that stores a small artifact and logs that it ran."""
+    log = []
+    for name, stage in CONTENT_PIPELINE.stages.items():
+        async def run(context, inputs, name=name):
+            log.append(name)
+            output = {"stage": name, "plan": context["content_plan"], "inputs": sorted(inputs)}
+            await store.aput(CONTENT_PIPELINE.stages[name].artifact_path(context), output)
+            return output
+        monkeypatch.setattr(stage, "run", run)
+    return log
+
+
+def stored_plan(content_id, plan):
+    store.put(f"content_plans/{content_id}.json", plan)
+    assert asyncio.run(run_content_pipeline(content_id)) == "completed"
+
+
+def stale(content_id):
+    context = asyncio.run(content_pipeline.load_context(content_id))
+    return checkpoints.stale_stages(content_id, CONTENT_PIPELINE, context)
+
+
+def test_unchanged_content_is_not_recomputed(ran):
+    stored_plan("unchanged", {"title": "A"})
+    assert stale("unchanged") == []
+
+    ran.clear()
+    asyncio.run(run_content_pipeline("unchanged"))
+    assert ran == []
+
+
+def test_changed_stage_code_recomputes_it_and_everything_downstream(ran, monkeypatch):
+    stored_plan("edited-prompt", {"title": "A"})
+    monkeypatch.setattr(CONTENT_PIPELINE.stages["proofreading"], "version", "edited")
+
+    assert stale("edited-prompt") == ["proofreading", "publishing"]
+    ran.clear()
+    asyncio.run(run_content_pipeline("edited-prompt"))
+    assert sorted(ran) == ["proofreading", "publishing"]
+
+
+def test_changed_content_plan_recomputes_every_stage(ran):
+    stored_plan("edited-plan", {"title": "A"})
+    store.put("content_plans/edited-plan.json", {"title": "B"})
+    assert stale("edited-plan") == ALL_STAGES
+
+
+def test_tampered_artifact_is_not_reused(ran):
+    stored_plan("tampered", {"title": "A"})
+    store.put("article_tampered.json", {"stage": "writing", "edited": "by hand"})
+    assert stale("tampered") == ["writing", "fact_check", "proofreading", "publishing"]
+
+
+def test_rebuild_dry_run_only_reports_the_plan(ran, monkeypatch, capsys):
+    stored_plan("dry-run", {"title": "A"})
+    monkeypatch.setattr(CONTENT_PIPELINE.stages["publishing"], "version", "edited")
+
+    ran.clear()
+    asyncio.run(rebuild.rebuild(["dry-run"], dry_run=True))
+    assert ran == []
+    assert "dry-run: publishing" in capsys.readouterr().out
+
+
+def test_rebuild_runs_through_the_job_queue_and_skips_unknown_content(ran, monkeypatch, capsys):
+    stored_plan("queued-rebuild", {"title": "A"})
+    monkeypatch.setattr(CONTENT_PIPELINE.stages["publishing"], "version", "edited")
+
+    ran.clear()
+    progress = asyncio.run(rebuild.rebuild(["queued-rebuild", "never-stored"], report_interval=0.05))
+    assert ran == ["publishing"]
+    assert [(item["content_id"], item["status"]) for item in progress["items"]] == [("queued-rebuild", "completed")]
+    assert JobQueue().counts()["completed"] == 1
+    assert "never-stored: skipped, no stored content plan" in capsys.readouterr().out
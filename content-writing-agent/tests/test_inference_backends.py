@@ -0,0 +1,69 @@
+import time
+import asyncio
+import threading
+import pytest
+import services.inference_backends as inference_backends
+from services.inference_backends import (InferenceBackend, LocalTransformersBackend, RemoteHTTPBackend,
+                                         get_backend)
+
+
+@pytest.fixture(autouse=True)
+def fresh_backends(monkeypatch):
+    monkeypatch.setattr(inference_backends, "_backends", {})
+
+
+def test_backend_selection_by_mode(monkeypatch):
+    monkeypatch.setenv("INFERENCE_BACKEND", "remote")
+    assert isinstance(get_backend("any/model"), RemoteHTTPBackend)
+
+    monkeypatch.setenv("INFERENCE_BACKEND", "auto")
+    monkeypatch.setenv("LOCAL_MODELS", "google/flan-t5-large, other/model")
+    assert isinstance(get_backend("google/flan-t5-large"), LocalTransformersBackend)
+    assert isinstance(get_backend("mistralai/Mistral-7B-Instruct-v0.2"), RemoteHTTPBackend)
+    # One instance per backend kind, shared by every model it serves
+    assert get_backend("other/model") is get_backend("google/flan-t5-large")
+
+
+def test_remote_backend_needs_an_api_token():
+    assert not RemoteHTTPBackend().is_available()
+
+
+def test_default_batch_generates_each_prompt():
+    class Echo(InferenceBackend):
+        async def generate(self, model_id, prompt, parameters, timeout=None):
+            return prompt.upper()
+
+    assert asyncio.run(Echo().generate_batch("model", ["a", "b"], {})) == ["A", "B"]
+
+
+def test_local_backend_generates_off_the_event_loop(monkeypatch):
+    backend = LocalTransformersBackend(quantize=False, max_workers=1)
+    threads = []
+
+    def fake_generate(model_id, prompts, parameters):
+        threads.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return [f"{model_id}: {prompt}" for prompt in prompts]
+
+    monkeypatch.setattr(backend, "_generate_sync", fake_generate)
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        result = await backend.generate("tiny", "hello", {})
+        with pytest.raises(asyncio.TimeoutError):
+            await backend.generate("tiny", "slow", {}, timeout=0.05)
+        beat.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(run())
+    assert result == "tiny: hello"
+    assert threads[0].startswith("local-inference")
+    assert ticks > 10
@@ -0,0 +1,131 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from services.inference_client import InferenceClient
+
+
+class EchoInferenceServer:
+    """Keep-alive inference endpoint that echoes each prompt and records payloads, connections and overlap."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.payloads = []
+        self.connections = set()
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with server.lock:
+                    server.payloads.append(payload)
+                    server.connections.add(self.client_address)
+                    server.in_flight += 1
+                    server.peak = max(server.peak, server.in_flight)
+                time.sleep(server.delay)
+                with server.lock:
+                    server.in_flight -= 1
+                inputs = payload["inputs"]
+                if isinstance(inputs, list):
+                    body = [[{"generated_text": f"echo {text}"}] for text in inputs]
+                else:
+                    body = [{"generated_text": f"echo {inputs}"}]
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/models"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    fake = EchoInferenceServer()
+    yield fake
+    fake.close()
+
+
+def run_with(client, work):
+    async def run():
+        try:
+            return await work()
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_generate_asks_for_generated_text_only(server):
+    client = InferenceClient(base_url=server.url + "/")
+    text = run_with(client, lambda: client.generate("org/model", "hello", {"max_new_tokens": 5}))
+
+    assert text == "echo hello"
+    assert client.model_url("org/model") == server.url + "/org/model"
+    assert server.payloads[0]["parameters"] == {"max_new_tokens": 5, "return_full_text": False}
+
+
+def test_concurrent_calls_are_capped_and_reuse_pooled_connections(server):
+    server.delay = 0.05
+    client = InferenceClient(base_url=server.url, max_connections=4, max_concurrency=2)
+
+    async def many():
+        first = await asyncio.gather(*(client.generate("m", f"p{n}", {}) for n in range(6)))
+        second = await asyncio.gather(*(client.generate("m", f"q{n}", {}) for n in range(6)))
+        return first + second
+
+    texts = run_with(client, many)
+    assert texts == [f"echo p{n}" for n in range(6)] + [f"echo q{n}" for n in range(6)]
+    assert server.peak == 2
+    # Twelve calls over kept-alive connections, never more than the semaphore lets through
+    assert len(server.connections) <= 2
+
+
+def test_batch_generation_keeps_prompt_order(server):
+    client = InferenceClient(base_url=server.url)
+    texts = run_with(client, lambda: client.generate_batch("m", ["a", "b", "c"], {}))
+    assert texts == ["echo a", "echo b", "echo c"]
+    assert len(server.payloads) == 1
+
+
+def test_session_is_recreated_for_a_new_event_loop(server):
+    client = InferenceClient(base_url=server.url)
+    assert run_with(client, lambda: client.generate("m", "one", {})) == "echo one"
+    assert run_with(client, lambda: client.generate("m", "two", {})) == "echo two"
+
+
+def test_session_of_a_finished_loop_is_closed_when_replaced(server):
+    client = InferenceClient(base_url=server.url)
+    sessions = []
+
+    async def call(prompt):
+        text = await client.generate("m", prompt, {})
+        sessions.append(client._session)
+        await asyncio.sleep(0.05)
+        return text
+
+    assert asyncio.run(call("one")) == "echo one"
+    assert run_with(client, lambda: call("two")) == "echo two"
+    first, second = sessions
+    assert first is not second and first.is_closed
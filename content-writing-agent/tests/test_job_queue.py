@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from services.job_queue import JobQueue, QueueFullError, WorkerPool
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(path=str(tmp_path / "jobs.sqlite3"), max_depth=3)
+
+
+def test_jobs_are_claimed_by_priority_then_age(queue):
+    queue.enqueue("old-low")
+    queue.enqueue("high", priority=5)
+    queue.enqueue("new-low")
+
+    assert [queue.claim()["content_id"] for _ in range(3)] == ["high", "old-low", "new-low"]
+    assert queue.claim() is None
+
+
+def test_duplicate_work_returns_the_existing_job(queue):
+    first = queue.enqueue("plan")
+    assert queue.enqueue("plan")["id"] == first["id"]
+
+    queue.claim()
+    assert queue.enqueue("plan")["id"] == first["id"]
+
+    queue.finish(first["id"], "completed")
+    assert queue.enqueue("plan")["id"] != first["id"]
+
+
+def test_full_queue_rejects_new_work_unless_forced(queue):
+    for n in range(3):
+        queue.enqueue(f"plan-{n}")
+    with pytest.raises(QueueFullError):
+        queue.enqueue("one-too-many")
+    assert queue.enqueue("urgent", force=True)["status"] == "queued"
+    assert queue.depth() == 4
+
+
+def test_jobs_survive_a_restart_and_orphans_are_requeued(queue, tmp_path):
+    job = queue.enqueue("plan")
+    queue.claim()
+
+    # A new process opens the same file; the claiming process is gone
+    restarted = JobQueue(path=str(tmp_path / "jobs.sqlite3"))
+    restarted.owner = "another:1"
+    assert restarted.get_job(job["id"])["status"] == "running"
+    assert restarted.requeue_orphaned() == 1
+    claimed = restarted.claim()
+    assert claimed["id"] == job["id"] and claimed["attempts"] == 2
+
+
+def test_batch_concurrency_limit_holds_across_claims(queue):
+    batch = queue.enqueue_batch(["a", "b", "c"], concurrency=1)
+    queue.enqueue("interactive", force=True)
+
+    assert queue.claim()["content_id"] == "a"
+    # The batch is at its limit, so other work goes ahead of its next job
+    assert queue.claim()["content_id"] == "interactive"
+    assert queue.claim() is None
+
+    queue.finish(batch["jobs"][0]["id"], "completed")
+    assert queue.claim()["content_id"] == "b"
+    progress = queue.batch_progress(batch["batch_id"])
+    assert progress["counts"] == {"queued": 1, "running": 1, "completed": 1, "failed": 0}
+
+
+def test_worker_pool_runs_jobs_concurrently_up_to_its_size(queue):
+    for n in range(3):
+        queue.enqueue(f"plan-{n}")
+    running, peak = 0, 0
+
+    async def handler(content_id):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.1)
+        running -= 1
+        return "error" if content_id == "plan-2" else "completed"
+
+    async def run():
+        pool = WorkerPool(queue, handler, size=2, poll_interval=0.05)
+        pool.start()
+        while sum(queue.counts().get(status, 0) for status in ("completed", "failed")) < 3:
+            await asyncio.sleep(0.02)
+        await pool.stop()
+        return pool.stats()
+
+    stats = asyncio.run(run())
+    assert peak == 2
+    assert (stats["jobs_completed"], stats["jobs_failed"]) == (2, 1)
+    assert queue.counts() == {"completed": 2, "failed": 1}
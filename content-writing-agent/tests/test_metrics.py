@@ -0,0 +1,71 @@
+import asyncio
+from fastapi.testclient import TestClient
+from services.metrics import MetricsRegistry, record_usage
+from services.pipeline import PipelineGraph, Stage
+
+
+def test_counters_and_histograms_render_in_prometheus_format():
+    registry = MetricsRegistry()
+    calls = registry.counter("llm_calls_total", "LLM calls", ["agent"])
+    latency = registry.histogram("stage_seconds", "Stage latency", ["stage"], buckets=(1, 10))
+    calls.inc(agent="writing")
+    calls.inc(2, agent='say "hi"\n')
+    latency.observe(0.5, stage="research")
+    latency.observe(5, stage="research")
+
+    text = registry.render()
+    assert "# TYPE llm_calls_total counter" in text
+    assert 'llm_calls_total{agent="writing"} 1' in text
+    assert 'llm_calls_total{agent="say \\"hi\\"\\n"} 2' in text
+    # Buckets are cumulative and end with +Inf
+    assert 'stage_seconds_bucket{stage="research",le="1"} 1' in text
+    assert 'stage_seconds_bucket{stage="research",le="10"} 2' in text
+    assert 'stage_seconds_bucket{stage="research",le="+Inf"} 2' in text
+    assert 'stage_seconds_sum{stage="research"} 5.5' in text
+    assert 'stage_seconds_count{stage="research"} 2' in text
+
+
+def test_registering_twice_returns_the_same_metric():
+    registry = MetricsRegistry()
+    first = registry.counter("jobs_total", "Jobs")
+    assert registry.counter("jobs_total", "Jobs") is first
+
+
+def test_collectors_are_read_at_scrape_time_and_failures_are_skipped():
+    registry = MetricsRegistry()
+    depth = {"value": 3}
+    registry.add_collector(lambda: [("queue_depth", "gauge", "Queued jobs", [({}, depth["value"])])])
+    registry.add_collector(lambda: 1 / 0)
+
+    assert "queue_depth 3" in registry.render()
+    depth["value"] = 7
+    assert "queue_depth 7" in registry.render()
+
+
+def test_usage_is_attributed_to_the_stage_that_recorded_it():
+    async def chatty(context, inputs):
+        record_usage(llm_calls=1, prompt_tokens=100)
+        await asyncio.sleep(0.01)
+        record_usage(llm_calls=1)
+        return {}
+
+    async def quiet(context, inputs):
+        await asyncio.sleep(0.01)
+        record_usage(bytes_fetched=10)
+        return {}
+
+    graph = PipelineGraph([Stage("chatty", chatty, version="1"), Stage("quiet", quiet, version="1")])
+    run = asyncio.run(graph.run({}))
+
+    assert run.timings["chatty"]["usage"] == {"llm_calls": 2, "prompt_tokens": 100}
+    assert run.timings["quiet"]["usage"] == {"bytes_fetched": 10}
+    # Outside a stage there is nothing to attribute to
+    record_usage(llm_calls=1)
+
+
+def test_metrics_endpoint_serves_the_registry():
+    import api
+    response = TestClient(api.app).get("/metrics")
+    assert response.status_code == 200
+    assert "# TYPE pipeline_runs_total counter" in response.text
+    assert "worker_pool_busy_workers" in response.text
@@ -0,0 +1,118 @@
+import time
+import asyncio
+import pytest
+import agents.base_agent as base_agent
+from agents.base_agent import BaseAgent
+from services.inference_backends import InferenceBackend
+from services.model_router import ModelRouter, LARGE_MODEL, SMALL_MODEL
+from services.prompt_budget import PromptBudgeter, PromptSection
+
+LARGE = "large-model"
+SMALL = "small-model"
+
+
+class FakeBackend(InferenceBackend):
+    """Backend whose models fail or stall on request."""
+
+    name = "fake"
+
+    def __init__(self, failing=(), slow=(), delay=1.0):
+        self.failing = set(failing)
+        self.slow = set(slow)
+        self.delay = delay
+        self.calls = []
+        self.prompts = {}
+
+    async def generate(self, model_id, prompt, parameters, timeout=None):
+        self.calls.append(model_id)
+        self.prompts[model_id] = prompt
+        if model_id in self.slow:
+            await asyncio.sleep(self.delay)
+        if model_id in self.failing:
+            raise RuntimeError(f"{model_id} is down")
+        return f"answer from {model_id}"
+
+
+@pytest.fixture
+def make_agent(monkeypatch):
+    def make(backend, slo=0.2):
+        monkeypatch.setattr(base_agent, "get_backend", lambda model_id: backend)
+        agent = BaseAgent(name="Writing Agent", system_prompt="Write.", model_name=LARGE)
+        agent.router = ModelRouter(routes={"writing:article": {"models": [LARGE, SMALL], "p95_slo_seconds": slo}})
+        return agent
+    return make
+
+
+def test_failed_primary_falls_back_to_the_next_tier(make_agent):
+    backend = FakeBackend(failing=[LARGE])
+    agent = make_agent(backend)
+
+    result = asyncio.run(agent.process_with_model("Topic", task="article", use_cache=False))
+    assert result == f"answer from {SMALL}"
+    assert backend.calls == [LARGE, SMALL]
+    decision = agent.router.decisions[-1]
+    assert decision["fallback"] and decision["model"] == SMALL and "down" in decision["reason"]
+
+
+def test_primary_missing_the_slo_falls_back_and_is_still_recorded(make_agent):
+    backend = FakeBackend(slow=[LARGE], delay=0.5)
+    agent = make_agent(backend, slo=0.1)
+
+    async def run():
+        started = time.monotonic()
+        result = await agent.process_with_model("Topic", task="article", use_cache=False)
+        elapsed = time.monotonic() - started
+        # The abandoned call finishes in the background and still counts towards routing
+        await asyncio.sleep(0.6)
+        return result, elapsed
+
+    result, elapsed = asyncio.run(run())
+    assert result == f"answer from {SMALL}"
+    assert elapsed < 0.4
+    assert "SLO" in agent.router.decisions[-1]["reason"]
+    assert agent.router.stats[LARGE].count() == 1
+
+
+def test_every_tier_failing_gives_the_fallback_response(make_agent):
+    backend = FakeBackend(failing=[LARGE, SMALL])
+    agent = make_agent(backend)
+
+    result = asyncio.run(agent.process_with_model("Topic", task="article", use_cache=False))
+    assert "Breaking News" in result
+    assert backend.calls == [LARGE, SMALL]
+
+
+def test_candidates_start_with_the_chosen_tier():
+    router = ModelRouter(routes={"writing:article": {"models": [LARGE, SMALL], "p95_slo_seconds": 1}})
+    assert router.candidates("writing", "article", LARGE) == [LARGE, SMALL]
+
+    for _ in range(router.min_samples):
+        router.record(LARGE, 5.0, ok=True)
+    assert router.candidates("writing", "article", LARGE) == [SMALL, LARGE]
+    assert router.candidates("unrouted", "task", "own-model") == ["own-model"]
+
+
+def test_fallback_tier_gets_a_prompt_fitted_to_its_own_window(make_agent, monkeypatch):
+    monkeypatch.setenv("PROMPT_TOKENIZER_ENABLED", "false")
+    monkeypatch.setattr(PromptBudgeter, "_tokenizers", {})
+    backend = FakeBackend(failing=[LARGE_MODEL])
+    agent = make_agent(backend)
+    agent.router = ModelRouter(routes={"writing:article": {"models": [LARGE_MODEL, SMALL_MODEL]}})
+    research = "\n\n".join(f"Finding {n} about model releases and benchmark results." for n in range(400))
+
+    async def fitted_prompt(model_id=None):
+        sections, report = await agent.fit_prompt([PromptSection("research", research)], overhead="Write:",
+                                                  query="benchmark", task="article", model_id=model_id)
+        return f"Write:{sections['research']}", report
+
+    async def run():
+        prompt, report = await fitted_prompt()
+        return report, await agent.process_with_model(prompt, task="article", use_cache=False,
+                                                      prompt_for=fitted_prompt)
+
+    report, result = asyncio.run(run())
+    assert result == f"answer from {SMALL_MODEL}"
+    assert report["tokens_saved"] == 0
+    small = PromptBudgeter(SMALL_MODEL)
+    assert small.count_tokens(backend.prompts[SMALL_MODEL]) <= small.prompt_budget()
+    assert len(backend.prompts[SMALL_MODEL]) < len(backend.prompts[LARGE_MODEL]) / 4
@@ -0,0 +1,86 @@
+import time
+import asyncio
+import pytest
+from services.pipeline import PipelineGraph, Stage
+
+
+def stage(name, depends_on=(), delay=0.1, fail=False, log=None):
+    async def run(context, inputs):
+        if log is not None:
+            log.append(("start", name))
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        return {"stage": name, "inputs": sorted(inputs)}
+    return Stage(name, run, depends_on=depends_on, version="1")
+
+
+def test_independent_stages_run_concurrently_and_receive_their_inputs():
+    graph = PipelineGraph([
+        stage("research", delay=0.2),
+        stage("fact_check", ["research"], delay=0.2),
+        stage("writing", ["research"], delay=0.2),
+        stage("publishing", ["fact_check", "writing"], delay=0.2)
+    ])
+
+    started = time.monotonic()
+    run = asyncio.run(graph.run({}))
+    elapsed = time.monotonic() - started
+
+    # research, then fact_check and writing side by side, then publishing
+    assert elapsed < 0.75
+    assert run.outputs["publishing"]["inputs"] == ["fact_check", "writing"]
+    assert set(run.timings) == {"research", "fact_check", "writing", "publishing"}
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match="unknown stage"):
+        PipelineGraph([stage("writing", ["research"])])
+    with pytest.raises(ValueError, match="Cycle"):
+        PipelineGraph([stage("a", ["b"]), stage("b", ["a"])])
+    with pytest.raises(ValueError, match="unique"):
+        PipelineGraph([stage("a"), stage("a")])
+
+
+def test_failure_stops_dependent_stages_and_is_reported():
+    log, events = [], []
+
+    async def listener(event, name, details):
+        events.append((event, name))
+
+    graph = PipelineGraph([
+        stage("research", fail=True, log=log),
+        stage("slow_side", delay=0.3, log=log),
+        stage("writing", ["research"], log=log)
+    ])
+
+    with pytest.raises(RuntimeError, match="research failed"):
+        asyncio.run(graph.run({}, listener=listener))
+    assert ("start", "writing") not in log
+    assert ("failed", "research") in events
+    assert ("completed", "slow_side") not in events
+
+
+def test_completed_stages_are_resumed_instead_of_rerun():
+    log, events = [], []
+
+    async def listener(event, name, details):
+        events.append((event, name))
+
+    graph = PipelineGraph([stage("research", log=log), stage("writing", ["research"], log=log)])
+    run = asyncio.run(graph.run({}, listener=listener, completed={"research": {"stage": "research", "inputs": []}}))
+
+    assert log == [("start", "writing")]
+    assert run.timings["research"] == {"resumed": True}
+    assert events[0] == ("resumed", "research")
+
+
+def test_downstream_includes_everything_that_depends_on_a_stage():
+    graph = PipelineGraph([
+        stage("classification"),
+        stage("research", ["classification"]),
+        stage("writing", ["research"]),
+        stage("monitor")
+    ])
+    assert graph.downstream(["research"]) == ["research", "writing"]
+    assert graph.order().index("classification") < graph.order().index("writing")
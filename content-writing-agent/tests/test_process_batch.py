@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from services.job_queue import JobQueue, WorkerPool
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(path=str(tmp_path / "jobs.sqlite3"))
+
+
+def test_batch_pool_only_claims_its_own_jobs(queue):
+    other = queue.enqueue("interactive-request", priority=10)
+    batch = queue.enqueue_batch(["plan-a", "plan-b"], priority=0, concurrency=2)
+    ran = []
+
+    async def handler(content_id):
+        ran.append(content_id)
+        return "completed"
+
+    async def run():
+        pool = WorkerPool(queue, handler, size=2, poll_interval=0.05, batch_id=batch["batch_id"])
+        pool.start()
+        while not queue.batch_progress(batch["batch_id"])["finished"]:
+            await asyncio.sleep(0.02)
+        await pool.stop()
+
+    asyncio.run(run())
+    assert sorted(ran) == ["plan-a", "plan-b"]
+    # The higher-priority job outside the batch is left for the server's workers
+    assert queue.get_job(other["id"])["status"] == "queued"
+
+
+def test_stopping_the_pool_requeues_in_flight_jobs(queue):
+    batch = queue.enqueue_batch(["plan-a", "plan-b", "plan-c"], concurrency=2)
+    started = []
+
+    async def handler(content_id):
+        started.append(content_id)
+        await asyncio.sleep(10)
+        return "completed"
+
+    async def run():
+        pool = WorkerPool(queue, handler, size=2, poll_interval=0.05, batch_id=batch["batch_id"])
+        pool.start()
+        while len(started) < 2:
+            await asyncio.sleep(0.02)
+        return await pool.stop()
+
+    assert asyncio.run(run()) == 2
+    progress = queue.batch_progress(batch["batch_id"])
+    assert progress["counts"]["queued"] == 3
+    assert progress["counts"]["running"] == 0
+    assert all(item["error"] is None for item in progress["items"])
+
+    # A later run picks the interrupted jobs up again
+    assert queue.claim(batch["batch_id"])["content_id"] == "plan-a"
+
+
+def test_release_only_touches_running_jobs_of_this_process(queue, tmp_path):
+    job = queue.enqueue("plan-a")
+    other_process = JobQueue(path=str(tmp_path / "jobs.sqlite3"))
+    other_process.owner = "elsewhere:1"
+
+    assert other_process.claim()["id"] == job["id"]
+    assert not queue.release(job["id"])
+    assert queue.get_job(job["id"])["status"] == "running"
+
+    other_process.finish(job["id"], "completed")
+    assert not other_process.release(job["id"])
+    assert queue.get_job(job["id"])["status"] == "completed"
+
+
+def test_interrupted_cli_batch_leaves_its_jobs_queued(monkeypatch):
+    import process_batch
+    started = asyncio.Event()
+
+    async def pipeline(content_id):
+        started.set()
+        await asyncio.sleep(10)
+        return "completed"
+
+    monkeypatch.setattr(process_batch, "run_content_pipeline", pipeline)
+
+    async def run():
+        # Ctrl-C under asyncio.run cancels the main task
+        batch = asyncio.ensure_future(process_batch.process_batch(["cli-plan"], concurrency=1, report_interval=0.05))
+        await started.wait()
+        batch.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await batch
+
+    asyncio.run(run())
+    jobs = JobQueue().list_jobs()
+    assert [(job["content_id"], job["status"]) for job in jobs if job["content_id"] == "cli-plan"] == [("cli-plan", "queued")]
@@ -0,0 +1,75 @@
+import pytest
+from services.prompt_budget import PromptBudgeter, PromptSection
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # Count tokens by the four-characters estimate instead of downloading tokenizers
+    monkeypatch.setenv("PROMPT_TOKENIZER_ENABLED", "false")
+    monkeypatch.setattr(PromptBudgeter, "_tokenizers", {})
+
+
+def filler(topic: str, n: int) -> str:
+    return "\n\n".join(f"Paragraph {i} about {topic} with some padding words to take up space." for i in range(n))
+
+
+def test_budget_follows_the_model_context_window():
+    assert PromptBudgeter("google/flan-t5-large", max_new_tokens=256).prompt_budget() == 512
+    assert PromptBudgeter("mistralai/Mistral-7B-Instruct-v0.2", max_prompt_tokens=6000).prompt_budget() == 6000
+    assert PromptBudgeter("unknown/model", max_new_tokens=512, max_prompt_tokens=100000).prompt_budget() == 4096 - 512
+
+
+def test_prompt_within_budget_is_left_alone():
+    budgeter = PromptBudgeter("unknown/model", max_prompt_tokens=1000)
+    sections = [PromptSection("research", "Short research."), PromptSection("plan", "Short plan.")]
+
+    fitted, report = budgeter.fit(sections, overhead="Write an article.")
+    assert fitted == {"research": "Short research.", "plan": "Short plan."}
+    assert report["tokens_saved"] == 0
+
+
+def test_oversized_section_keeps_relevant_passages_in_order():
+    budgeter = PromptBudgeter("unknown/model", max_prompt_tokens=120)
+    research = "\n\n".join([
+        "Background on unrelated sports results from last weekend.",
+        "Acme released the Rocket model with a larger context window.",
+        filler("weather", 6),
+        "The Rocket model from Acme is priced per token."
+    ])
+    fitted, report = budgeter.fit([PromptSection("research", research)], query="Acme Rocket model")
+
+    text = fitted["research"]
+    assert budgeter.count_tokens(text) <= 120
+    assert "Acme released the Rocket model" in text
+    assert "priced per token" in text
+    assert text.index("Acme released") < text.index("priced per token")
+    assert report["sections"]["research"]["tokens_saved"] > 0
+    assert report["tokens_after"] <= report["budget"]
+
+
+def test_passages_repeated_from_an_earlier_section_are_dropped_when_over_budget():
+    budgeter = PromptBudgeter("unknown/model", max_prompt_tokens=200)
+    shared = "Acme released the Rocket model on Monday."
+    sections = [
+        PromptSection("plan", shared, compressible=False),
+        PromptSection("research", f"{shared}\n\n{filler('Acme', 20)}")
+    ]
+    fitted, _ = budgeter.fit(sections, query="Acme")
+
+    assert fitted["plan"] == shared
+    assert shared not in fitted["research"]
+
+
+def test_weights_split_the_budget_and_unused_share_is_given_back():
+    budgeter = PromptBudgeter("unknown/model", max_prompt_tokens=300)
+    sections = [
+        PromptSection("small", "Tiny section."),
+        PromptSection("heavy", filler("models", 20), weight=3),
+        PromptSection("light", filler("prices", 20), weight=1)
+    ]
+    fitted, report = budgeter.fit(sections)
+
+    after = {name: data["tokens_after"] for name, data in report["sections"].items()}
+    assert fitted["small"] == "Tiny section."
+    assert after["heavy"] > after["light"]
+    assert sum(after.values()) <= 300
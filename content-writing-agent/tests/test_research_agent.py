@@ -0,0 +1,62 @@
+import time
+import asyncio
+import httpx
+from agents.research_agent import ResearchAgent
+
+SEARCH_PAGE = "".join(
+    f'<div class="result"><a class="result__title">Source {n}</a>'
+    f'<a class="result__url" href="http://source{n}.example.com/story">link</a>'
+    f'<div class="result__snippet">snippet</div></div>'
+    for n in range(3)
+)
+
+
+class SlowWeb:
+    """Answers every request after a delay, like a slow remote site."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.requests = []
+
+    async def get(self, url, kind="article", headers=None):
+        self.requests.append(url)
+        await asyncio.sleep(self.delay)
+        request = httpx.Request("GET", url)
+        if "duckduckgo" in url:
+            return httpx.Response(200, text=SEARCH_PAGE, request=request)
+        return httpx.Response(200, content=b"<p>Details about the story.</p>", request=request)
+
+
+def test_research_fetches_concurrently_without_blocking_the_event_loop():
+    agent = ResearchAgent()
+    web = SlowWeb(delay=0.2)
+    agent.fetcher = web
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.monotonic()
+        result = await agent.process({
+            "content_id": "research-test",
+            "original_update": {"title": "New model released"},
+            "classification": {"content_type": "product_launch", "key_entities": ["Acme"]}
+        })
+        elapsed = time.monotonic() - started
+        beat.cancel()
+        return result, elapsed, ticks
+
+    result, elapsed, ticks = asyncio.run(run())
+
+    # 5 searches and 15 source fetches of 0.2 s each: two rounds, not twenty
+    assert len(web.requests) == 20
+    assert elapsed < 1.0
+    assert ticks > 20
+    assert result["status"] == "completed"
+    assert len(result["sources"]) == 15
@@ -0,0 +1,265 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+from services.inference_client import InferenceClient
+from services.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, RetryPolicy
+
+OK = (200, {}, [{"generated_text": "done"}], 0)
+
+
+class FakeInferenceServer:
+    """Local inference endpoint that answers from a script of (status, headers, body, delay)."""
+
+    def __init__(self, *responses):
+        self.script = list(responses)
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.requests += 1
+                status, headers, body, delay = server.script.pop(0) if server.script else OK
+                time.sleep(delay)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        # The client gives up on slow answers; writing to its closed socket is expected
+        self.httpd.handle_error = lambda request, client_address: None
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/models"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(*responses):
+        servers.append(FakeInferenceServer(*responses))
+        return servers[-1]
+
+    yield start
+    for fake in servers:
+        fake.close()
+
+
+def make_caller(threshold=5, reset=30.0, attempts=3):
+    return ResilientCaller(
+        "fake-model",
+        retry_policy=RetryPolicy(max_attempts=attempts, base_delay=0.0, max_delay=5.0),
+        breaker=CircuitBreaker(failure_threshold=threshold, reset_timeout=reset),
+        hedge=False
+    )
+
+
+def call(caller, fake, timeout=None):
+    async def run():
+        client = InferenceClient(base_url=fake.url, timeout=timeout)
+        try:
+            return await caller.call(lambda: client.generate("fake-model", "prompt", {}))
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+
+def test_rate_limited_call_is_retried_and_does_not_count_against_the_breaker(server):
+    fake = server((429, {}, {"error": "rate limited"}, 0), OK)
+    caller = make_caller()
+
+    assert call(caller, fake) == "done"
+    assert fake.requests == 2
+    assert caller.retries == 1
+    assert caller.breaker.state == "closed"
+    assert caller.breaker.consecutive_failures == 0
+
+
+def test_retry_after_on_503_is_honoured(server):
+    fake = server((503, {"Retry-After": "0.3"}, {"error": "loading"}, 0), OK)
+    caller = make_caller()
+
+    started = time.monotonic()
+    assert call(caller, fake) == "done"
+    assert time.monotonic() - started >= 0.3
+    assert fake.requests == 2
+
+
+def test_timeouts_are_retried(server):
+    fake = server((200, {}, [{"generated_text": "late"}], 1.0), OK)
+    caller = make_caller()
+
+    assert call(caller, fake, timeout=0.2) == "done"
+    assert fake.requests == 2
+    assert caller.breaker.consecutive_failures == 0
+
+
+def test_client_errors_are_not_retried_or_counted(server):
+    fake = server(*[(400, {}, {"error": "bad request"}, 0)] * 3)
+    caller = make_caller(threshold=2)
+
+    for _ in range(3):
+        with pytest.raises(httpx.HTTPStatusError):
+            call(caller, fake)
+    assert fake.requests == 3
+    assert caller.breaker.state == "closed"
+    assert caller.breaker.consecutive_failures == 0
+
+
+def test_breaker_counts_one_failure_per_call_not_per_attempt(server):
+    fake = server(*[(500, {}, {"error": "boom"}, 0)] * 6)
+    caller = make_caller(threshold=2, attempts=3)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        call(caller, fake)
+    assert fake.requests == 3
+    assert caller.breaker.state == "closed"
+    assert caller.breaker.consecutive_failures == 1
+
+    with pytest.raises(httpx.HTTPStatusError):
+        call(caller, fake)
+    assert caller.breaker.state == "open"
+
+    # Open: fails fast without touching the server
+    with pytest.raises(CircuitOpenError):
+        call(caller, fake)
+    assert fake.requests == 6
+    assert caller.rejected == 1
+
+
+def test_half_open_trial_may_retry_and_closes_the_circuit(server):
+    fake = server((500, {}, {"error": "boom"}, 0), (503, {}, {"error": "still loading"}, 0), OK)
+    caller = make_caller(threshold=1, reset=0.2, attempts=1)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        call(caller, fake)
+    assert caller.breaker.state == "open"
+
+    time.sleep(0.25)
+    # The trial call gets its own retries instead of being rejected by its own half-open slot
+    caller.retry_policy.max_attempts = 2
+    assert call(caller, fake) == "done"
+    assert caller.breaker.state == "closed"
+    assert fake.requests == 3
+
+
+def test_failed_half_open_trial_reopens_the_circuit_and_others_wait(server):
+    fake = server((500, {}, {"error": "boom"}, 0), (500, {}, {"error": "boom"}, 0.3))
+    caller = make_caller(threshold=1, reset=0.2, attempts=1)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        call(caller, fake)
+    time.sleep(0.25)
+
+    async def trial_and_bystander():
+        client = InferenceClient(base_url=fake.url)
+        try:
+            trial = asyncio.ensure_future(caller.call(lambda: client.generate("fake-model", "prompt", {})))
+            await asyncio.sleep(0.1)
+            # Only one trial at a time while half-open
+            with pytest.raises(CircuitOpenError):
+                await caller.call(lambda: client.generate("fake-model", "prompt", {}))
+            with pytest.raises(httpx.HTTPStatusError):
+                await trial
+        finally:
+            await client.aclose()
+
+    asyncio.run(trial_and_bystander())
+    assert caller.breaker.state == "open"
+    assert fake.requests == 2
+
+
+def test_cancelled_half_open_trial_frees_the_slot():
+    caller = make_caller(threshold=1, reset=0.01, attempts=1)
+    caller.breaker.record_failure()
+    time.sleep(0.02)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def run():
+        trial = asyncio.ensure_future(caller.call(hang))
+        await asyncio.sleep(0.05)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        return await caller.call(lambda: asyncio.sleep(0, result="recovered"))
+
+    assert asyncio.run(run()) == "recovered"
+    assert caller.breaker.state == "closed"
+
+
+def hedging_caller():
+    caller = ResilientCaller("fake-model", retry_policy=RetryPolicy(max_attempts=1, base_delay=0.0),
+                             breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30.0), hedge=True)
+    for _ in range(caller.hedge_min_samples):
+        caller.latency.record(0.01)
+    return caller
+
+
+def test_slow_call_is_hedged_and_the_loser_cancelled():
+    caller = hedging_caller()
+    running, delays = [], iter([1.0, 0.02])
+
+    async def fn():
+        delay = next(delays)
+        running.append(delay)
+        try:
+            await asyncio.sleep(delay)
+            return delay
+        finally:
+            running.remove(delay)
+
+    async def run():
+        result = await caller.call(fn)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == 0.02
+    assert running == [] and (caller.hedges, caller.hedge_wins) == (1, 1)
+
+
+def test_cancelled_caller_cancels_both_hedged_requests():
+    caller = hedging_caller()
+    running = []
+
+    async def fn():
+        running.append(1)
+        try:
+            await asyncio.sleep(10)
+        finally:
+            running.pop()
+
+    async def run():
+        call = asyncio.ensure_future(caller.call(fn))
+        await asyncio.sleep(0.1)
+        in_flight = len(running)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0.05)
+        # Checked before asyncio.run cancels whatever is left over
+        return in_flight, len(running)
+
+    assert asyncio.run(run()) == (2, 0)
+    assert caller.breaker.state == "closed"
@@ -0,0 +1,97 @@
+import json
+import time
+import multiprocessing
+import pytest
+from services.seen_urls import (
+    BloomFilter, MemorySeenUrlIndex, SQLiteSeenUrlIndex, normalize_url, url_key
+)
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def index(request, tmp_path):
+    if request.param == "sqlite":
+        index = SQLiteSeenUrlIndex(path=str(tmp_path / "seen.sqlite3"), legacy_file="", bloom_capacity=1000)
+    else:
+        index = MemorySeenUrlIndex(bloom_capacity=1000)
+    index._bloom_ready.wait(5)
+    return index
+
+
+def claim_all(path, urls):
+    """Claim URLs from a fresh process, as a second web monitor worker would."""
+    index = SQLiteSeenUrlIndex(path=path, legacy_file="", bloom_capacity=0)
+    return [url for url in urls if index.claim(url)]
+
+
+def test_tracking_parameters_and_fragments_do_not_make_a_new_url():
+    assert normalize_url("HTTPS://Example.com:443/a?utm_source=x&b=2&a=1#top") == "https://example.com/a?a=1&b=2"
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+    assert url_key("https://example.com/a?fbclid=1") == url_key("https://EXAMPLE.com/a")
+    assert url_key("https://example.com/a") != url_key("https://example.com/b")
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=500)
+    keys = [url_key(f"https://example.com/{n}") for n in range(500)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(url_key(f"https://other.com/{n}") in bloom for n in range(2000))
+    assert false_positives < 100
+
+
+def test_claim_mark_and_release(index):
+    urls = ["https://example.com/a", "https://example.com/b", "https://example.com/c"]
+    assert index.unseen(urls) == urls
+
+    assert index.claim(urls[0]) and not index.claim(urls[0] + "?utm_medium=rss")
+    index.mark_processed(urls[0])
+    assert index.claim(urls[1])
+    index.release(urls[1])
+
+    assert index.unseen(urls) == urls[1:]
+    assert index.is_seen(urls[0]) and index.count() == 1
+
+
+def test_release_only_drops_the_callers_own_claim(index):
+    assert index.claim("https://example.com/a")
+    index.owner = "another-host:1"
+    index.release("https://example.com/a")
+    assert not index.claim("https://example.com/a")
+
+
+def test_expired_entries_can_be_claimed_again_and_are_purged(index):
+    index.ttl, index.claim_timeout = 100, 10
+    index.mark_processed("https://example.com/done")
+    assert index.claim("https://example.com/abandoned")
+
+    now = time.time()
+    assert index.expire(now + 50) == 1
+    # The abandoned claim was purged; the processed URL is still remembered
+    assert index.unseen(["https://example.com/abandoned", "https://example.com/done"]) == [
+        "https://example.com/abandoned"]
+    assert index.expire(now + 200) == 1
+    assert index.claim("https://example.com/done")
+
+
+def test_each_url_is_claimed_by_exactly_one_process(tmp_path):
+    path = str(tmp_path / "seen.sqlite3")
+    SQLiteSeenUrlIndex(path=path, legacy_file="", bloom_capacity=0)
+    urls = [f"https://example.com/{n}" for n in range(40)]
+
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        won = pool.starmap(claim_all, [(path, urls)] * 4)
+
+    claimed = [url for urls_won in won for url in urls_won]
+    assert sorted(claimed) == sorted(urls)
+
+
+def test_legacy_json_list_is_imported_once(tmp_path):
+    path = str(tmp_path / "seen.sqlite3")
+    legacy = tmp_path / "processed_urls.json"
+    legacy.write_text(json.dumps(["https://example.com/json"]))
+
+    index = SQLiteSeenUrlIndex(path=path, legacy_file=str(legacy), bloom_capacity=0)
+    assert index.unseen(["https://example.com/json", "https://example.com/new"]) == ["https://example.com/new"]
+    assert not legacy.exists() and (tmp_path / "processed_urls.json.imported").exists()
+    assert SQLiteSeenUrlIndex(path=path, legacy_file=str(legacy), bloom_capacity=0).count() == 1
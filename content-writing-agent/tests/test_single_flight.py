@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from services.single_flight import SingleFlight
+
+
+def test_identical_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    executions = 0
+
+    async def work():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert executions == 1
+    stats = flight.stats()
+    assert (stats["calls"], stats["executions"], stats["shared"], stats["in_flight"]) == (5, 1, 4, 0)
+
+
+def test_finished_calls_are_not_remembered():
+    flight = SingleFlight()
+    counter = iter(range(10))
+
+    async def work():
+        return next(counter)
+
+    async def run():
+        return [await flight.do("key", work), await flight.do("key", work)]
+
+    assert asyncio.run(run()) == [0, 1]
+
+
+def test_errors_are_shared_too():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def run():
+        return await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.executions == 1
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        impatient = asyncio.ensure_future(flight.do("key", work))
+        patient = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_waiters_are_exported_to_metrics():
+    import api
+    from services.metrics import get_metrics
+    from services.single_flight import get_single_flight
+    flight = get_single_flight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "result"
+
+    async def run():
+        calls = [asyncio.create_task(flight.do("metrics-key", work)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        during = get_metrics().render()
+        release.set()
+        await asyncio.gather(*calls)
+        return during, get_metrics().render()
+
+    during, after = asyncio.run(run())
+    assert "llm_single_flight_in_flight 1" in during
+    assert "llm_single_flight_waiters 2" in during
+    assert "llm_single_flight_waiters 0" in after
+    assert "llm_single_flight_max_waiters" in after
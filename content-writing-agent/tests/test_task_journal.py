@@ -0,0 +1,69 @@
+import os
+import json
+import multiprocessing
+from services.task_journal import TaskJournal
+
+
+def plan(content_id, title=""):
+    return {"content_id": content_id, "original_update": {"title": title or content_id}}
+
+
+def add_elsewhere(base_path, prefix, count, compact_after):
+    journal = TaskJournal(base_path, compact_after=compact_after)
+    for n in range(count):
+        journal.add([plan(f"{prefix}-{n}")])
+
+
+def test_plans_survive_a_restart_in_order(tmp_path):
+    base = str(tmp_path / "task_queue")
+    journal = TaskJournal(base, compact_after=100)
+    journal.add([plan("a"), plan("b")])
+    journal.add([plan("a", title="Renamed")])
+    journal.add([])
+
+    reopened = TaskJournal(base, compact_after=100)
+    assert [task["content_id"] for task in reopened.all()] == ["a", "b"]
+    assert reopened.get("a")["original_update"]["title"] == "Renamed"
+    assert reopened.get("missing") is None
+
+
+def test_compaction_writes_a_snapshot_and_drops_old_journals(tmp_path):
+    base = str(tmp_path / "task_queue")
+    journal = TaskJournal(base, compact_after=3)
+    for n in range(7):
+        journal.add([plan(f"item-{n}")])
+
+    with open(base + ".snapshot.json", "r") as f:
+        snapshot = json.load(f)
+    assert snapshot["generation"] == 2 and len(snapshot["tasks"]) == 6
+    assert sorted(os.listdir(tmp_path)) == ["task_queue.2.journal", "task_queue.lock", "task_queue.snapshot.json"]
+    assert len(TaskJournal(base, compact_after=3)) == 7
+
+
+def test_readers_catch_up_with_writes_and_compactions_by_other_processes(tmp_path):
+    base = str(tmp_path / "task_queue")
+    reader = TaskJournal(base, compact_after=5)
+    reader.add([plan("local")])
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=add_elsewhere, args=(base, f"worker{w}", 12, 5)) for w in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    ids = {task["content_id"] for task in reader.all()}
+    assert ids == {"local"} | {f"worker{w}-{n}" for w in range(3) for n in range(12)}
+
+
+def test_legacy_queue_file_is_imported_once(tmp_path):
+    base = str(tmp_path / "task_queue")
+    with open(base + ".json", "w") as f:
+        json.dump([plan("old-1"), plan("old-2")], f)
+
+    journal = TaskJournal(base)
+    journal.add([plan("new")])
+    assert [task["content_id"] for task in journal.all()] == ["old-1", "old-2", "new"]
+    assert os.path.exists(base + ".json.imported") and not os.path.exists(base + ".json")
+    assert len(TaskJournal(base)) == 3